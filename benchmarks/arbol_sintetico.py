@@ -0,0 +1,129 @@
+# benchmarks/arbol_sintetico.py
+"""
+Generador de árboles de proyecto sintéticos para los benchmarks.
+El árbol es reproducible (misma semilla y parámetros => mismos archivos) y se
+reutiliza entre ejecuciones si su manifiesto coincide con los parámetros pedidos.
+"""
+import json
+import math
+import os
+import random
+import shutil
+
+MANIFIESTO = "arbol_sintetico.json"
+
+EXTENSIONES_TEXTO = (".py", ".js", ".ts", ".md", ".json", ".css", ".html", ".txt", ".log")
+EXTENSIONES_BINARIAS = (".png", ".bin", ".pyc")
+NOMBRES_BASE = ("main", "util", "config", "test", "models", "views", "api", "helpers", "core", "service")
+DIRECTORIOS_IGNORADOS = ("node_modules", "venv", ".git", "dist", "build", "__pycache__")
+
+# Bloques de contenido precalculados: cada archivo es un corte de ellos, así
+# generar un millón de archivos no está dominado por la generación de texto.
+_LINEAS_MUESTRA = (
+    "def procesar(elemento, opciones=None):",
+    "    # Comentario de ejemplo para el benchmark",
+    "    resultado = [x * 2 for x in range(elemento) if x % 3]",
+    "    return {'clave': resultado, 'total': len(resultado)}",
+    "",
+    "const valor = calcular(datos, { modo: 'rapido', limite: 100 });",
+    "function calcular(datos, opciones) { return datos.map(d => d + 1); }",
+    "/* bloque de comentario */ .clase { color: #333; margin: 0 auto; }",
+    "<div class=\"contenedor\"><p>Texto de ejemplo</p></div>",
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod.",
+)
+TAMANO_BLOQUE = 4 * 1024 * 1024
+
+
+def _bloque_texto(aleatorio):
+    lineas = []
+    total = 0
+    while total < TAMANO_BLOQUE:
+        linea = aleatorio.choice(_LINEAS_MUESTRA)
+        lineas.append(linea)
+        total += len(linea) + 1
+    return "\n".join(lineas).encode("utf-8")
+
+
+def _bloque_binario(aleatorio):
+    return aleatorio.randbytes(256 * 1024) + b"\x00" * 1024
+
+
+def parametros_por_defecto():
+    return {
+        "archivos": 1000,
+        "profundidad": 4,
+        "ramas": 6, # Subdirectorios posibles por nivel
+        "tamano_medio": 4096, # Mediana del tamaño de archivo (bytes), distribución lognormal
+        "dispersion_tamano": 1.0, # Sigma de la lognormal
+        "tamano_maximo": 1024 * 1024,
+        "proporcion_binarios": 0.05,
+        "proporcion_ignorados": 0.2, # Archivos dentro de directorios como node_modules o venv
+        "semilla": 0,
+    }
+
+
+def generar_arbol(destino, **parametros):
+    """
+    Genera (o reutiliza) un árbol sintético en 'destino' y devuelve su manifiesto:
+    los parámetros usados más el número de archivos y bytes escritos.
+    """
+    opciones = parametros_por_defecto()
+    desconocidos = set(parametros) - set(opciones)
+    if desconocidos:
+        raise ValueError(f"Parámetros desconocidos: {', '.join(sorted(desconocidos))}")
+    opciones.update(parametros)
+
+    ruta_manifiesto = os.path.join(destino, MANIFIESTO)
+    if os.path.exists(ruta_manifiesto):
+        with open(ruta_manifiesto, "r", encoding="utf-8") as f:
+            manifiesto = json.load(f)
+        if manifiesto.get("parametros") == opciones:
+            return manifiesto
+        shutil.rmtree(destino)
+
+    aleatorio = random.Random(opciones["semilla"])
+    texto = _bloque_texto(aleatorio)
+    binario = _bloque_binario(aleatorio)
+    mu = math.log(max(1, opciones["tamano_medio"]))
+    directorios_creados = set()
+    total_bytes = 0
+
+    for indice in range(opciones["archivos"]):
+        partes = [
+            f"modulo_{aleatorio.randrange(opciones['ramas'])}"
+            for _ in range(aleatorio.randint(0, opciones["profundidad"]))
+        ]
+        if aleatorio.random() < opciones["proporcion_ignorados"]:
+            partes.insert(aleatorio.randint(0, len(partes)), aleatorio.choice(DIRECTORIOS_IGNORADOS))
+        directorio = os.path.join(destino, *partes)
+        if directorio not in directorios_creados:
+            os.makedirs(directorio, exist_ok=True)
+            directorios_creados.add(directorio)
+
+        tamano = min(opciones["tamano_maximo"], int(aleatorio.lognormvariate(mu, opciones["dispersion_tamano"])))
+        if aleatorio.random() < opciones["proporcion_binarios"]:
+            extension = aleatorio.choice(EXTENSIONES_BINARIAS)
+            fuente = binario
+        else:
+            extension = aleatorio.choice(EXTENSIONES_TEXTO)
+            fuente = texto
+        tamano = min(tamano, len(fuente))
+        inicio = aleatorio.randrange(len(fuente) - tamano + 1)
+        nombre = f"{aleatorio.choice(NOMBRES_BASE)}_{indice}{extension}"
+        with open(os.path.join(directorio, nombre), "wb") as f:
+            f.write(fuente[inicio:inicio + tamano])
+        total_bytes += tamano
+
+    # .gitignore para el escenario que respeta los .gitignore
+    with open(os.path.join(destino, ".gitignore"), "w", encoding="utf-8") as f:
+        f.write("\n".join(f"{d}/" for d in DIRECTORIOS_IGNORADOS) + "\n*.log\n")
+
+    manifiesto = {
+        "parametros": opciones,
+        "archivos": opciones["archivos"],
+        "directorios": len(directorios_creados),
+        "bytes": total_bytes,
+    }
+    with open(ruta_manifiesto, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, indent=4)
+    return manifiesto
@@ -0,0 +1,267 @@
+# benchmarks/bench_contexto.py
+"""
+Benchmark de las fases de generación de contexto sobre un árbol sintético.
+Se ejecuta desde la raíz del repositorio:
+
+    python -m benchmarks.bench_contexto --archivos 10000 --salida resultados.json
+    python -m benchmarks.bench_contexto --archivos 10000 --comparar resultados.json
+
+Fases medidas por escenario (configuraciones representativas de 'patrones' y
+'directorios_prohibidos'):
+- recorrido: ProjectWalker sin filtros
+- filtrado: recorrido + filtros de FileProcessor (lo que se seleccionaría)
+- should_include: FileProcessor._should_include sobre todas las rutas seleccionadas
+- lectura: lectura y formateo de los archivos seleccionados, sin caché
+- ensamblado: unión de la cabecera y los bloques en el texto final
+- total: FileProcessor.iter_contexto de principio a fin, sin caché
+Además se mide FileGenerator (detección de la ruta y escritura de archivos, nuevos e idénticos).
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+
+from benchmarks.arbol_sintetico import generar_arbol, parametros_por_defecto
+from config_handler import ConfigHandler
+from context_builder import escribir_contexto_final
+from file_generator import FileGenerator
+from file_operations import FileProcessor
+from project_walker import ProjectWalker
+
+ESCENARIOS = {
+    "por_defecto": {},
+    "patrones": {"patrones": "+modulo_1,+modulo_2,-test"},
+    "prohibidos_amplios": {
+        "directorios_prohibidos": "node_modules,.git,venv,dist,build,__pycache__",
+        "formatos_prohibidos": ".log,.tmp,.bak,.png,.bin,.pyc",
+    },
+    "gitignore": {"origen_archivos": "gitignore"},
+}
+
+ARCHIVOS_FILE_GENERATOR = 200
+
+
+def _medir(funcion, repeticiones):
+    """Ejecuta 'funcion' 'repeticiones' veces; devuelve (tiempos, último resultado)."""
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos, resultado
+
+
+def _registro(escenario, fase, tiempos, **extra):
+    registro = {
+        "escenario": escenario,
+        "fase": fase,
+        "segundos": [round(t, 6) for t in tiempos],
+        "min": round(min(tiempos), 6),
+        "mediana": round(statistics.median(tiempos), 6),
+    }
+    registro.update(extra)
+    return registro
+
+
+def _config_escenario(ruta_base, escenario, hilos):
+    config = dict(ConfigHandler.PROJECT_DEFAULTS)
+    config.update({"ruta_base": ruta_base, "hilos_lectura": hilos, "cache_contenido_mb": 0})
+    config.update(ESCENARIOS[escenario])
+    return config
+
+
+def medir_escenario(ruta_base, escenario, repeticiones, hilos):
+    config = _config_escenario(ruta_base, escenario, hilos)
+    opciones = FileProcessor._obtener_opciones_lectura(config)
+    resultados = []
+
+    def recorrer():
+        walker = ProjectWalker(ruta_base)
+        return sum(len(archivos) for _, _, archivos in walker.recorrer(ruta_base))
+
+    tiempos, vistos = _medir(recorrer, repeticiones)
+    resultados.append(_registro(escenario, "recorrido", tiempos, archivos=vistos))
+
+    tiempos, entradas = _medir(lambda: list(FileProcessor._iter_rutas_seleccionadas(config, [])), repeticiones)
+    resultados.append(_registro(escenario, "filtrado", tiempos, archivos=len(entradas)))
+
+    patrones = [p.strip() for p in config.get("patrones", "").split(",") if p.strip()]
+    positivos = [p[1:] for p in patrones if p.startswith("+")]
+    negativos = [p[1:] for p in patrones if p.startswith("-")]
+    rutas = [e.ruta for e in entradas]
+    tiempos, _ = _medir(
+        lambda: sum(FileProcessor._should_include(r, ruta_base, positivos, negativos) for r in rutas),
+        repeticiones
+    )
+    resultados.append(_registro(escenario, "should_include", tiempos, archivos=len(rutas)))
+
+    FileProcessor._configurar_cache(config)
+    tiempos, bloques = _medir(
+        lambda: [b.texto for _, b in FileProcessor._leer_archivos(entradas, ruta_base, True, hilos, opciones) if b.texto],
+        repeticiones
+    )
+    resultados.append(_registro(
+        escenario, "lectura", tiempos,
+        archivos=len(bloques),
+        bytes=sum(len(b) for b in bloques)
+    ))
+
+    def ensamblar():
+        salida = io.StringIO()
+        escribir_contexto_final(salida, bloques, "--- CONTEXTO ARCHIVOS (Rutas Incluidas) ---")
+        return len(salida.getvalue())
+
+    tiempos, caracteres = _medir(ensamblar, repeticiones)
+    resultados.append(_registro(escenario, "ensamblado", tiempos, caracteres=caracteres))
+
+    tiempos, caracteres = _medir(lambda: sum(len(f) for f in FileProcessor.iter_contexto(config, True)), repeticiones)
+    resultados.append(_registro(escenario, "total", tiempos, caracteres=caracteres))
+    return resultados
+
+
+def medir_file_generator(repeticiones):
+    """
+    Detección de la ruta en el comentario inicial y escritura de ARCHIVOS_FILE_GENERATOR archivos:
+    create_file en un directorio nuevo en cada repetición y create_file_sin_cambios con los
+    archivos ya escritos e idénticos (no se reescriben).
+    """
+    contenidos = [
+        f"# paquete/modulo_{i % 10}/archivo_{i}.py\n" + "def f():\n    return 1\n" * 50
+        for i in range(ARCHIVOS_FILE_GENERATOR)
+    ]
+    with tempfile.TemporaryDirectory(prefix="codeflow_bench_gen_") as raiz:
+        repeticion = [0]
+
+        def generar(nuevo=True):
+            if nuevo:
+                repeticion[0] += 1
+            destino = os.path.join(raiz, str(repeticion[0]))
+            generador = FileGenerator(destino)
+            with redirect_stdout(io.StringIO()):
+                for contenido in contenidos:
+                    ruta = generador.extract_file_path_from_comment(contenido)
+                    generador.create_file(os.path.normpath(os.path.join(destino, ruta)), contenido)
+            return len(contenidos)
+
+        tiempos, archivos = _medir(generar, repeticiones)
+        tiempos_sin_cambios, _ = _medir(lambda: generar(nuevo=False), repeticiones)
+    return [
+        _registro("file_generator", "create_file", tiempos, archivos=archivos),
+        _registro("file_generator", "create_file_sin_cambios", tiempos_sin_cambios, archivos=archivos),
+    ]
+
+
+def _commit_actual():
+    try:
+        resultado = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return resultado.stdout.decode().strip() or None
+
+
+def comparar(actual, anterior):
+    """Imprime la mediana de cada fase frente a la de otra ejecución guardada."""
+    previas = {(r["escenario"], r["fase"]): r["mediana"] for r in anterior["resultados"]}
+    print(f"\nComparación con {anterior.get('commit') or '?'} ({anterior.get('fecha', '?')}):")
+    for registro in actual["resultados"]:
+        clave = (registro["escenario"], registro["fase"])
+        previa = previas.get(clave)
+        if not previa:
+            continue
+        cambio = (registro["mediana"] / previa - 1) * 100
+        print(f"  {clave[0]:<20} {clave[1]:<15} {previa:>10.4f}s -> {registro['mediana']:>10.4f}s ({cambio:+.1f} %)")
+
+
+def _crear_parser():
+    defecto = parametros_por_defecto()
+    parser = argparse.ArgumentParser(description="Benchmark de generación de contexto sobre un árbol sintético.")
+    parser.add_argument("--archivos", type=int, default=defecto["archivos"], help="Número de archivos (1k a 1M)")
+    parser.add_argument("--profundidad", type=int, default=defecto["profundidad"])
+    parser.add_argument("--ramas", type=int, default=defecto["ramas"])
+    parser.add_argument("--tamano-medio", type=int, default=defecto["tamano_medio"], help="Mediana del tamaño de archivo en bytes")
+    parser.add_argument("--dispersion-tamano", type=float, default=defecto["dispersion_tamano"])
+    parser.add_argument("--binarios", type=float, default=defecto["proporcion_binarios"], help="Proporción de archivos binarios")
+    parser.add_argument("--ignorados", type=float, default=defecto["proporcion_ignorados"], help="Proporción de archivos en directorios ignorados")
+    parser.add_argument("--semilla", type=int, default=defecto["semilla"])
+    parser.add_argument("--arbol", default=None, help="Directorio del árbol (por defecto, en el directorio temporal)")
+    parser.add_argument("--escenarios", default=",".join(ESCENARIOS), help="Escenarios separados por comas")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--hilos", type=int, default=FileProcessor.HILOS_LECTURA_POR_DEFECTO)
+    parser.add_argument("--salida", default=None, help="Archivo JSON de resultados")
+    parser.add_argument("--comparar", default=None, help="JSON de una ejecución anterior para comparar")
+    return parser
+
+
+def main(argv=None):
+    args = _crear_parser().parse_args(argv)
+    parametros = {
+        "archivos": args.archivos,
+        "profundidad": args.profundidad,
+        "ramas": args.ramas,
+        "tamano_medio": args.tamano_medio,
+        "dispersion_tamano": args.dispersion_tamano,
+        "proporcion_binarios": args.binarios,
+        "proporcion_ignorados": args.ignorados,
+        "semilla": args.semilla,
+    }
+    arbol = args.arbol or os.path.join(tempfile.gettempdir(), f"codeflow_bench_{args.archivos}_{args.semilla}")
+    escenarios = [e.strip() for e in args.escenarios.split(",") if e.strip()]
+    desconocidos = [e for e in escenarios if e not in ESCENARIOS]
+    if desconocidos:
+        print(f"Escenarios desconocidos: {', '.join(desconocidos)}", file=sys.stderr)
+        return 2
+
+    inicio = time.perf_counter()
+    manifiesto = generar_arbol(arbol, **{k: v for k, v in parametros.items() if v is not None})
+    print(f"Árbol: {arbol} ({manifiesto['archivos']} archivos, {manifiesto['bytes'] / (1024 * 1024):.1f} MB, "
+          f"preparado en {time.perf_counter() - inicio:.1f}s)")
+
+    resultados = []
+    for escenario in escenarios:
+        with redirect_stdout(io.StringIO()):
+            registros = medir_escenario(arbol, escenario, args.repeticiones, args.hilos)
+        resultados.extend(registros)
+        for r in registros:
+            print(f"  {escenario:<20} {r['fase']:<15} mediana {r['mediana']:.4f}s")
+    for r in medir_file_generator(args.repeticiones):
+        resultados.append(r)
+        print(f"  {r['escenario']:<20} {r['fase']:<15} mediana {r['mediana']:.4f}s")
+
+    informe = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_actual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "arbol": manifiesto,
+        "hilos": args.hilos,
+        "repeticiones": args.repeticiones,
+        "resultados": resultados,
+    }
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=4)
+        print(f"Resultados guardados en {args.salida}")
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            comparar(informe, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
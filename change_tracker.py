@@ -0,0 +1,121 @@
+# change_tracker.py
+import json
+import os
+
+
+class SeguimientoCambios:
+    """
+    Instantánea de los archivos enviados en la última copia correcta de un proyecto
+    (mtime, tamaño y huella del contenido) y filtro del modo "solo cambios".
+    En ese modo, los archivos con el mismo mtime y tamaño no se leen, los que solo
+    cambiaron de mtime pero conservan la huella no se emiten, y los archivos borrados
+    desde la última copia se listan por nombre.
+    La instantánea nueva solo se escribe con guardar(), tras copiar el contexto.
+    """
+    SNAPSHOT_FILE = "ultima_copia.json"
+    VERSION = 1
+
+    def __init__(self, ruta_archivo, solo_cambios=False):
+        self.ruta_archivo = ruta_archivo
+        self.solo_cambios = solo_cambios
+        # ruta -> [mtime_ns, tamaño, huella, ruta_relativa]
+        self.anteriores = {}
+        self.nuevos = {}
+        self._leidos = {}
+        self.vistos = set()
+        self.sin_cambios = 0
+        self.borrados = None
+
+    @classmethod
+    def para_proyecto(cls, directorio_datos, config):
+        """Seguimiento del proyecto o None si no hay directorio de datos donde guardar la instantánea."""
+        solo_cambios = bool(config.get("solo_cambios", False))
+        if not directorio_datos:
+            if solo_cambios:
+                print("[Advertencia] 'solo_cambios' requiere un directorio de datos del proyecto. Se envía todo.")
+            return None
+        seguimiento = cls(os.path.join(directorio_datos, cls.SNAPSHOT_FILE), solo_cambios)
+        seguimiento._cargar()
+        return seguimiento
+
+    def _cargar(self):
+        if not os.path.exists(self.ruta_archivo):
+            return
+        try:
+            with open(self.ruta_archivo, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"[Advertencia] Instantánea de la última copia ilegible ({self.ruta_archivo}): {e}")
+            return
+        if datos.get("version") == self.VERSION:
+            self.anteriores = datos.get("archivos", {})
+
+    def filtrar_entradas(self, entradas):
+        """Registra las entradas seleccionadas y, en modo solo cambios, descarta las que no cambiaron de mtime ni tamaño."""
+        for entrada in entradas:
+            self.vistos.add(entrada.ruta)
+            if self.solo_cambios:
+                anterior = self.anteriores.get(entrada.ruta)
+                if anterior:
+                    try:
+                        st = entrada.stat()
+                    except OSError:
+                        yield entrada
+                        continue
+                    if anterior[0] == st.st_mtime_ns and anterior[1] == st.st_size:
+                        self.sin_cambios += 1
+                        continue
+            yield entrada
+
+    def filtrar_leidos(self, leidos):
+        """
+        Anota el estado de cada archivo leído, pendiente de confirmar su emisión.
+        En modo solo cambios descarta los que conservan la huella de la última copia.
+        """
+        for entrada, leido in leidos:
+            try:
+                st = entrada.stat()
+            except OSError:
+                yield entrada, leido
+                continue
+            registro = [st.st_mtime_ns, st.st_size, leido.huella, entrada.relativa]
+            if self.solo_cambios and leido.huella is not None:
+                anterior = self.anteriores.get(entrada.ruta)
+                if anterior and anterior[2] == leido.huella:
+                    # Solo cambió el mtime: se actualiza para no volver a leerlo
+                    self.nuevos[entrada.ruta] = registro
+                    self.sin_cambios += 1
+                    continue
+            self._leidos[entrada.ruta] = registro
+            yield entrada, leido
+
+    def confirmar(self, entrada):
+        """Marca el archivo como enviado en esta copia."""
+        registro = self._leidos.pop(entrada.ruta, None)
+        if registro is not None:
+            self.nuevos[entrada.ruta] = registro
+
+    def calcular_borrados(self):
+        """Devuelve [(ruta, ruta_relativa)] de los archivos de la última copia que ya no existen."""
+        if self.borrados is None:
+            self.borrados = [
+                (ruta, registro[3])
+                for ruta, registro in self.anteriores.items()
+                if ruta not in self.vistos and not os.path.exists(ruta)
+            ]
+        return self.borrados
+
+    def guardar(self):
+        """Escribe la instantánea: la anterior, sin los borrados y con lo enviado en esta copia."""
+        archivos = dict(self.anteriores)
+        for ruta, _ in self.calcular_borrados():
+            archivos.pop(ruta, None)
+        archivos.update(self.nuevos)
+        try:
+            os.makedirs(os.path.dirname(self.ruta_archivo), exist_ok=True)
+            ruta_temporal = self.ruta_archivo + ".tmp"
+            with open(ruta_temporal, "w", encoding="utf-8") as f:
+                json.dump({"version": self.VERSION, "archivos": archivos}, f, separators=(",", ":"))
+            os.replace(ruta_temporal, self.ruta_archivo)
+        except (IOError, OSError) as e:
+            print(f"Error guardando instantánea de la última copia {self.ruta_archivo}: {e}")
@@ -0,0 +1,203 @@
+# cli.py
+"""
+Generación de contextos sin interfaz gráfica, para tareas programadas y equipos sin Tk
+ni portapapeles. Usa los mismos proyectos de config.json que la aplicación:
+
+    python cli.py --listar
+    python cli.py mi_proyecto > contexto.txt
+    python cli.py mi_proyecto -o contexto.txt --solicitud "Revisa el parser"
+    python cli.py --todos -d contextos/ --procesos 8
+    python cli.py mi_proyecto -o contexto.txt --partes-kb 400   # contexto_parte_001.txt, ...
+"""
+import argparse
+import os
+import re
+import sys
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from config_handler import ConfigHandler
+from context_builder import cabecera_contexto, escribir_archivo_contexto, escribir_contexto_final, escribir_partes_contexto
+from context_report import InformeContexto
+from file_operations import FileProcessor
+
+
+def _nombre_archivo(proyecto):
+    return (re.sub(r"[^\w.-]", "_", proyecto).strip(".") or "proyecto") + ".txt"
+
+
+def generar_proyecto(tarea):
+    """
+    Genera el contexto de un proyecto y lo escribe en tarea["destino"] ("-" = stdout).
+    Con tarea["max_bytes_parte"] se divide en partes <destino>_parte_NNN (ver dividir_contexto).
+    Se ejecuta en un proceso del pool, por lo que recibe y devuelve solo datos simples.
+    """
+    proyecto = tarea["proyecto"]
+    destino = tarea["destino"]
+    informe = InformeContexto()
+    resultado = {"proyecto": proyecto, "destino": destino, "error": None, "escrito": False, "partes": []}
+    salida_estandar = sys.stdout
+    try:
+        # Los avisos de FileProcessor van a stderr para no mezclarse con el contexto
+        with redirect_stdout(sys.stderr):
+            cabecera = cabecera_contexto(
+                tarea["config"].get("prompt", ""),
+                tarea["solicitud"],
+                tarea["incluir_ruta"],
+                tarea["solo_consulta"]
+            )
+            fragmentos = FileProcessor.iter_contexto(
+                tarea["config"],
+                tarea["incluir_ruta"],
+                None,
+                tarea["directorio_datos"],
+                informe
+            )
+            # Con el contexto en streaming, "ensamblado" es el tiempo de escritura en el destino
+            with informe.metricas.medir("ensamblado"):
+                if destino == "-":
+                    resultado["escrito"] = escribir_contexto_final(salida_estandar, fragmentos, cabecera)
+                    salida_estandar.flush()
+                elif tarea["max_bytes_parte"]:
+                    resultado["partes"] = escribir_partes_contexto(destino, fragmentos, cabecera, tarea["max_bytes_parte"])
+                    resultado["escrito"] = bool(resultado["partes"])
+                else:
+                    resultado["escrito"] = escribir_archivo_contexto(destino, fragmentos, cabecera)
+        if resultado["escrito"] and informe.seguimiento_cambios:
+            informe.seguimiento_cambios.guardar()
+        if resultado["escrito"] and tarea["config"].get("registro_metricas"):
+            informe.metricas.anexar_jsonl(
+                os.path.join(tarea["directorio_datos"], "metricas.jsonl"),
+                informe.registro_metricas(proyecto=proyecto, origen="cli")
+            )
+    except Exception as e:
+        resultado["error"] = str(e)
+
+    resultado["archivos"] = informe.archivos_emitidos
+    resultado["no_encontrados"] = list(informe.archivos_no_encontrados)
+    resultado["resumenes"] = [
+        r for r in (
+            informe.resumen_cambios(),
+            informe.resumen_omitidos(),
+            informe.resumen_extractos(),
+            informe.resumen_compactacion(),
+            informe.resumen_duplicados(),
+            informe.resumen_presupuesto(),
+            informe.resumen_metricas(),
+        ) if r
+    ]
+    return resultado
+
+
+def _informar(resultado):
+    """Resumen de un proyecto en stderr (stdout puede llevar el contexto)."""
+    proyecto = resultado["proyecto"]
+    if resultado["error"]:
+        print(f"[{proyecto}] Error: {resultado['error']}", file=sys.stderr)
+        return
+    if not resultado["escrito"]:
+        print(f"[{proyecto}] Sin contenido: ningún archivo coincide con los filtros.", file=sys.stderr)
+    elif resultado["partes"]:
+        print(f"[{proyecto}] {resultado['archivos']} archivos -> {len(resultado['partes'])} partes:", file=sys.stderr)
+        for parte in resultado["partes"]:
+            print(f"[{proyecto}]   {parte}", file=sys.stderr)
+    else:
+        destino = "stdout" if resultado["destino"] == "-" else resultado["destino"]
+        print(f"[{proyecto}] {resultado['archivos']} archivos -> {destino}", file=sys.stderr)
+    for no_encontrado in resultado["no_encontrados"]:
+        print(f"[{proyecto}] No encontrado: {no_encontrado}", file=sys.stderr)
+    for resumen in resultado["resumenes"]:
+        print(f"[{proyecto}] {resumen}", file=sys.stderr)
+
+
+def _crear_parser():
+    parser = argparse.ArgumentParser(description="Genera el contexto de uno o varios proyectos sin interfaz gráfica.")
+    parser.add_argument("proyectos", nargs="*", help="Nombres de proyecto de config.json")
+    parser.add_argument("--todos", action="store_true", help="Genera todos los proyectos configurados")
+    parser.add_argument("--listar", action="store_true", help="Lista los proyectos configurados y termina")
+    parser.add_argument("--config", default=None, help=f"Archivo de configuración (por defecto {ConfigHandler.CONFIG_FILE})")
+    parser.add_argument("-o", "--salida", default="-", help="Archivo de salida para un solo proyecto ('-' = stdout)")
+    parser.add_argument("-d", "--directorio", default=None, help="Directorio de salida: un archivo <proyecto>.txt por proyecto")
+    parser.add_argument("--solicitud", default="", help="Texto de la solicitud")
+    parser.add_argument("--solicitud-archivo", default=None, help="Lee la solicitud de un archivo")
+    parser.add_argument("--solo-nombres", action="store_true", help="Muestra solo el nombre de cada archivo, sin su ruta")
+    parser.add_argument("--solo-consulta", action="store_true", help="Omite el prompt y las instrucciones de formato")
+    parser.add_argument("--solo-cambios", action="store_true", help="Solo archivos cambiados desde la última copia")
+    parser.add_argument("--partes-kb", type=int, default=0, help="Divide el contexto en archivos de como mucho N KB (requiere -o o -d)")
+    parser.add_argument("--procesos", type=int, default=0, help="Procesos para generar varios proyectos a la vez (0 = automático)")
+    return parser
+
+
+def main(argv=None):
+    args = _crear_parser().parse_args(argv)
+    config_handler = ConfigHandler(args.config)
+
+    if args.listar:
+        for proyecto in config_handler.get_projects():
+            print(proyecto)
+        return 0
+
+    proyectos = config_handler.get_projects() if args.todos else args.proyectos
+    if not proyectos:
+        print("Indica al menos un proyecto o --todos (usa --listar para verlos).", file=sys.stderr)
+        return 2
+    desconocidos = [p for p in proyectos if config_handler.get_project_config(p) is None]
+    if desconocidos:
+        print(f"Proyectos no encontrados: {', '.join(desconocidos)}", file=sys.stderr)
+        return 2
+    if len(proyectos) > 1 and not args.directorio:
+        print("Con varios proyectos indica un directorio de salida con -d/--directorio.", file=sys.stderr)
+        return 2
+    if args.partes_kb and args.salida == "-" and not args.directorio:
+        print("--partes-kb escribe archivos: indica -o/--salida o -d/--directorio.", file=sys.stderr)
+        return 2
+
+    solicitud = args.solicitud
+    if args.solicitud_archivo:
+        with open(args.solicitud_archivo, "r", encoding="utf-8") as f:
+            solicitud = f.read()
+    solicitud = solicitud.strip()
+
+    tareas = []
+    for proyecto in proyectos:
+        config = dict(ConfigHandler.PROJECT_DEFAULTS)
+        config.update(config_handler.get_project_config(proyecto))
+        config["solo_cambios"] = args.solo_cambios
+        if not config.get("ruta_base") or not os.path.isdir(config["ruta_base"]):
+            print(f"[{proyecto}] La Ruta Base del Proyecto no es válida o no existe.", file=sys.stderr)
+            continue
+        tareas.append({
+            "proyecto": proyecto,
+            "config": config,
+            "directorio_datos": config_handler.get_project_data_dir(proyecto),
+            "destino": os.path.join(args.directorio, _nombre_archivo(proyecto)) if args.directorio else args.salida,
+            "solicitud": solicitud,
+            "incluir_ruta": not args.solo_nombres,
+            "solo_consulta": args.solo_consulta,
+            "max_bytes_parte": max(0, args.partes_kb) * 1024,
+        })
+
+    if any(t["destino"] == "-" for t in tareas) and hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding="utf-8")
+
+    procesos = args.procesos if args.procesos > 0 else min(len(tareas), os.cpu_count() or 1)
+    resultados = []
+    if procesos <= 1 or len(tareas) <= 1:
+        for tarea in tareas:
+            resultado = generar_proyecto(tarea)
+            _informar(resultado)
+            resultados.append(resultado)
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            futuros = [pool.submit(generar_proyecto, tarea) for tarea in tareas]
+            for futuro in as_completed(futuros):
+                resultado = futuro.result()
+                _informar(resultado)
+                resultados.append(resultado)
+
+    fallidos = len(proyectos) - len(tareas) + sum(1 for r in resultados if r["error"])
+    return 1 if fallidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
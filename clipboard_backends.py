@@ -0,0 +1,224 @@
+# clipboard_backends.py
+import queue
+import sys
+import threading
+
+import pyperclip
+
+# Valores de 'portapapeles_generador'
+BACKENDS_PORTAPAPELES = ("pyperclip", "persistente", "memoria")
+
+
+class PortapapelesPyperclip:
+    """
+    Portapapeles del sistema mediante pyperclip. En Linux cada lectura lanza un proceso
+    xclip/xsel; en Windows el número de secuencia del portapapeles permite no leerlo
+    mientras no cambie.
+    """
+
+    def __init__(self):
+        self._user32 = None
+        if sys.platform == "win32":
+            try:
+                import ctypes
+                self._user32 = ctypes.windll.user32
+            except (ImportError, AttributeError, OSError):
+                self._user32 = None
+
+    def leer(self):
+        return pyperclip.paste()
+
+    def escribir(self, texto):
+        pyperclip.copy(texto)
+
+    def secuencia(self):
+        """Número que cambia con cada cambio del portapapeles, o None si el sistema no lo ofrece."""
+        if self._user32 is None:
+            return None
+        return self._user32.GetClipboardSequenceNumber()
+
+    def cerrar(self):
+        pass
+
+
+class PortapapelesPersistente:
+    """
+    Portapapeles del sistema a través de un intérprete Tk, con su conexión persistente al
+    servidor gráfico: las lecturas no lanzan procesos. Tcl sin hilos no admite usar Tk desde
+    otro hilo ni dos intérpretes en hilos distintos, así que:
+    - con 'raiz' (la ventana principal), lecturas y escrituras se piden al hilo de la raíz.
+      Con Tcl compilado con hilos, cada petición programa su atención con after() (tkinter
+      lleva la llamada al hilo de la raíz) y sin peticiones no hay ninguna activación. Sin
+      hilos, after() solo puede llamarse desde la raíz: esta revisa la cola con la misma espera
+      adaptativa que FileGenerator, de INTERVALO_ATENCION_MIN_MS a INTERVALO_ATENCION_MAX_MS;
+    - sin ella, se crea un Tk oculto en el hilo de la primera lectura, salvo que el proceso ya
+      tenga una raíz Tk: entonces se usa pyperclip.
+    """
+    INTERVALO_ATENCION_MIN_MS = 50
+    INTERVALO_ATENCION_MAX_MS = 1000
+    FACTOR_ESPERA = 1.5
+    ESPERA_RAIZ = 5.0 # Segundos que una petición espera al hilo de la raíz
+
+    def __init__(self, raiz=None):
+        self._raiz_principal = raiz
+        self._tk = None
+        self._hilo = None
+        self._respaldo = None # PortapapelesPyperclip si ya había una raíz Tk
+        self._peticiones = queue.Queue()
+        self._abierto = True
+        self._tcl_con_hilos = False
+        self._intervalo_ms = self.INTERVALO_ATENCION_MIN_MS
+        if raiz is not None:
+            # El constructor se llama desde el hilo de la raíz
+            self._tcl_con_hilos = self._tcl_admite_hilos(raiz)
+            if not self._tcl_con_hilos:
+                raiz.after(self._intervalo_ms, self._atender)
+
+    @staticmethod
+    def _tcl_admite_hilos(raiz):
+        """True si Tcl está compilado con hilos (tcl_platform(threaded) solo existe entonces)."""
+        import tkinter
+        try:
+            return raiz.tk.getboolean(raiz.tk.call("set", "tcl_platform(threaded)"))
+        except tkinter.TclError:
+            return False
+
+    def _atender(self):
+        """
+        En el hilo de la raíz: resuelve las peticiones pendientes. Sin hilos en Tcl se vuelve
+        a programar, cada vez más espaciado mientras no llegan peticiones.
+        """
+        atendidas = 0
+        while True:
+            try:
+                funcion, listo, resultado = self._peticiones.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                resultado.append(funcion(self._raiz_principal))
+            except Exception as e:
+                resultado.append(e)
+            listo.set()
+            atendidas += 1
+        if self._abierto and not self._tcl_con_hilos:
+            if atendidas:
+                self._intervalo_ms = self.INTERVALO_ATENCION_MIN_MS
+            else:
+                self._intervalo_ms = min(int(self._intervalo_ms * self.FACTOR_ESPERA), self.INTERVALO_ATENCION_MAX_MS)
+            self._raiz_principal.after(self._intervalo_ms, self._atender)
+
+    def _en_raiz(self, funcion):
+        """Ejecuta funcion(raiz) en el hilo de la raíz principal y devuelve su resultado."""
+        listo = threading.Event()
+        resultado = []
+        self._peticiones.put((funcion, listo, resultado))
+        if self._tcl_con_hilos:
+            self._raiz_principal.after(0, self._atender)
+        if not listo.wait(self.ESPERA_RAIZ):
+            raise RuntimeError("La ventana principal no atendió la petición al portapapeles")
+        if isinstance(resultado[0], Exception):
+            raise resultado[0]
+        return resultado[0]
+
+    def _raiz(self):
+        if self._tk is None:
+            import tkinter
+            self._tk = tkinter.Tk()
+            self._tk.withdraw()
+            self._hilo = threading.get_ident()
+        elif self._hilo != threading.get_ident():
+            raise RuntimeError("PortapapelesPersistente solo puede usarse desde el hilo que lo creó")
+        return self._tk
+
+    def _sin_raiz_propia(self):
+        """PortapapelesPyperclip si, sin 'raiz', el proceso ya tiene una raíz Tk (no se crea otra)."""
+        if self._respaldo is None and self._tk is None:
+            import tkinter
+            if tkinter._default_root is not None:
+                print("[Advertencia] Ya existe una ventana Tk en el proceso: el portapapeles 'persistente' usa pyperclip.")
+                self._respaldo = PortapapelesPyperclip()
+        return self._respaldo
+
+    @staticmethod
+    def _leer_tk(raiz):
+        import tkinter
+        try:
+            if sys.platform.startswith("linux"):
+                return raiz.clipboard_get(type="UTF8_STRING")
+            return raiz.clipboard_get()
+        except tkinter.TclError:
+            return "" # Portapapeles vacío o sin texto
+
+    @staticmethod
+    def _escribir_tk(raiz, texto):
+        raiz.clipboard_clear()
+        raiz.clipboard_append(texto)
+        raiz.update()
+
+    def leer(self):
+        if self._raiz_principal is not None:
+            return self._en_raiz(self._leer_tk)
+        respaldo = self._sin_raiz_propia()
+        if respaldo:
+            return respaldo.leer()
+        return self._leer_tk(self._raiz())
+
+    def escribir(self, texto):
+        if self._raiz_principal is not None:
+            self._en_raiz(lambda raiz: self._escribir_tk(raiz, texto))
+            return
+        respaldo = self._sin_raiz_propia()
+        if respaldo:
+            respaldo.escribir(texto)
+            return
+        self._escribir_tk(self._raiz(), texto)
+
+    def secuencia(self):
+        return None
+
+    def cerrar(self):
+        # Con la raíz principal basta con dejar de atender: after no se vuelve a programar
+        self._abierto = False
+        if self._tk is not None:
+            self._tk.destroy()
+            self._tk = None
+            self._hilo = None
+
+
+class PortapapelesMemoria:
+    """Portapapeles en memoria, para pruebas y ejecuciones sin entorno gráfico."""
+
+    def __init__(self, texto=""):
+        self._lock = threading.Lock()
+        self._texto = texto
+        self._secuencia = 0
+
+    def leer(self):
+        with self._lock:
+            return self._texto
+
+    def escribir(self, texto):
+        with self._lock:
+            self._texto = texto
+            self._secuencia += 1
+
+    def secuencia(self):
+        with self._lock:
+            return self._secuencia
+
+    def cerrar(self):
+        pass
+
+
+def crear_portapapeles(nombre, raiz=None):
+    """
+    Backend de portapapeles según 'portapapeles_generador'; pyperclip si el nombre no es válido.
+    'raiz' es la ventana Tk de la aplicación, si la hay (ver PortapapelesPersistente).
+    """
+    if nombre == "persistente":
+        return PortapapelesPersistente(raiz)
+    if nombre == "memoria":
+        return PortapapelesMemoria()
+    if nombre != "pyperclip":
+        print(f"[Advertencia] Valor inválido para 'portapapeles_generador': {nombre!r}. Usando 'pyperclip'.")
+    return PortapapelesPyperclip()
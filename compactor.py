@@ -0,0 +1,300 @@
+# compactor.py
+import io
+import re
+import tokenize
+
+# Extensión -> lenguaje de compactación
+LENGUAJES = {
+    ".py": "python",
+    ".pyw": "python",
+    ".pyi": "python",
+    ".js": "js",
+    ".jsx": "js",
+    ".mjs": "js",
+    ".cjs": "js",
+    ".ts": "js",
+    ".tsx": "js",
+    ".mts": "js",
+    ".cts": "js",
+    ".css": "css",
+    ".scss": "css",
+    ".less": "css",
+    ".html": "html",
+    ".htm": "html",
+    ".json": "json",
+}
+
+# Comentarios HTML, salvo los condicionales de Internet Explorer (<!--[if ...]>)
+_COMENTARIO_HTML_RE = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+
+# Caracteres tras los que una '/' abre una expresión regular y no una división
+_PREVIOS_REGEX = set("(,=:[!&|?{};+-*%<>~^")
+_PALABRAS_PREVIAS_REGEX = ("return", "typeof", "case", "do", "else", "in", "of", "void", "yield", "await")
+
+
+def lenguaje_de(extension):
+    """Lenguaje de compactación para una extensión (con punto, en minúsculas) o None."""
+    return LENGUAJES.get(extension)
+
+
+def compactar(lenguaje, texto):
+    """
+    Elimina comentarios (y docstrings en Python) y colapsa las líneas en blanco de 'texto'.
+    Si el código no se puede analizar se devuelve sin cambios.
+    """
+    if lenguaje == "python":
+        return _compactar_python(texto)
+    if lenguaje == "js":
+        return _limpiar_lineas(*_quitar_comentarios_c(texto, comentario_linea=True, regex=True))
+    if lenguaje == "css":
+        return _limpiar_lineas(*_quitar_comentarios_c(texto, comentario_linea=False, regex=False))
+    if lenguaje == "html":
+        return _compactar_html(texto)
+    if lenguaje == "json":
+        return _compactar_json(texto)
+    return texto
+
+
+def _limpiar_lineas(texto, vaciadas=frozenset(), protegidas=frozenset()):
+    """
+    Quita los espacios finales, elimina las líneas que quedaron vacías al quitar comentarios
+    ('vaciadas', índices desde 0) y colapsa las series de líneas en blanco en una sola.
+    Las líneas 'protegidas' (dentro de cadenas multilínea) se dejan intactas.
+    """
+    resultado = []
+    en_blanco = True # Evita líneas en blanco al principio
+    for numero, linea in enumerate(texto.split("\n")):
+        if numero in protegidas:
+            resultado.append(linea)
+            en_blanco = False
+            continue
+        linea = linea.rstrip()
+        if not linea:
+            if numero in vaciadas or en_blanco:
+                continue
+            en_blanco = True
+        else:
+            en_blanco = False
+        resultado.append(linea)
+    while resultado and not resultado[-1] and (len(resultado) - 1) not in protegidas:
+        resultado.pop()
+    return "\n".join(resultado)
+
+
+def _compactar_python(texto):
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(texto).readline))
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return texto
+
+    # Desplazamiento de cada línea (las filas de tokenize empiezan en 1)
+    inicios = [0]
+    for m in re.finditer("\n", texto):
+        inicios.append(m.end())
+
+    def desplazamiento(posicion):
+        return inicios[posicion[0] - 1] + posicion[1]
+
+    eliminaciones = [] # (inicio, fin, reemplazo)
+    protegidas = set()
+    significativo_previo = None
+    fila_fstring = None
+    for i, tok in enumerate(tokens):
+        tipo = tok.type
+        if tipo == tokenize.COMMENT:
+            # Se conserva la línea shebang
+            if not (tok.start == (1, 0) and tok.string.startswith("#!")):
+                eliminaciones.append((desplazamiento(tok.start), desplazamiento(tok.end), ""))
+            continue
+        if tipo in (tokenize.NL, tokenize.ENCODING):
+            continue
+
+        # f-strings multilínea en Python 3.12+ (FSTRING_START ... FSTRING_END)
+        nombre_tipo = tokenize.tok_name.get(tipo, "")
+        if nombre_tipo == "FSTRING_START":
+            fila_fstring = tok.start[0]
+        elif nombre_tipo == "FSTRING_END" and fila_fstring is not None:
+            protegidas.update(range(fila_fstring - 1, tok.end[0]))
+            fila_fstring = None
+
+        if tipo == tokenize.STRING:
+            # Docstring: cadena sola como primera sentencia del módulo o de un bloque
+            if significativo_previo in (None, tokenize.INDENT) and i + 1 < len(tokens) and tokens[i + 1].type == tokenize.NEWLINE:
+                siguiente = _siguiente_significativo(tokens, i + 2)
+                reemplazo = "..." if siguiente is not None and siguiente.type == tokenize.DEDENT else ""
+                # Se mantienen los saltos de línea para no desplazar la numeración
+                reemplazo += "\n" * (tok.end[0] - tok.start[0])
+                eliminaciones.append((desplazamiento(tok.start), desplazamiento(tok.end), reemplazo))
+            elif tok.start[0] != tok.end[0]:
+                protegidas.update(range(tok.start[0] - 1, tok.end[0]))
+        significativo_previo = tipo
+
+    partes = []
+    anterior = 0
+    for inicio, fin, reemplazo in eliminaciones:
+        partes.append(texto[anterior:inicio])
+        partes.append(reemplazo)
+        anterior = fin
+    partes.append(texto[anterior:])
+    resultado = "".join(partes)
+
+    # Líneas que tenían contenido y quedaron vacías: se eliminan en lugar de dejar huecos
+    vaciadas = {
+        numero
+        for numero, (original, nueva) in enumerate(zip(texto.split("\n"), resultado.split("\n")))
+        if original.strip() and not nueva.strip()
+    }
+    return _limpiar_lineas(resultado, vaciadas, protegidas)
+
+
+def _siguiente_significativo(tokens, desde):
+    for tok in tokens[desde:]:
+        if tok.type not in (tokenize.NL, tokenize.COMMENT, tokenize.NEWLINE):
+            return tok
+    return None
+
+
+def _quitar_comentarios_c(texto, comentario_linea, regex):
+    """
+    Elimina comentarios /* */ (y // si 'comentario_linea') respetando cadenas, plantillas
+    y, si 'regex', literales de expresión regular de JavaScript.
+    Devuelve (texto, índices de líneas vaciadas).
+    """
+    salida = []
+    vaciadas = set()
+    linea = 0
+    i, n = 0, len(texto)
+    previo = "" # Último carácter significativo emitido
+    palabra = [] # Última palabra emitida, para distinguir 'return /x/' de 'a / b'
+    while i < n:
+        c = texto[i]
+        if c == "\n":
+            salida.append(c)
+            linea += 1
+            i += 1
+            continue
+        if c in "\"'`":
+            fin = _fin_cadena(texto, i, c)
+            fragmento = texto[i:fin]
+            salida.append(fragmento)
+            linea += fragmento.count("\n")
+            previo = c
+            palabra = []
+            i = fin
+            continue
+        if c == "/" and i + 1 < n:
+            siguiente = texto[i + 1]
+            if siguiente == "*" or (comentario_linea and siguiente == "/"):
+                fin = texto.find("*/", i + 2) + 2 if siguiente == "*" else texto.find("\n", i)
+                if fin == 1 or fin == -1:
+                    fin = n
+                comentario = texto[i:fin]
+                saltos = comentario.count("\n")
+                # Un comentario de bloque de varias líneas conserva los saltos como líneas vaciadas
+                salida.append("\n" * saltos)
+                vaciadas.update(range(linea, linea + saltos + 1))
+                linea += saltos
+                i = fin
+                continue
+            if regex and (not previo or previo in _PREVIOS_REGEX or "".join(palabra) in _PALABRAS_PREVIAS_REGEX):
+                fin = _fin_regex(texto, i)
+                if fin is not None:
+                    salida.append(texto[i:fin])
+                    previo = "/"
+                    palabra = []
+                    i = fin
+                    continue
+        salida.append(c)
+        if not c.isspace():
+            previo = c
+            if c.isalnum() or c in "_$":
+                palabra.append(c)
+            else:
+                palabra = []
+        elif palabra:
+            palabra = []
+        i += 1
+    resultado = "".join(salida)
+    # Solo cuentan como vaciadas las líneas que ahora están en blanco
+    lineas = resultado.split("\n")
+    vaciadas = {v for v in vaciadas if v < len(lineas) and not lineas[v].strip()}
+    return resultado, vaciadas
+
+
+def _fin_cadena(texto, inicio, comilla):
+    """Posición tras el cierre de la cadena que empieza en 'inicio' (o el final de la línea si no se cierra)."""
+    i, n = inicio + 1, len(texto)
+    while i < n:
+        c = texto[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == comilla:
+            return i + 1
+        if c == "\n" and comilla != "`":
+            return i
+        i += 1
+    return n
+
+
+def _fin_regex(texto, inicio):
+    """Posición tras un literal /regex/flags que empieza en 'inicio', o None si no lo parece."""
+    i, n = inicio + 1, len(texto)
+    en_clase = False
+    while i < n:
+        c = texto[i]
+        if c == "\n":
+            return None
+        if c == "\\":
+            i += 2
+            continue
+        if c == "[":
+            en_clase = True
+        elif c == "]":
+            en_clase = False
+        elif c == "/" and not en_clase:
+            i += 1
+            while i < n and texto[i].isalpha():
+                i += 1
+            return i
+        i += 1
+    return None
+
+
+def _compactar_html(texto):
+    vaciadas = set()
+    partes = []
+    anterior = 0
+    linea = 0
+    for m in _COMENTARIO_HTML_RE.finditer(texto):
+        previo = texto[anterior:m.start()]
+        partes.append(previo)
+        linea += previo.count("\n")
+        saltos = m.group().count("\n")
+        partes.append("\n" * saltos)
+        vaciadas.update(range(linea, linea + saltos + 1))
+        linea += saltos
+        anterior = m.end()
+    partes.append(texto[anterior:])
+    resultado = "".join(partes)
+    lineas = resultado.split("\n")
+    vaciadas = {v for v in vaciadas if v < len(lineas) and not lineas[v].strip()}
+    return _limpiar_lineas(resultado, vaciadas)
+
+
+def _compactar_json(texto):
+    """Quita comentarios (JSONC) y todo el espacio en blanco fuera de las cadenas."""
+    sin_comentarios, _ = _quitar_comentarios_c(texto, comentario_linea=True, regex=False)
+    salida = []
+    i, n = 0, len(sin_comentarios)
+    while i < n:
+        c = sin_comentarios[i]
+        if c == '"':
+            fin = _fin_cadena(sin_comentarios, i, c)
+            salida.append(sin_comentarios[i:fin])
+            i = fin
+            continue
+        if not c.isspace():
+            salida.append(c)
+        i += 1
+    return "".join(salida)
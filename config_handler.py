@@ -1,11 +1,14 @@
 # config_handler.py
+import hashlib
 import json
 import os
+import re
 import time # Importado para manejar timestamps
 
 class ConfigHandler:
     CONFIG_FILE = "config.json"
     SCHEMA_FILE = "config_schema.json" # Asumiendo que podrías tener un esquema
+    PROJECT_DATA_DIR = "project_data" # Datos auxiliares por proyecto (índices, cachés), junto a CONFIG_FILE
 
     DEFAULT_CONFIG = {
         "current_project": None,
@@ -23,9 +26,33 @@ class ConfigHandler:
         "prompt": "",
         "patron": "",
         "solo_archivos_especificos": False,
+        "hilos_lectura": 8, # Hilos para leer archivos en paralelo (1 = lectura secuencial)
+        "usar_indice": True, # Reutilizar el índice persistente del árbol en lugar de recorrerlo entero
+        "cache_contenido_mb": 256, # Memoria máxima de la caché de bloques leídos (0 = sin caché)
+        "presupuesto_tokens": 0, # Máximo de tokens estimados del contexto (0 = sin límite)
+        "presupuesto_bytes": 0, # Máximo de bytes del contexto (0 = sin límite)
+        "orden_presupuesto": "recorrido", # Con presupuesto: "recorrido" o "menor_tamano" tras los archivos específicos
+        "accion_no_texto": "listar", # Binarios/minificados/generados: "listar" (solo nombre), "omitir" o "incluir"
+        "umbral_archivo_grande_mb": 5, # Archivos mayores se emiten como extracto inicio/final (0 = nunca)
+        "lineas_inicio_extracto": 200, # Líneas iniciales del extracto de un archivo grande
+        "lineas_final_extracto": 100, # Líneas finales del extracto de un archivo grande
+        "codificacion_alternativa": "cp1252", # Códec de los archivos que no son UTF-8 válido ni llevan BOM
+        "origen_archivos": "recorrido", # "recorrido" (disco), "gitignore" (disco respetando .gitignore) o "git" (archivos versionados)
+        "deduplicar": False, # True = las copias idénticas de un archivo ya emitido se emiten como "SAME AS"
+        "compactar_extensiones": "", # Extensiones a compactar (p. ej. ".py,.js,.ts,.css,.html,.json"); vacío = ninguna
+        "procesos_compactacion": 0, # Procesos para compactar archivos grandes (0 = en los hilos lectores)
+        "registro_metricas": False, # Añadir las métricas de cada copia a project_data/<proyecto>/metricas.jsonl
+        "vigilar_cambios": False, # Vigilar la ruta base y mantener el contexto precalculado (casilla "Vigilar cambios")
+        "destino_contexto": "portapapeles", # "portapapeles", "archivo" o "partes" (selector "Destino")
+        "archivo_salida": "", # Archivo de los destinos "archivo" y "partes"; relativo a project_data/<proyecto> (vacío = contexto.txt)
+        "tamano_parte_kb": 400, # Tamaño máximo de cada parte con el destino "partes"
+        "portapapeles_generador": "pyperclip", # Lectura del portapapeles del generador: "pyperclip", "persistente" (Tk, sin procesos) o "memoria"
     }
 
-    def __init__(self):
+    def __init__(self, config_file=None):
+        # Permite usar otro archivo de configuración (p. ej. desde cli.py)
+        if config_file:
+            self.CONFIG_FILE = config_file
         self.config = self._load_config()
         self._ensure_config_structure() # Asegurarse de que las claves principales existen
 
@@ -122,6 +149,16 @@ class ConfigHandler:
              raise ValueError(f"El proyecto '{project_name}' no existe.")
 
 
+    def get_project_data_dir(self, project_name):
+        """
+        Devuelve el directorio de datos auxiliares del proyecto, junto al archivo de configuración.
+        El nombre se sanea y se completa con un hash corto para evitar colisiones.
+        """
+        nombre_seguro = re.sub(r"[^\w.-]", "_", project_name).strip(".") or "proyecto"
+        sufijo = hashlib.sha1(project_name.encode("utf-8")).hexdigest()[:8]
+        base_dir = os.path.dirname(os.path.abspath(self.CONFIG_FILE))
+        return os.path.join(base_dir, self.PROJECT_DATA_DIR, f"{nombre_seguro}-{sufijo}")
+
     def create_new_project(self, project_name):
         """Crea una nueva configuración de proyecto con valores por defecto."""
         if not project_name or project_name.isspace():
@@ -0,0 +1,79 @@
+# content_cache.py
+import sys
+import threading
+from collections import OrderedDict
+
+
+class ContentCache:
+    """
+    Caché LRU en memoria de bloques ya formateados (START FILE/END FILE).
+    La clave incluye ruta, mtime_ns y tamaño, así que un archivo modificado
+    nunca devuelve un bloque obsoleto. El límite es de memoria, no de entradas.
+    Es segura entre hilos: la usan los lectores en paralelo de FileProcessor.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+    def ajustar_limite(self, max_bytes):
+        """Cambia el límite de memoria; 0 desactiva la caché y la vacía."""
+        with self._lock:
+            self.max_bytes = max(0, max_bytes)
+            self._expulsar()
+
+    def obtener(self, clave):
+        """Devuelve el valor asociado a 'clave' o None, actualizando contadores y orden LRU."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[0]
+
+    def guardar(self, clave, valor, tamano=None):
+        """
+        Guarda 'valor' bajo 'clave'. 'tamano' es la memoria que ocupa (por defecto sys.getsizeof).
+        Valores mayores que el límite completo no se guardan.
+        """
+        if tamano is None:
+            tamano = sys.getsizeof(valor)
+        with self._lock:
+            if tamano > self.max_bytes:
+                return
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+            self._entradas[clave] = (valor, tamano)
+            self._bytes += tamano
+            self._expulsar()
+
+    def _expulsar(self):
+        while self._bytes > self.max_bytes and self._entradas:
+            _, (_, tamano) = self._entradas.popitem(last=False)
+            self._bytes -= tamano
+            self.expulsiones += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estadisticas(self):
+        """Devuelve los contadores acumulados de la caché."""
+        with self._lock:
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "expulsiones": self.expulsiones,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
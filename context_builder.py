@@ -0,0 +1,198 @@
+# context_builder.py
+import glob
+import os
+import stat
+import tempfile
+
+from text_decoding import bytes_utf8
+
+RUTA_INSTRUCCIONES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instructions", "formato_instrucciones.txt")
+# umask del proceso, leída al importar (consultarla exige cambiarla, lo que afectaría a otros hilos)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def leer_instrucciones():
+    """Bloque de instrucciones adicionales de formato, o "" si el archivo no existe o está vacío."""
+    try:
+        with open(RUTA_INSTRUCCIONES, "r", encoding="utf-8") as f_inst:
+            instrucciones_leidas = f_inst.read().strip()
+    except FileNotFoundError:
+        print(f"[Advertencia] Archivo de instrucciones no encontrado en: {RUTA_INSTRUCCIONES}")
+        return ""
+    except Exception as e_inst:
+        print(f"[Error] No se pudo leer el archivo de instrucciones: {e_inst}")
+        return ""
+    if not instrucciones_leidas:
+        return ""
+    return f"--- INSTRUCCIONES ADICIONALES DE FORMATO ---\n\n{instrucciones_leidas}"
+
+
+def cabecera_contexto(prompt, solicitud, incluir_ruta, solo_consulta=False):
+    """
+    Texto que precede a los bloques de archivos: prompt e instrucciones (salvo en solo
+    consulta), solicitud y la marca CONTEXTO ARCHIVOS, separados por una línea en blanco.
+    """
+    partes_finales = []
+    if prompt and not solo_consulta:
+        partes_finales.append(prompt)
+    if not solo_consulta:
+        instrucciones_adicionales = leer_instrucciones()
+        if instrucciones_adicionales:
+            partes_finales.append(instrucciones_adicionales)
+    if solicitud:
+        partes_finales.append(f"--- SOLICITUD ---\n{solicitud}")
+    # La cabecera del contexto va pegada al primer fragmento
+    partes_finales.append(f"--- CONTEXTO ARCHIVOS ({'Rutas Incluidas' if incluir_ruta else 'Solo Nombres'}) ---")
+    return "\n\n".join(partes_finales)
+
+
+def escribir_contexto_final(sink, fragmentos, cabecera):
+    """
+    Escribe en 'sink' (cualquier objeto con write()) la cabecera seguida de los fragmentos
+    del contexto, sin espacios finales tras el último. Los fragmentos se escriben según
+    llegan, con uno de retraso para poder recortar el último.
+    Devuelve False (sin escribir nada) si no hay fragmentos.
+    """
+    anterior = None
+    for fragmento in fragmentos:
+        if anterior is None:
+            sink.write(cabecera)
+        else:
+            sink.write(anterior)
+        anterior = fragmento
+    if anterior is None:
+        return False
+    sink.write(anterior.rstrip())
+    return True
+
+
+def escribir_archivo_contexto(destino, fragmentos, cabecera):
+    """
+    Escribe el contexto en el archivo 'destino' a medida que llegan los fragmentos, sin
+    reunirlo en memoria. La escritura es atómica: un lector nunca ve un archivo a medias
+    y, si no hay fragmentos o la generación falla, el archivo anterior se conserva.
+    Devuelve si hubo contenido.
+    """
+    directorio = os.path.dirname(os.path.abspath(destino))
+    os.makedirs(directorio, exist_ok=True)
+    # Temporal de nombre único: dos escrituras simultáneas (vigilancia y copia) no se pisan
+    fd, ruta_temporal = tempfile.mkstemp(dir=directorio, prefix="." + os.path.basename(destino) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            escrito = escribir_contexto_final(f, fragmentos, cabecera)
+        if escrito:
+            # mkstemp crea el temporal con 0600: se dejan los permisos del archivo anterior o los de open()
+            try:
+                modo = stat.S_IMODE(os.stat(destino).st_mode)
+            except FileNotFoundError:
+                modo = 0o666 & ~_UMASK
+            os.chmod(ruta_temporal, modo)
+            os.replace(ruta_temporal, destino)
+        return escrito
+    finally:
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+
+
+def ruta_parte(destino, numero):
+    """Ruta de la parte 'numero' (desde 1) de un contexto dividido: contexto.txt -> contexto_parte_001.txt."""
+    base, extension = os.path.splitext(destino)
+    return f"{base}_parte_{numero:03d}{extension or '.txt'}"
+
+
+# Tamaño mínimo de una parte y bytes que ocupan sus marcas (ASCII), con números de hasta 9 cifras
+MIN_BYTES_PARTE = 1024
+MARCAS_PARTE_BYTES = len(f"--- PART {'9' * 9} ---\n") + len(f"\n--- CONTINUES IN PART {'9' * 9} ---\n")
+
+
+def _trozos(texto, max_bytes):
+    """
+    Produce (trozo, bytes) con 'texto' cortado en trozos de como mucho 'max_bytes' bytes (UTF-8):
+    entero si cabe, si no por líneas, y por caracteres las líneas que no caben solas.
+    """
+    bytes_texto = bytes_utf8(texto)
+    if bytes_texto <= max_bytes:
+        yield texto, bytes_texto
+        return
+    trozo = []
+    tamano = 0
+    for linea in texto.splitlines(keepends=True):
+        bytes_linea = bytes_utf8(linea)
+        if trozo and tamano + bytes_linea > max_bytes:
+            yield "".join(trozo), tamano
+            trozo, tamano = [], 0
+        while bytes_linea > max_bytes:
+            # Corte en caracteres; fuera de ASCII se supone el peor caso de 4 bytes por carácter
+            corte = max_bytes if linea.isascii() else max(1, max_bytes // 4)
+            pieza = linea[:corte]
+            yield pieza, bytes_utf8(pieza)
+            linea = linea[corte:]
+            bytes_linea = bytes_utf8(linea)
+        trozo.append(linea)
+        tamano += bytes_linea
+    if trozo:
+        yield "".join(trozo), tamano
+
+
+def _piezas(fragmentos, cabecera):
+    """La cabecera y los fragmentos en el orden de escribir_contexto_final, con el último recortado."""
+    anterior = None
+    for fragmento in fragmentos:
+        yield cabecera if anterior is None else anterior
+        anterior = fragmento
+    if anterior is not None:
+        yield anterior.rstrip()
+
+
+def dividir_contexto(fragmentos, cabecera, max_bytes):
+    """
+    Reparte la cabecera y los fragmentos en partes de como mucho 'max_bytes' bytes (UTF-8),
+    marcas incluidas, y las produce una a una. Los cortes se hacen entre bloques START FILE/END FILE;
+    un bloque que no cabe en una parte se corta por líneas. Cada parte empieza con
+    "--- PART <n> ---" y todas salvo la última terminan con "--- CONTINUES IN PART <n+1> ---".
+    No produce nada si no hay fragmentos. ValueError si 'max_bytes' es menor que MIN_BYTES_PARTE.
+    """
+    if max_bytes < MIN_BYTES_PARTE:
+        raise ValueError(f"El tamaño de parte ({max_bytes} bytes) es menor que el mínimo de {MIN_BYTES_PARTE} bytes.")
+    capacidad = max_bytes - MARCAS_PARTE_BYTES
+    numero = 1
+    actual = []
+    tamano = 0
+    for pieza in _piezas(fragmentos, cabecera):
+        for trozo, bytes_trozo in _trozos(pieza, capacidad):
+            if actual and tamano + bytes_trozo > capacidad:
+                yield f"--- PART {numero} ---\n" + "".join(actual) + f"\n--- CONTINUES IN PART {numero + 1} ---\n"
+                numero += 1
+                actual, tamano = [], 0
+            actual.append(trozo)
+            tamano += bytes_trozo
+    if actual:
+        yield f"--- PART {numero} ---\n" + "".join(actual)
+
+
+def escribir_partes_contexto(destino, fragmentos, cabecera, max_bytes):
+    """
+    Escribe el contexto dividido (ver dividir_contexto) en archivos junto a 'destino'
+    (contexto_parte_001.txt, contexto_parte_002.txt...), a medida que se completa cada parte.
+    Antes se borran las partes de una ejecución anterior; si la generación falla, también
+    las ya escritas. Devuelve la lista de rutas escritas (vacía si no hubo contenido).
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+    base, extension = os.path.splitext(destino)
+    patron_anteriores = f"{glob.escape(base)}_parte_[0-9][0-9][0-9]{glob.escape(extension or '.txt')}"
+    for anterior in glob.glob(patron_anteriores):
+        os.remove(anterior)
+    rutas = []
+    try:
+        for parte in dividir_contexto(fragmentos, cabecera, max_bytes):
+            ruta = ruta_parte(destino, len(rutas) + 1)
+            with open(ruta, "w", encoding="utf-8", newline="") as f:
+                f.write(parte)
+            rutas.append(ruta)
+    except BaseException:
+        for ruta in rutas:
+            if os.path.exists(ruta):
+                os.remove(ruta)
+        raise
+    return rutas
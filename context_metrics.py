@@ -0,0 +1,145 @@
+# context_metrics.py
+import copy
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Orden en que se muestran las fases en el resumen
+FASES = ("recorrido", "filtrado", "lectura", "ensamblado", "portapapeles")
+
+
+class GeneracionCancelada(Exception):
+    """La generación del contexto se canceló (MetricasContexto.cancelar)."""
+
+
+class MetricasContexto:
+    """
+    Tiempos por fase y contadores de una generación de contexto.
+    Las etapas del contexto son generadores encadenados, así que el tiempo de cada
+    fase es exclusivo: lo que una fase pasa esperando a otra fase medida (p. ej. la
+    lectura esperando al recorrido) se descuenta de ella y se suma a la otra.
+    Se usa desde un único hilo: el que consume el generador del contexto. Otro hilo
+    puede leer los contadores como progreso y pedir la cancelación con cancelar().
+    """
+
+    def __init__(self):
+        self.fases = {}
+        self.directorios_visitados = 0
+        self.directorios_podados = 0
+        self.archivos_vistos = 0
+        self.archivos_coincidentes = 0
+        self.archivos_leidos = 0
+        self.descartes = {} # motivo -> número de archivos
+        self.bytes_leidos = 0
+        self.caracteres_emitidos = 0
+        self._pila = [] # Tiempo de fases anidadas de cada medición en curso
+        self._inicio = time.perf_counter()
+        self._cancelacion = threading.Event()
+
+    def cancelar(self):
+        """Pide detener la generación; se detiene en la siguiente comprobación."""
+        self._cancelacion.set()
+
+    @property
+    def cancelada(self):
+        return self._cancelacion.is_set()
+
+    def comprobar_cancelacion(self):
+        if self._cancelacion.is_set():
+            raise GeneracionCancelada()
+
+    def copia(self):
+        """Copia independiente de los tiempos y contadores, con su propia cancelación."""
+        nueva = copy.copy(self)
+        nueva.fases = dict(self.fases)
+        nueva.descartes = dict(self.descartes)
+        nueva._pila = []
+        nueva._cancelacion = threading.Event()
+        return nueva
+
+    def descartar(self, motivo, cantidad=1):
+        if cantidad:
+            self.descartes[motivo] = self.descartes.get(motivo, 0) + cantidad
+
+    def _empezar(self):
+        self._pila.append(0.0)
+        return time.perf_counter()
+
+    def _terminar(self, fase, inicio):
+        transcurrido = time.perf_counter() - inicio
+        anidado = self._pila.pop()
+        self.fases[fase] = self.fases.get(fase, 0.0) + transcurrido - anidado
+        if self._pila:
+            self._pila[-1] += transcurrido
+
+    def cronometrar(self, fase, iterable):
+        """Envuelve un iterable y suma a 'fase' el tiempo que tarda en producir cada elemento."""
+        iterador = iter(iterable)
+        try:
+            while True:
+                inicio = self._empezar()
+                try:
+                    elemento = next(iterador)
+                except StopIteration:
+                    return
+                finally:
+                    self._terminar(fase, inicio)
+                yield elemento
+        finally:
+            # Si el consumidor abandona la iteración, el iterable envuelto se cierra ya
+            # (sus bloques finally, como guardar el índice, no esperan al recolector)
+            cerrar = getattr(iterador, "close", None)
+            if cerrar:
+                cerrar()
+
+    @contextmanager
+    def medir(self, fase):
+        """Suma a 'fase' el tiempo del bloque 'with' (sin el de las fases anidadas)."""
+        inicio = self._empezar()
+        try:
+            yield
+        finally:
+            self._terminar(fase, inicio)
+
+    def registro(self, **extra):
+        """Diccionario serializable con los tiempos y contadores de la ejecución."""
+        fases = {fase: round(self.fases[fase], 6) for fase in FASES if fase in self.fases}
+        fases.update({fase: round(t, 6) for fase, t in self.fases.items() if fase not in fases})
+        registro = {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "total": round(time.perf_counter() - self._inicio, 6),
+            "fases": fases,
+            "directorios_visitados": self.directorios_visitados,
+            "directorios_podados": self.directorios_podados,
+            "archivos_vistos": self.archivos_vistos,
+            "archivos_coincidentes": self.archivos_coincidentes,
+            "descartes": dict(sorted(self.descartes.items())),
+            "bytes_leidos": self.bytes_leidos,
+            "caracteres_emitidos": self.caracteres_emitidos,
+        }
+        registro.update(extra)
+        return registro
+
+    @staticmethod
+    def resumen(registro):
+        """Una línea con el tiempo de cada fase y los totales principales de un registro."""
+        tiempos = ", ".join(f"{fase} {segundos:.2f} s" for fase, segundos in registro["fases"].items())
+        descartados = sum(registro["descartes"].values())
+        return (
+            f"Tiempos: {tiempos} (total {registro['total']:.2f} s); "
+            f"{registro['directorios_visitados']} directorios, {registro['archivos_coincidentes']} archivos "
+            f"({descartados} descartados), {registro['bytes_leidos'] / (1024 * 1024):.1f} MB leídos."
+        )
+
+    @staticmethod
+    def anexar_jsonl(ruta, registro):
+        """Añade el registro como una línea JSON al final de 'ruta'. Los errores solo se avisan."""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+            with open(ruta, "a", encoding="utf-8") as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"[Advertencia] No se pudo escribir el registro de métricas en {ruta}: {e}")
@@ -0,0 +1,68 @@
+# context_preview.py
+from collections import namedtuple
+
+# Archivo que incluirían los filtros: tamaño en disco y tokens estimados de su bloque.
+# extracto = supera el umbral de archivo grande y se emitiría solo un extracto.
+ArchivoPrevisto = namedtuple("ArchivoPrevisto", ["ruta", "bytes", "tokens", "extracto"])
+
+
+class VistaPreviaContexto:
+    """
+    Resultado de FileProcessor.vista_previa: los archivos que seleccionan los filtros,
+    con su tamaño y sus tokens estimados, obtenidos solo con listados y stat.
+    """
+
+    def __init__(self, metricas):
+        self.archivos = [] # ArchivoPrevisto en orden de recorrido
+        self.archivos_no_encontrados = []
+        # Directorios visitados y podados, descartes por motivo y tiempo (MetricasContexto)
+        self.metricas = metricas
+
+    @property
+    def total_bytes(self):
+        return sum(a.bytes for a in self.archivos)
+
+    @property
+    def total_tokens(self):
+        return sum(a.tokens for a in self.archivos)
+
+    def mayores(self, cantidad=20):
+        """Los 'cantidad' archivos con más tokens estimados."""
+        return sorted(self.archivos, key=lambda a: a.tokens, reverse=True)[:cantidad]
+
+    def por_directorio(self, cantidad=10):
+        """[(directorio de primer nivel, archivos, tokens)] con más tokens estimados ("." = raíz)."""
+        totales = {}
+        for archivo in self.archivos:
+            partes = archivo.ruta.replace("\\", "/").split("/", 1)
+            directorio = partes[0] if len(partes) > 1 else "."
+            total = totales.setdefault(directorio, [0, 0])
+            total[0] += 1
+            total[1] += archivo.tokens
+        grupos = sorted(totales.items(), key=lambda item: item[1][1], reverse=True)[:cantidad]
+        return [(directorio, archivos, tokens) for directorio, (archivos, tokens) in grupos]
+
+    def resumen(self):
+        """Texto con los totales, los descartes y los directorios que más aportan."""
+        metricas = self.metricas
+        lineas = [
+            f"{len(self.archivos)} archivos, {self.total_bytes / (1024 * 1024):.1f} MB, "
+            f"~{self.total_tokens} tokens estimados.",
+            f"{metricas.directorios_visitados} directorios recorridos, {metricas.directorios_podados} podados, "
+            f"{metricas.archivos_vistos} archivos revisados.",
+        ]
+        if metricas.descartes:
+            detalle = ", ".join(f"{motivo}: {n}" for motivo, n in sorted(metricas.descartes.items()))
+            lineas.append(f"Descartados: {detalle}.")
+        extractos = sum(1 for a in self.archivos if a.extracto)
+        if extractos:
+            lineas.append(f"Archivos grandes (se emitiría un extracto): {extractos}.")
+        grupos = self.por_directorio()
+        if grupos:
+            total = self.total_tokens or 1
+            lineas.append("Por directorio: " + ", ".join(
+                f"{directorio} {tokens * 100 / total:.0f} % ({archivos})" for directorio, archivos, tokens in grupos
+            ))
+        if self.archivos_no_encontrados:
+            lineas.append("Archivos específicos no encontrados: " + ", ".join(self.archivos_no_encontrados))
+        return "\n".join(lineas)
@@ -0,0 +1,142 @@
+# context_report.py
+from context_metrics import MetricasContexto
+
+
+class InformeContexto:
+    """
+    Resultado auxiliar de una generación de contexto: archivos no encontrados,
+    archivos descartados por presupuesto y totales emitidos.
+    FileProcessor lo rellena mientras se consume el generador del contexto.
+    """
+
+    def __init__(self):
+        self.archivos_no_encontrados = []
+        self.descartados_presupuesto = [] # dicts {"ruta", "tokens", "bytes"}
+        self.presupuesto_tokens = 0
+        self.presupuesto_bytes = 0
+        self.archivos_emitidos = 0
+        self.tokens_emitidos = 0
+        self.bytes_emitidos = 0
+        # Archivos binarios/minificados/generados: motivo -> {"archivos": [...], "bytes_evitados": n}
+        self.omitidos = {}
+        # Archivos grandes emitidos como extracto: dicts {"ruta", "bytes_omitidos"}
+        self.extractos = []
+        # Modo "solo cambios" (ver SeguimientoCambios); la instantánea se guarda tras copiar
+        self.seguimiento_cambios = None
+        self.solo_cambios = False
+        self.archivos_sin_cambios = 0
+        self.archivos_borrados = []
+        # Archivos sustituidos por una referencia "SAME AS" y bytes ahorrados
+        self.archivos_duplicados = 0
+        self.bytes_deduplicados = 0
+        # Tamaño del contenido compactado antes y después de la compactación
+        self.archivos_compactados = 0
+        self.bytes_antes_compactacion = 0
+        self.bytes_despues_compactacion = 0
+        # Tiempos por fase y contadores de la ejecución
+        self.metricas = MetricasContexto()
+
+    def registrar_omitido(self, motivo, ruta, bytes_evitados):
+        registro = self.omitidos.setdefault(motivo, {"archivos": [], "bytes_evitados": 0})
+        registro["archivos"].append(ruta)
+        registro["bytes_evitados"] += bytes_evitados
+
+    def registrar_extracto(self, ruta, bytes_omitidos):
+        self.extractos.append({"ruta": ruta, "bytes_omitidos": bytes_omitidos})
+
+    def resumen_extractos(self):
+        """Texto breve con los archivos grandes de los que solo se emitió un extracto."""
+        if not self.extractos:
+            return ""
+        total_bytes = sum(e["bytes_omitidos"] for e in self.extractos)
+        rutas = ", ".join(e["ruta"] for e in self.extractos[:5])
+        if len(self.extractos) > 5:
+            rutas += ", ..."
+        return f"Archivos grandes recortados: {len(self.extractos)} ({rutas}); {total_bytes / (1024 * 1024):.1f} MB sin leer."
+
+    def registrar_compactacion(self, bytes_antes, bytes_despues):
+        self.archivos_compactados += 1
+        self.bytes_antes_compactacion += bytes_antes
+        self.bytes_despues_compactacion += bytes_despues
+
+    def resumen_compactacion(self):
+        """Texto breve con el tamaño de los archivos compactados antes y después."""
+        if not self.archivos_compactados:
+            return ""
+        antes = self.bytes_antes_compactacion
+        despues = self.bytes_despues_compactacion
+        reduccion = (1 - despues / antes) * 100 if antes else 0
+        return (
+            f"Compactados: {self.archivos_compactados} archivos; "
+            f"{antes / 1024:.1f} KB -> {despues / 1024:.1f} KB (-{reduccion:.0f} %)."
+        )
+
+    def registrar_duplicado(self, bytes_ahorrados):
+        self.archivos_duplicados += 1
+        self.bytes_deduplicados += bytes_ahorrados
+
+    def resumen_duplicados(self):
+        """Texto breve con los duplicados referenciados y los bytes ahorrados."""
+        if not self.archivos_duplicados:
+            return ""
+        return f"Duplicados referenciados: {self.archivos_duplicados}; {self.bytes_deduplicados / 1024:.1f} KB ahorrados."
+
+    def resumen_cambios(self):
+        """Texto breve del modo solo cambios (vacío si no está activo)."""
+        if not self.solo_cambios:
+            return ""
+        texto = f"Solo cambios: {self.archivos_emitidos} enviados, {self.archivos_sin_cambios} sin cambios"
+        if self.archivos_borrados:
+            texto += f", {len(self.archivos_borrados)} borrados"
+        return texto + "."
+
+    def registro_metricas(self, **extra):
+        """
+        Registro de métricas de la ejecución (ver MetricasContexto.registro), con los descartes
+        que anotan las etapas posteriores al filtrado: omitidos, sin cambios y presupuesto.
+        """
+        registro = self.metricas.registro(**extra)
+        descartes = registro["descartes"]
+        for motivo, omitido in self.omitidos.items():
+            descartes[motivo] = descartes.get(motivo, 0) + len(omitido["archivos"])
+        if self.archivos_sin_cambios:
+            descartes["sin_cambios"] = self.archivos_sin_cambios
+        if self.descartados_presupuesto:
+            descartes["presupuesto"] = len(self.descartados_presupuesto)
+        registro["descartes"] = dict(sorted(descartes.items()))
+        registro["archivos_emitidos"] = self.archivos_emitidos
+        registro["archivos_duplicados"] = self.archivos_duplicados
+        registro["extractos"] = len(self.extractos)
+        return registro
+
+    def resumen_metricas(self):
+        """Una línea con los tiempos por fase y los totales de la ejecución."""
+        return MetricasContexto.resumen(self.registro_metricas())
+
+    def resumen_omitidos(self):
+        """Texto breve con los archivos no leídos por ser binarios, minificados o generados."""
+        if not self.omitidos:
+            return ""
+        total_archivos = sum(len(r["archivos"]) for r in self.omitidos.values())
+        total_bytes = sum(r["bytes_evitados"] for r in self.omitidos.values())
+        detalle = ", ".join(f"{motivo}: {len(r['archivos'])}" for motivo, r in sorted(self.omitidos.items()))
+        return f"Omitidos sin leer: {total_archivos} ({detalle}); {total_bytes / 1024:.1f} KB evitados."
+
+    def resumen_presupuesto(self, max_listados=15):
+        """Texto breve con el uso del presupuesto y los archivos descartados (vacío si no hay presupuesto)."""
+        if not self.presupuesto_tokens and not self.presupuesto_bytes:
+            return ""
+        limites = []
+        if self.presupuesto_tokens:
+            limites.append(f"{self.tokens_emitidos}/{self.presupuesto_tokens} tokens")
+        if self.presupuesto_bytes:
+            limites.append(f"{self.bytes_emitidos}/{self.presupuesto_bytes} bytes")
+        lineas = [f"Presupuesto: {', '.join(limites)} ({self.archivos_emitidos} archivos)."]
+        if self.descartados_presupuesto:
+            lineas.append(f"Descartados por presupuesto: {len(self.descartados_presupuesto)}")
+            for descartado in self.descartados_presupuesto[:max_listados]:
+                lineas.append(f"- {descartado['ruta']} (~{descartado['tokens']} tokens)")
+            restantes = len(self.descartados_presupuesto) - max_listados
+            if restantes > 0:
+                lineas.append(f"- ... y {restantes} más")
+        return "\n".join(lineas)
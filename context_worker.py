@@ -0,0 +1,162 @@
+# context_worker.py
+import contextlib
+import io
+import threading
+
+from context_builder import escribir_archivo_contexto, escribir_contexto_final, escribir_partes_contexto
+from context_metrics import GeneracionCancelada, MetricasContexto
+from context_report import InformeContexto
+from file_operations import FileProcessor
+
+# Dónde se deja el contexto: portapapeles, un archivo o varias partes de tamaño limitado
+DESTINOS_CONTEXTO = ("portapapeles", "archivo", "partes")
+
+
+@contextlib.contextmanager
+def turno_construccion(metricas):
+    """
+    Las generaciones del proceso (copia, vista previa, vigilancia) comparten índice y caché:
+    nunca a la vez, haya o no vigilancia. La espera se puede cancelar.
+    """
+    lock = FileProcessor.lock_construccion
+    while not lock.acquire(timeout=0.1):
+        metricas.comprobar_cancelacion()
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+class TrabajoContexto(threading.Thread):
+    """
+    Genera y ensambla el contexto de "Copiar y Guardar" fuera del hilo de Tk.
+    El hilo principal consulta progreso() periódicamente (root.after) y, cuando el hilo
+    termina, usa 'hay_contenido', 'contenido' / 'partes', 'informe' y 'error'; el portapapeles
+    y el guardado de la configuración se hacen allí. cancelar() detiene el recorrido y la
+    lectura en curso.
+    Con destino "archivo" o "partes" el contexto se escribe en disco según se genera,
+    sin reunirlo en memoria.
+    """
+
+    def __init__(self, proyecto, config, incluir_ruta, directorio_datos, cabecera, vigilante=None,
+                 destino="portapapeles", ruta_salida=None, max_bytes_parte=0):
+        super().__init__()
+        self.daemon = True
+        self.proyecto = proyecto
+        self.config = config
+        self.incluir_ruta = incluir_ruta
+        self.directorio_datos = directorio_datos
+        self.cabecera = cabecera
+        self.vigilante = vigilante
+        self.destino = destino
+        self.ruta_salida = ruta_salida
+        self.max_bytes_parte = max_bytes_parte
+        self.informe = InformeContexto()
+        self.hay_contenido = False
+        self.contenido = None # Texto final (destino "portapapeles")
+        self.partes = [] # Rutas escritas (destino "partes")
+        self.precalculado = False
+        self.cancelado = False
+        self.error = None
+
+    def cancelar(self):
+        self.informe.metricas.cancelar()
+
+    def progreso(self):
+        """Contadores de avance: archivos vistos, coincidentes y leídos y bytes leídos."""
+        metricas = self.informe.metricas
+        return {
+            "archivos_vistos": metricas.archivos_vistos,
+            "archivos_coincidentes": metricas.archivos_coincidentes,
+            "archivos_leidos": metricas.archivos_leidos,
+            "bytes_leidos": metricas.bytes_leidos,
+        }
+
+    def run(self):
+        try:
+            with self._fragmentos() as fragmentos:
+                self._escribir(fragmentos)
+        except GeneracionCancelada:
+            self.cancelado = True
+        except Exception as e:
+            self.error = e
+
+    def _escribir(self, fragmentos):
+        # La escritura avanza a la par que la generación: el tiempo de generación
+        # se descuenta de "ensamblado" (ver MetricasContexto)
+        with self.informe.metricas.medir("ensamblado"):
+            if self.destino == "archivo":
+                self.hay_contenido = escribir_archivo_contexto(self.ruta_salida, fragmentos, self.cabecera)
+            elif self.destino == "partes":
+                self.partes = escribir_partes_contexto(self.ruta_salida, fragmentos, self.cabecera, self.max_bytes_parte)
+                self.hay_contenido = bool(self.partes)
+            else:
+                # Cada fragmento pasa al búfer según llega: no se retienen a la vez los fragmentos y el texto unido
+                salida = io.StringIO()
+                self.hay_contenido = escribir_contexto_final(salida, fragmentos, self.cabecera)
+                if self.hay_contenido:
+                    self.contenido = salida.getvalue()
+                salida.close()
+
+    @contextlib.contextmanager
+    def _fragmentos(self):
+        """Fragmentos del contexto: los precalculados por la vigilancia si siguen vigentes, o los de una generación nueva."""
+        # Con la vigilancia activa, el contexto suele estar ya generado
+        if self.vigilante and self.vigilante.is_alive() and not self.config.get("solo_cambios"):
+            config_vigilada = dict(self.config)
+            config_vigilada.pop("solo_cambios", None)
+            caliente = self.vigilante.obtener(config_vigilada, self.incluir_ruta)
+            if caliente:
+                bloques, self.informe = caliente
+                self.precalculado = True
+                print("[Vigilancia] Usando el contexto precalculado.")
+                yield bloques
+                return
+
+        cache = FileProcessor.cache_contenido
+        cache_antes = cache.estadisticas()
+        with turno_construccion(self.informe.metricas):
+            # El contexto se recibe por fragmentos; en el portapapeles se une una sola vez al final
+            yield FileProcessor.iter_contexto(
+                self.config,
+                self.incluir_ruta,
+                None,
+                self.directorio_datos,
+                self.informe
+            )
+        cache_despues = cache.estadisticas()
+        print(
+            f"[Cache] Aciertos: {cache_despues['aciertos'] - cache_antes['aciertos']}, "
+            f"fallos: {cache_despues['fallos'] - cache_antes['fallos']} "
+            f"({cache_despues['entradas']} entradas, {cache_despues['bytes'] / (1024 * 1024):.1f} MB)"
+        )
+
+
+class TrabajoVistaPrevia(threading.Thread):
+    """
+    Calcula FileProcessor.vista_previa fuera del hilo de Tk. Al terminar, 'vista'
+    (VistaPreviaContexto) o 'error'; cancelar() detiene el recorrido.
+    """
+
+    def __init__(self, proyecto, config, directorio_datos):
+        super().__init__()
+        self.daemon = True
+        self.proyecto = proyecto
+        self.config = config
+        self.directorio_datos = directorio_datos
+        self.metricas = MetricasContexto()
+        self.vista = None
+        self.cancelado = False
+        self.error = None
+
+    def cancelar(self):
+        self.metricas.cancelar()
+
+    def run(self):
+        try:
+            with turno_construccion(self.metricas):
+                self.vista = FileProcessor.vista_previa(self.config, self.directorio_datos, self.metricas)
+        except GeneracionCancelada:
+            self.cancelado = True
+        except Exception as e:
+            self.error = e
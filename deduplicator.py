@@ -0,0 +1,48 @@
+# deduplicator.py
+from text_decoding import bytes_utf8
+
+
+class DeduplicadorContenido:
+    """
+    Sustituye por una referencia corta los archivos cuyo contenido es idéntico (misma
+    huella) al de un archivo ya emitido en el contexto:
+
+        --- START FILE: copia ---
+        --- SAME AS: original ---
+        --- END FILE: copia ---
+
+    Un archivo solo cuenta como original cuando llega a emitirse (confirmar()), de modo
+    que nunca se referencia un archivo descartado, por ejemplo, por el presupuesto.
+    """
+
+    def __init__(self, ruta_mostrada, informe):
+        # ruta_mostrada(entrada) -> nombre de la entrada en las marcas START FILE/END FILE
+        self.ruta_mostrada = ruta_mostrada
+        self.informe = informe
+        self._emitidos = {} # huella -> nombre mostrado del original
+        self._pendientes = {} # ruta -> (huella, nombre) a la espera de emitirse
+
+    def filtrar_leidos(self, leidos):
+        """Produce los pares (entrada, BloqueLeido) cambiando los duplicados por su referencia."""
+        for entrada, leido in leidos:
+            if leido.huella is None or not leido.texto:
+                yield entrada, leido
+                continue
+            nombre = self.ruta_mostrada(entrada)
+            original = self._emitidos.get(leido.huella)
+            if original is not None and original != nombre:
+                referencia = f"\n--- START FILE: {nombre} ---\n--- SAME AS: {original} ---\n--- END FILE: {nombre} ---\n"
+                if len(referencia) < len(leido.texto):
+                    self.informe.registrar_duplicado(
+                        bytes_utf8(leido.texto) - bytes_utf8(referencia)
+                    )
+                    yield entrada, leido.con_texto(referencia)
+                    continue
+            self._pendientes[entrada.ruta] = (leido.huella, nombre)
+            yield entrada, leido
+
+    def confirmar(self, entrada):
+        """Marca el archivo como emitido; a partir de aquí sus copias se referencian a él."""
+        pendiente = self._pendientes.pop(entrada.ruta, None)
+        if pendiente is not None:
+            self._emitidos.setdefault(pendiente[0], pendiente[1])
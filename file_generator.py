@@ -1,18 +1,57 @@
 # file_generator.py
+import hashlib
 import threading
 import os
 import re
-import pyperclip
-import time
+import stat
+import tempfile
 from datetime import datetime # <--- Importar datetime
+from clipboard_backends import PortapapelesPyperclip
+
+# Bloques del contexto que emite FileProcessor: "--- START FILE: ruta ---" ... "--- END FILE: ruta ---"
+_INICIO_BLOQUE_RE = re.compile(r"^--- START FILE: (.+) ---$", re.MULTILINE)
+_MISMO_QUE_RE = re.compile(r"^--- SAME AS: (.+) ---$")
+_RECORTE_RE = re.compile(r"^--- TRUNCATED: \d+ bytes omitted", re.MULTILINE)
+# Ruta en un comentario de cabecera de un bloque: sin espacios y con extensión
+_RUTA_COMENTARIO_RE = re.compile(r"^[\w.\-/\\]+\.\w+$")
+# Bloques de código Markdown (```lenguaje ... ```)
+_BLOQUE_CODIGO_RE = re.compile(r"^```[^\n]*\n(.*?)^```", re.MULTILINE | re.DOTALL)
+# Marcas del contexto que copia la propia aplicación (cabecera y partes): su contenido puede
+# estar compactado, recortado o recodificado y nunca se escribe de vuelta sobre el proyecto
+_CONTEXTO_PROPIO_RE = re.compile(r"^--- (?:CONTEXTO ARCHIVOS \(|PART \d+ ---$)", re.MULTILINE)
+
+# umask del proceso, leída al importar: os.umask solo puede consultarse cambiándola,
+# y hacerlo con otros hilos activos afectaría a los archivos que creen entretanto
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Resultado de FileGenerator._escribir_archivo
+ESCRITO = "escrito"
+SIN_CAMBIOS = "sin_cambios"
 
 class FileGenerator(threading.Thread):
-    def __init__(self, base_path):
+    # Sondeo adaptativo del portapapeles: rápido justo después de un cambio y cada
+    # vez más espaciado (x FACTOR_ESPERA) mientras no cambia, hasta INTERVALO_MAX.
+    INTERVALO_MIN = 0.1
+    INTERVALO_MAX = 2.0
+    FACTOR_ESPERA = 1.5
+
+    def __init__(self, base_path, portapapeles=None):
         super().__init__()
         self.base_directory = base_path
         self.running = False
         self.daemon = True
-        self.last_clipboard_content = ""
+        # Backend del portapapeles (ver clipboard_backends); por defecto, pyperclip
+        self.portapapeles = portapapeles or PortapapelesPyperclip()
+        # Huella del último contenido visto: no se guarda el texto completo
+        self.last_clipboard_hash = self.huella("")
+        # Huella del último texto copiado por la aplicación (ver ignorar)
+        self.huella_ignorada = None
+        self._ultima_secuencia = None
+        self._parada = threading.Event()
+        # Totales de la sesión: archivos reescritos y archivos idénticos que no se tocaron
+        self.archivos_escritos = 0
+        self.archivos_sin_cambios = 0
 
         # Expresiones regulares actualizadas para detección de rutas
         self.comment_patterns = [
@@ -25,6 +64,17 @@ class FileGenerator(threading.Thread):
 
     def stop(self):
         self.running = False
+        self._parada.set()
+
+    def ignorar(self, huella):
+        """Hace que el portapapeles con esa huella (ver huella) no se procese: lo copió la aplicación."""
+        self.huella_ignorada = huella
+
+    @staticmethod
+    def huella(texto):
+        """(longitud, hash) del texto: distinguir un cambio no requiere conservar el contenido anterior."""
+        texto = texto or ""
+        return len(texto), hashlib.blake2b(texto.encode("utf-8", "surrogatepass"), digest_size=16).digest()
 
     def extract_file_path_from_comment(self, content):
         for pattern in self.comment_patterns:
@@ -33,7 +83,188 @@ class FileGenerator(threading.Thread):
                 return match.group(1).strip()
         return None
 
-    def create_file(self, full_path, content):
+    def extract_files_from_payload(self, content):
+        """
+        Archivos de un portapapeles con varios archivos, como lista de (ruta relativa, contenido);
+        None si no lo es (entonces se trata como un único archivo). Formatos reconocidos:
+        - bloques "--- START FILE: ruta ---" / "--- END FILE: ruta ---" como los del contexto;
+        - bloques de código Markdown cuya primera línea es un comentario con la ruta.
+        Un texto que empieza con un comentario con la ruta es siempre un único archivo, aunque
+        contenga esas marcas (p. ej. un README con ejemplos).
+        """
+        content = content.replace("\r\n", "\n")
+        if self._ruta_de_cabecera(content.split("\n", 1)[0]):
+            return None
+        if _INICIO_BLOQUE_RE.search(content):
+            return self._extraer_bloques_marcados(content)
+        bloques = []
+        for match in _BLOQUE_CODIGO_RE.finditer(content):
+            cuerpo = match.group(1)
+            ruta = self._ruta_de_cabecera(cuerpo.split("\n", 1)[0])
+            if ruta:
+                bloques.append((ruta, cuerpo))
+        return bloques or None
+
+    def _ruta_de_cabecera(self, linea):
+        """Ruta del comentario de cabecera de un bloque, o None si la línea no lo es."""
+        ruta = self.extract_file_path_from_comment(linea.strip())
+        if ruta and _RUTA_COMENTARIO_RE.match(ruta):
+            return ruta
+        return None
+
+    def _extraer_bloques_marcados(self, content):
+        """Bloques START FILE/END FILE; el texto fuera de ellos (cabecera, SKIPPED FILE...) se ignora."""
+        bloques = []
+        posicion = 0
+        while True:
+            inicio = _INICIO_BLOQUE_RE.search(content, posicion)
+            if not inicio:
+                return bloques
+            ruta = inicio.group(1)
+            marca_fin = f"\n--- END FILE: {ruta} ---"
+            fin = content.find(marca_fin, inicio.end())
+            if fin == -1:
+                # Bloque sin cerrar (p. ej. una parte cortada): se rechaza en la validación
+                bloques.append((ruta, None))
+                return bloques
+            # El contenido empieza tras el salto de línea de la marca de inicio
+            bloques.append((ruta, content[inicio.end() + 1:fin]))
+            posicion = fin + len(marca_fin)
+
+    def _validar_ruta(self, relative_path):
+        """(ruta completa, None) si se puede escribir 'relative_path'; (None, motivo) si no."""
+        full_path = os.path.normpath(os.path.join(self.base_directory, relative_path))
+        # Verificar que está dentro del directorio base
+        if os.path.commonpath([self.base_directory]) != os.path.commonpath([self.base_directory, full_path]):
+            return None, "fuera del directorio base"
+        # Nombres que FileProcessor marca como ajenos al proyecto, p. ej. "x.py (fuera de ruta base)"
+        if relative_path.endswith(")") and " (" in relative_path:
+            return None, "no es una ruta del proyecto"
+        if not os.path.splitext(full_path)[1]:
+            return None, "sin extensión"
+        return full_path, None
+
+    def create_files(self, archivos):
+        """
+        Escribe en lote los archivos [(ruta relativa, contenido)] de un portapapeles con varios.
+        Todos se validan antes de escribir (ver _validar_ruta): si alguno no es válido no se escribe ninguno.
+        Devuelve el número de archivos escritos (los idénticos al existente no se reescriben).
+        """
+        contenidos = {}
+        for relative_path, content in archivos:
+            if content is not None:
+                contenidos.setdefault(relative_path.replace("\\", "/"), content)
+        validos = []
+        errores = []
+        vistos = set()
+        for relative_path, content in archivos:
+            full_path, motivo = self._validar_ruta(relative_path)
+            if content is None:
+                motivo = motivo or "bloque sin END FILE"
+            elif _RECORTE_RE.search(content):
+                motivo = motivo or "extracto incompleto"
+            else:
+                mismo_que = _MISMO_QUE_RE.match(content.strip())
+                if mismo_que:
+                    # Duplicado emitido como referencia: se escribe el contenido del original
+                    content = contenidos.get(mismo_que.group(1))
+                    if content is None or _MISMO_QUE_RE.match(content.strip()):
+                        motivo = motivo or f"SAME AS {mismo_que.group(1)} sin el original"
+            if full_path in vistos:
+                motivo = motivo or "repetido"
+            if motivo:
+                errores.append(f"{relative_path} ({motivo})")
+                continue
+            vistos.add(full_path)
+            validos.append((full_path, content))
+
+        if errores:
+            print(f"[File Generator] Lote de {len(archivos)} archivos rechazado, no se escribió nada: {'; '.join(errores)}")
+            return 0
+
+        escritos = []
+        sin_cambios = []
+        fallidos = []
+        for full_path, content in validos:
+            relative_path = os.path.relpath(full_path, self.base_directory).replace("\\", "/")
+            resultado = self._escribir_archivo(full_path, content)
+            if resultado == ESCRITO:
+                escritos.append(relative_path)
+            elif resultado == SIN_CAMBIOS:
+                sin_cambios.append(relative_path)
+            else:
+                fallidos.append(relative_path)
+        timestamp = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        resumen = f"[{timestamp}] Lote generado: {len(escritos)} escritos, {len(sin_cambios)} sin cambios de {len(validos)} archivos"
+        if escritos:
+            resumen += f" ({', '.join(escritos)})"
+        if fallidos:
+            resumen += f"; con error: {', '.join(fallidos)}"
+        print(resumen)
+        return len(escritos)
+
+    @staticmethod
+    def _mismo_contenido(full_path, datos):
+        """True si el archivo existente tiene exactamente 'datos' (primero se compara el tamaño, luego el hash)."""
+        try:
+            if os.stat(full_path).st_size != len(datos):
+                return False
+            huella = hashlib.blake2b(digest_size=16)
+            with open(full_path, 'rb') as file:
+                for bloque in iter(lambda: file.read(1024 * 1024), b''):
+                    huella.update(bloque)
+        except OSError:
+            return False
+        return huella.digest() == hashlib.blake2b(datos, digest_size=16).digest()
+
+    @staticmethod
+    def _reemplazar_atomico(full_path, datos):
+        """
+        Escribe 'datos' en un temporal único junto al destino, lo sincroniza con fsync y lo renombra
+        sobre el destino con os.replace: un fallo a mitad nunca deja el archivo a medias.
+        Si el destino es un enlace simbólico se sustituye el archivo al que apunta, no el enlace.
+        Se conservan los permisos del archivo que se sustituye (los de open() si es nuevo).
+        """
+        destino = os.path.realpath(full_path)
+        directorio = os.path.dirname(destino)
+        try:
+            modo = stat.S_IMODE(os.stat(destino).st_mode)
+        except FileNotFoundError:
+            # mkstemp crea el temporal con 0600: un archivo nuevo recibe los permisos de open()
+            modo = 0o666 & ~_UMASK
+        fd, ruta_temporal = tempfile.mkstemp(dir=directorio, prefix="." + os.path.basename(destino) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(datos)
+                file.flush()
+                os.fsync(file.fileno())
+            os.chmod(ruta_temporal, modo)
+            os.replace(ruta_temporal, destino)
+        except BaseException:
+            # Solo se borra el temporal propio, nunca un archivo existente
+            try:
+                os.remove(ruta_temporal)
+            except OSError:
+                pass
+            raise
+        if os.name == 'posix':
+            # El renombrado es duradero cuando se sincroniza también el directorio
+            try:
+                fd = os.open(directorio, os.O_RDONLY)
+            except OSError:
+                return
+            try:
+                os.fsync(fd)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+
+    def _escribir_archivo(self, full_path, content):
+        """
+        Escribe el archivo con el contenido limpio. Devuelve ESCRITO, SIN_CAMBIOS si el archivo
+        ya tenía ese mismo contenido (no se toca, ni su mtime) o None si falló; los errores se muestran.
+        """
         try:
             # Limpiar contenido manteniendo estructura
             cleaned_content = []
@@ -42,53 +273,103 @@ class FileGenerator(threading.Thread):
                     cleaned_content.append('')
                 else:
                     cleaned_content.append(line.rstrip())
+            # Mismos bytes que escribía open(..., 'w'): saltos de línea de la plataforma
+            texto = '\n'.join(cleaned_content)
+            if os.linesep != '\n':
+                texto = texto.replace('\n', os.linesep)
+            datos = texto.encode('utf-8')
+
+            if self._mismo_contenido(full_path, datos):
+                self.archivos_sin_cambios += 1
+                return SIN_CAMBIOS
 
             # Crear directorios y archivo
             os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            self._reemplazar_atomico(full_path, datos)
+            self.archivos_escritos += 1
+            return ESCRITO
+        except Exception as e:
+            print(f"[File Generator Error] {str(e)}")
+            return None
 
-            with open(full_path, 'w', encoding='utf-8') as file:
-                file.write('\n'.join(cleaned_content))
-
+    def create_file(self, full_path, content):
+        resultado = self._escribir_archivo(full_path, content)
+        if resultado:
             # --- Cambio: Añadir fecha y hora al mensaje de log ---
             now = datetime.now()
             timestamp = now.strftime("%d/%m/%Y %H:%M:%S") # Formato DD/MM/YYYY HH:MM:SS
             relative_path = os.path.relpath(full_path, self.base_directory).replace("\\", "/")
-            print(f"[{timestamp}] Archivo generado: {relative_path}")
+            if resultado == SIN_CAMBIOS:
+                print(f"[{timestamp}] Archivo sin cambios (no se reescribe): {relative_path}")
+            else:
+                print(f"[{timestamp}] Archivo generado: {relative_path}")
             # --- Fin Cambio ---
             return True
-        except Exception as e:
-            print(f"[File Generator Error] {str(e)}")
+        return False
+
+    def _comprobar_portapapeles(self):
+        """Procesa el portapapeles si cambió desde la última comprobación. Devuelve si cambió."""
+        # Si el sistema ofrece un número de secuencia, ni siquiera se lee el contenido mientras no cambie
+        secuencia = self.portapapeles.secuencia()
+        if secuencia is not None and secuencia == self._ultima_secuencia:
             return False
+        self._ultima_secuencia = secuencia
+
+        clipboard_content = self.portapapeles.leer() or ""
+        huella = self.huella(clipboard_content)
+        if huella == self.last_clipboard_hash:
+            return False
+        self.last_clipboard_hash = huella
+        if huella == self.huella_ignorada:
+            return True
+        self._procesar_contenido(clipboard_content)
+        return True
+
+    def _procesar_contenido(self, clipboard_content):
+        # Incluye los contextos "Solo Nombres", cuyas rutas no dicen dónde estaba cada archivo
+        if _CONTEXTO_PROPIO_RE.search(clipboard_content):
+            print("[File Generator] Ignorado: el portapapeles contiene un contexto copiado por la aplicación.")
+            return
+        archivos = self.extract_files_from_payload(clipboard_content)
+        if archivos:
+            self.create_files(archivos)
+            return
+        relative_path = self.extract_file_path_from_comment(clipboard_content)
+        if relative_path:
+            full_path = os.path.normpath(os.path.join(self.base_directory, relative_path))
+
+            # Verificar que está dentro del directorio base
+            if os.path.commonpath([self.base_directory]) != os.path.commonpath([self.base_directory, full_path]):
+                print("[File Generator] Intento de escribir fuera del directorio base bloqueado")
+                return
+            # --- NUEVA COMPROBACIÓN: Verificar si el archivo tiene extensión ---
+            if not os.path.splitext(full_path)[1]:
+                print(f"[File Generator] Bloqueado: El archivo '{relative_path}' no tiene extensión.")
+                return # Saltar la creación si no hay extensión
+            # --- FIN NUEVA COMPROBACIÓN ---
+            self.create_file(full_path, clipboard_content)
 
     def run(self):
         self.running = True
         print("[File Generator] Iniciando monitorización del portapapeles...")
 
-        while self.running:
-            try:
-                clipboard_content = pyperclip.paste()
-
-                if clipboard_content != self.last_clipboard_content:
-                    self.last_clipboard_content = clipboard_content
-
-                    relative_path = self.extract_file_path_from_comment(clipboard_content)
-                    if relative_path:
-                        full_path = os.path.normpath(os.path.join(self.base_directory, relative_path))
-
-                        # Verificar que está dentro del directorio base
-                        if os.path.commonpath([self.base_directory]) != os.path.commonpath([self.base_directory, full_path]):
-                            print("[File Generator] Intento de escribir fuera del directorio base bloqueado")
-                            continue
-                        # --- NUEVA COMPROBACIÓN: Verificar si el archivo tiene extensión ---
-                        if not os.path.splitext(full_path)[1]:
-                            print(f"[File Generator] Bloqueado: El archivo '{relative_path}' no tiene extensión.")
-                            continue # Saltar la creación si no hay extensión
-                        # --- FIN NUEVA COMPROBACIÓN ---
-                        self.create_file(full_path, clipboard_content)
-
-                time.sleep(0.5)
-            except Exception as e:
-                print(f"[File Generator Error] {str(e)}")
-                time.sleep(1)
-
-        print("[File Generator] Monitorización detenida")
\ No newline at end of file
+        intervalo = self.INTERVALO_MIN
+        try:
+            while self.running:
+                try:
+                    if self._comprobar_portapapeles():
+                        intervalo = self.INTERVALO_MIN
+                    else:
+                        intervalo = min(intervalo * self.FACTOR_ESPERA, self.INTERVALO_MAX)
+                except Exception as e:
+                    # Tras stop() el backend puede fallar al cerrarse (p. ej. la raíz Tk ya no atiende)
+                    if self.running:
+                        print(f"[File Generator Error] {str(e)}")
+                    intervalo = self.INTERVALO_MAX
+                # stop() interrumpe la espera
+                self._parada.wait(intervalo)
+        finally:
+            # Algunos backends (Tk) deben cerrarse desde el hilo que los usó
+            self.portapapeles.cerrar()
+
+        print(f"[File Generator] Monitorización detenida ({self.archivos_escritos} archivos escritos, {self.archivos_sin_cambios} sin cambios)")
@@ -1,78 +1,319 @@
 # file_operations.py
+import codecs
+import hashlib
+import mmap
 import os
-import pyperclip
+import sys
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pattern_matcher import PatternMatcher
+from tree_index import TreeIndex
+from project_walker import ProjectWalker
+from change_tracker import SeguimientoCambios
+from content_cache import ContentCache
+from deduplicator import DeduplicadorContenido
+from git_files import ArchivosGit
+from gitignore_matcher import GitignoreMatcher
+from context_report import InformeContexto
+from context_metrics import MetricasContexto
+from context_preview import ArchivoPrevisto, VistaPreviaContexto
+from token_budget import TokenBudget, TokenCountCache, estimar_bloque
+from file_sniffer import TAMANO_MUESTRA, clasificar
+from compactor import compactar, lenguaje_de
+from text_decoding import CODIFICACION_ALTERNATIVA_POR_DEFECTO, bytes_utf8, decodificar, detectar_codificacion, es_utf8
+
+# Qué hacer con archivos binarios, minificados o generados
+ACCIONES_NO_TEXTO = ("listar", "omitir", "incluir")
+# De dónde salen los archivos candidatos: recorrido del disco, recorrido respetando
+# los .gitignore o listado de archivos versionados de git
+ORIGENES_ARCHIVOS = ("recorrido", "gitignore", "git")
+
+# Opciones que cambian el bloque producido para un archivo (parte de la clave de caché).
+# umbral_grande: bytes a partir de los cuales se emite solo un extracto (0 = nunca).
+OpcionesLectura = namedtuple(
+    "OpcionesLectura",
+    ["accion_no_texto", "umbral_grande", "lineas_inicio", "lineas_final", "compactar", "codificacion_alternativa"]
+)
+OPCIONES_LECTURA_POR_DEFECTO = OpcionesLectura(
+    accion_no_texto="listar",
+    umbral_grande=5 * 1024 * 1024,
+    lineas_inicio=200,
+    lineas_final=100,
+    compactar=frozenset(), # Extensiones (".py", ".js"...) cuyo contenido se compacta
+    codificacion_alternativa=CODIFICACION_ALTERNATIVA_POR_DEFECTO # Para lo que no es UTF-8 válido ni lleva BOM
+)
+# Tope de bytes de cada parte del extracto, por si las líneas son enormes
+MAX_BYTES_PARTE_EXTRACTO = 256 * 1024
+
+
+class BloqueLeido:
+    """Bloque de texto producido para un archivo, con lo necesario para el informe de la ejecución."""
+    __slots__ = ("texto", "omitido", "bytes_evitados", "error", "extracto", "huella", "compactacion", "bytes_leidos")
+
+    def __init__(self, texto, omitido=None, bytes_evitados=0, error=False, extracto=False, huella=None, compactacion=None, bytes_leidos=0):
+        self.texto = texto
+        # Motivo de omisión (file_sniffer.BINARIO, MINIFICADO o GENERADO) o None
+        self.omitido = omitido
+        self.bytes_evitados = bytes_evitados
+        self.error = error
+        # True si es un archivo grande del que solo se emitió inicio y final
+        self.extracto = extracto
+        # Hash del contenido completo del archivo (None si no se leyó entero)
+        self.huella = huella
+        # (bytes antes, bytes después) si el contenido se compactó
+        self.compactacion = compactacion
+        # Bytes leídos del disco para producir el bloque (0 si salió de la caché)
+        self.bytes_leidos = bytes_leidos
+
+    def con_texto(self, texto):
+        """Copia del bloque con otro texto (p. ej. una referencia a un duplicado)."""
+        return BloqueLeido(texto, self.omitido, self.bytes_evitados, self.error, self.extracto, self.huella, bytes_leidos=self.bytes_leidos)
+
+    def desde_cache(self):
+        """Copia del bloque para un acierto de caché: no se leyó nada del disco."""
+        return BloqueLeido(self.texto, self.omitido, self.bytes_evitados, self.error, self.extracto, self.huella, self.compactacion)
+
+    def tamano_memoria(self):
+        return sys.getsizeof(self.texto) + 128
+
 
 class FileProcessor:
+    HILOS_LECTURA_POR_DEFECTO = 8
+    MAX_HILOS_LECTURA = 64
+    CACHE_CONTENIDO_MB_POR_DEFECTO = 256
+    # Por debajo de este tamaño compactar en el propio hilo es más barato que enviar el texto a otro proceso
+    MIN_CARACTERES_PROCESO_COMPACTACION = 32 * 1024
+
+    # Caché compartida por todas las ejecuciones del proceso
+    cache_contenido = ContentCache(CACHE_CONTENIDO_MB_POR_DEFECTO * 1024 * 1024)
+    # Pool de procesos para la compactación ('procesos_compactacion'); None = en el hilo lector
+    pool_compactacion = None
+    procesos_compactacion = 0
+    # Serializa las generaciones del proceso (copia, vista previa, vigilancia): comparten
+    # el índice de TreeIndex.para_proyecto y las cachés
+    lock_construccion = threading.Lock()
+
+    @staticmethod
+    def _obtener_hilos_lectura(config):
+        """Lee 'hilos_lectura' de la configuración del proyecto y lo acota a un rango válido."""
+        try:
+            hilos = int(config.get("hilos_lectura", FileProcessor.HILOS_LECTURA_POR_DEFECTO))
+        except (TypeError, ValueError):
+            print(f"[Advertencia] Valor inválido para 'hilos_lectura': {config.get('hilos_lectura')!r}. Usando {FileProcessor.HILOS_LECTURA_POR_DEFECTO}.")
+            hilos = FileProcessor.HILOS_LECTURA_POR_DEFECTO
+        return max(1, min(hilos, FileProcessor.MAX_HILOS_LECTURA))
+
     @staticmethod
     def _should_include(path, project_base_path, positive_patterns, negative_patterns):
         """
         Verifica si una ruta debe incluirse según patrones positivos y negativos.
         Los patrones se aplican case-insensitive a los componentes de la ruta
-        relativa a project_base_path.
-        """
-        normalized_path_full = os.path.normpath(path).lower()
-        normalized_project_base_path = os.path.normpath(project_base_path).lower()
-
-        # Calcular la ruta relativa a la ruta base del proyecto
-        if normalized_path_full.startswith(normalized_project_base_path):
-            relative_path_str = os.path.relpath(normalized_path_full, normalized_project_base_path)
-            # Si la ruta relativa es '.', significa que path es igual a project_base_path
-            # En este caso, podríamos querer considerar el último componente de project_base_path
-            # o simplemente tratarlo como una cadena vacía para que no coincida con patrones
-            # destinados a nombres de archivo/directorio. Por ahora, si es '.', los componentes estarán vacíos.
-            if relative_path_str == ".":
-                # Considerar el nombre del directorio base si path es igual a project_base_path
-                # path_components = [os.path.basename(normalized_project_base_path)] if normalized_project_base_path else []
-                # O, para evitar que la propia ruta base coincida si no es la intención:
-                path_components = []
-            else:
-                path_components = [comp for comp in relative_path_str.split(os.sep) if comp]
-        else:
-            # Si la ruta no está dentro de la ruta base del proyecto (caso raro aquí, pero defensivo)
-            # Usamos los componentes de la ruta completa, pero esto podría no ser lo deseado.
-            # O mejor, solo el nombre del archivo/directorio final
-            path_components = [os.path.basename(normalized_path_full)]
-
-
-        # 1. Comprobación de patrones negativos (case-insensitive)
-        lower_negative_patterns = [p.lower() for p in negative_patterns]
-        for neg_pattern in lower_negative_patterns:
-            for component in path_components:
-                if neg_pattern in component:
-                    # print(f"DEBUG: Excluding '{path}' (relative: '{relative_path_str if normalized_path_full.startswith(normalized_project_base_path) else 'N/A'}') due to negative pattern '{neg_pattern}' in component '{component}'")
-                    return False
-
-        # 2. Comprobación de patrones positivos (si existen) (case-insensitive)
-        if positive_patterns:
-            found_positive_match = False
-            lower_positive_patterns = [p.lower() for p in positive_patterns]
-            for pos_pattern in lower_positive_patterns:
-                for component in path_components:
-                    if pos_pattern in component:
-                        # print(f"DEBUG: Found positive match for '{path}' (relative: '{relative_path_str if normalized_path_full.startswith(normalized_project_base_path) else 'N/A'}') with pattern '{pos_pattern}' in component '{component}'")
-                        found_positive_match = True
-                        break
-                if found_positive_match:
-                    break
+        relativa a project_base_path. Para evaluar muchas rutas conviene construir
+        un PatternMatcher una sola vez y llamar a su método incluye().
+        """
+        matcher = PatternMatcher.compilado(tuple(positive_patterns), tuple(negative_patterns))
+        return matcher.incluye(path, project_base_path)
+
+    @staticmethod
+    def procesar_archivos(config, incluir_ruta, directorio_datos=None, informe=None):
+        """Devuelve el contexto completo como cadena junto con la lista de archivos específicos no encontrados."""
+        if informe is None:
+            informe = InformeContexto()
+        contenido_total = "".join(FileProcessor.iter_contexto(config, incluir_ruta, None, directorio_datos, informe))
+        return contenido_total, informe.archivos_no_encontrados
+
+    @staticmethod
+    def iter_contexto(config, incluir_ruta, archivos_no_encontrados=None, directorio_datos=None, informe=None):
+        """
+        Genera de forma perezosa los bloques START FILE/END FILE del contexto.
+        Los archivos se leen a medida que el recorrido los selecciona, sin acumular el
+        contexto completo en memoria. Si se pasa 'archivos_no_encontrados', se rellena
+        con los archivos específicos no hallados; la lista está completa al agotar el generador.
+        'directorio_datos' es el directorio de datos del proyecto (ver ConfigHandler.get_project_data_dir);
+        si se indica, el recorrido usa el índice persistente del árbol.
+        'informe' (InformeContexto) recibe los no encontrados, lo descartado por presupuesto y los totales.
+        Con 'presupuesto_tokens' o 'presupuesto_bytes' en la configuración, los archivos específicos
+        van primero y se dejan de leer los archivos que ya no caben.
+        Con directorio de datos se prepara la instantánea de lo enviado (informe.seguimiento_cambios,
+        que el llamador guarda si la copia tiene éxito); con 'solo_cambios' solo se emiten los
+        archivos nuevos o modificados desde la última copia y se listan los borrados.
+        Con 'deduplicar', las copias idénticas de un archivo ya emitido se sustituyen por
+        un bloque "--- SAME AS: original ---".
+        """
+        if informe is None:
+            informe = InformeContexto()
+        if archivos_no_encontrados is None:
+            archivos_no_encontrados = informe.archivos_no_encontrados
+        metricas = informe.metricas
+        FileProcessor._configurar_cache(config)
+        FileProcessor._configurar_compactacion(config)
+        ruta_base = os.path.normpath(config["ruta_base"])
 
-            if not found_positive_match:
-                # print(f"DEBUG: Excluding '{path}' (relative: '{relative_path_str if normalized_path_full.startswith(normalized_project_base_path) else 'N/A'}') because no positive patterns matched components: {path_components}")
-                return False
+        entradas = metricas.cronometrar(
+            "filtrado",
+            FileProcessor._iter_rutas_seleccionadas(config, archivos_no_encontrados, directorio_datos, metricas)
+        )
+        seguimiento = SeguimientoCambios.para_proyecto(directorio_datos, config)
+        informe.seguimiento_cambios = seguimiento
+        if seguimiento:
+            informe.solo_cambios = seguimiento.solo_cambios
+            entradas = seguimiento.filtrar_entradas(entradas)
+        opciones = FileProcessor._obtener_opciones_lectura(config)
+        # Los archivos grandes se estiman por el extracto que se emitirá (inicio + final), no por su tamaño
+        presupuesto = TokenBudget.desde_config(
+            config, directorio_datos, informe, opciones.umbral_grande,
+            opciones.lineas_inicio + opciones.lineas_final, 2 * MAX_BYTES_PARTE_EXTRACTO
+        )
+        if presupuesto:
+            entradas = presupuesto.filtrar_entradas(presupuesto.ordenar(entradas))
+        if seguimiento or presupuesto:
+            entradas = metricas.cronometrar("filtrado", entradas)
 
-        # print(f"DEBUG: Including '{path}' (relative: '{relative_path_str if normalized_path_full.startswith(normalized_project_base_path) else 'N/A'}') components: {path_components}")
-        return True
+        leidos = FileProcessor._leer_archivos(
+            entradas,
+            ruta_base,
+            incluir_ruta,
+            FileProcessor._obtener_hilos_lectura(config),
+            opciones
+        )
+        if seguimiento:
+            leidos = seguimiento.filtrar_leidos(leidos)
+        deduplicador = None
+        if config.get("deduplicar", False):
+            deduplicador = DeduplicadorContenido(
+                lambda e: FileProcessor._ruta_mostrada(e.ruta, ruta_base, incluir_ruta, e.relativa),
+                informe
+            )
+            leidos = deduplicador.filtrar_leidos(leidos)
+        pares = FileProcessor._registrar_leidos(leidos, informe)
+        if presupuesto:
+            pares = presupuesto.filtrar_bloques(pares)
+        # Lectura: todo lo que no es recorrido ni filtrado (lectura, compactación, deduplicación...)
+        pares = metricas.cronometrar("lectura", pares)
+        # Las etapas son generadores encadenados: cada bloque se confirma antes de
+        # que las etapas anteriores procesen el siguiente.
+        for entrada, bloque in pares:
+            if not presupuesto:
+                informe.archivos_emitidos += 1
+            if seguimiento:
+                seguimiento.confirmar(entrada)
+            if deduplicador:
+                deduplicador.confirmar(entrada)
+            metricas.caracteres_emitidos += len(bloque)
+            yield bloque
+
+        if seguimiento:
+            informe.archivos_sin_cambios = seguimiento.sin_cambios
+            if seguimiento.solo_cambios:
+                for ruta, relativa in seguimiento.calcular_borrados():
+                    nombre = FileProcessor._ruta_mostrada(ruta, ruta_base, incluir_ruta, relativa)
+                    informe.archivos_borrados.append(nombre)
+                    yield f"\n--- DELETED FILE: {nombre} ---\n"
 
     @staticmethod
-    def procesar_archivos(config, incluir_ruta):
-        contenido_total = ""
-        archivos_no_encontrados = []
+    def _registrar_leidos(leidos, informe):
+        """Anota en el informe los archivos omitidos y produce pares (entrada, texto) con texto no vacío."""
+        metricas = informe.metricas
+        for entrada, leido in leidos:
+            metricas.comprobar_cancelacion()
+            metricas.archivos_leidos += 1
+            metricas.bytes_leidos += leido.bytes_leidos
+            if leido.error:
+                metricas.descartar("error_lectura")
+            elif leido.omitido:
+                informe.registrar_omitido(leido.omitido, entrada.relativa or entrada.ruta, leido.bytes_evitados)
+            elif leido.extracto:
+                informe.registrar_extracto(entrada.relativa or entrada.ruta, leido.bytes_evitados)
+            elif leido.compactacion:
+                informe.registrar_compactacion(*leido.compactacion)
+            if leido.texto:
+                yield entrada, leido.texto
 
-        patrones_str = config.get("patrones", "").strip()
-        all_patterns = [p.strip().lower() for p in patrones_str.split(',') if p.strip()]
-        positive_patterns = [p[1:] for p in all_patterns if p.startswith('+') and len(p) > 1]
-        negative_patterns = [p[1:] for p in all_patterns if p.startswith('-') and len(p) > 1]
+    @staticmethod
+    def escribir_contexto(config, incluir_ruta, sink, archivos_no_encontrados=None, directorio_datos=None, informe=None):
+        """
+        Escribe el contexto en cualquier objeto con método write() (buffer, archivo, socket.makefile()...).
+        Devuelve el número de caracteres escritos.
+        """
+        total = 0
+        for fragmento in FileProcessor.iter_contexto(config, incluir_ruta, archivos_no_encontrados, directorio_datos, informe):
+            sink.write(fragmento)
+            total += len(fragmento)
+        return total
+
+    @staticmethod
+    def vista_previa(config, directorio_datos=None, metricas=None):
+        """
+        Simulación de la selección sin leer ningún archivo: solo listados de directorios y stat.
+        Devuelve una VistaPreviaContexto con los archivos que incluirían los filtros, su tamaño
+        y sus tokens estimados (recuento cacheado o estimación por tamaño).
+        No se aplican 'solo_cambios', el presupuesto ni la detección de binarios, que requieren leer.
+        """
+        if metricas is None:
+            metricas = MetricasContexto()
+        vista = VistaPreviaContexto(metricas)
+        cache_tokens = TokenCountCache.para_proyecto(directorio_datos)
+        umbral_grande = FileProcessor._obtener_opciones_lectura(config).umbral_grande
+        entradas = metricas.cronometrar(
+            "filtrado",
+            FileProcessor._iter_rutas_seleccionadas(config, vista.archivos_no_encontrados, directorio_datos, metricas)
+        )
+        for entrada in entradas:
+            try:
+                st = entrada.stat()
+            except OSError:
+                metricas.descartar("error_lectura")
+                continue
+            extracto = bool(umbral_grande) and st.st_size > umbral_grande
+            tokens, _ = estimar_bloque(entrada, st, cache_tokens, 2 * MAX_BYTES_PARTE_EXTRACTO if extracto else 0)
+            vista.archivos.append(ArchivoPrevisto(entrada.relativa or entrada.ruta, st.st_size, tokens, extracto))
+        return vista
+
+    @staticmethod
+    def _iter_rutas_seleccionadas(config, archivos_no_encontrados, directorio_datos=None, metricas=None):
+        """
+        Produce, en orden de os.walk y luego de archivos específicos, las entradas
+        (EntradaArchivo) de los archivos que deben incluirse.
+        'metricas' (MetricasContexto) recibe el tiempo de recorrido y los directorios y archivos descartados.
+        """
+        origen = config.get("origen_archivos", "recorrido")
+        if origen not in ORIGENES_ARCHIVOS:
+            print(f"[Advertencia] Valor inválido para 'origen_archivos': {origen!r}. Usando 'recorrido'.")
+            origen = "recorrido"
+
+        indice = None
+        if origen == "git":
+            indice = ArchivosGit.desde_repositorio(config["ruta_base"])
+            if indice is None:
+                print(f"[Advertencia] {config['ruta_base']} no es un repositorio git legible. Se recorre el disco.")
+        if indice is None and directorio_datos and config.get("usar_indice", True):
+            indice = TreeIndex.para_proyecto(directorio_datos, config["ruta_base"])
+        gitignore = GitignoreMatcher() if origen == "gitignore" else None
+        try:
+            yield from FileProcessor._seleccionar_rutas(
+                config, archivos_no_encontrados, indice, gitignore, metricas, directorio_datos
+            )
+        finally:
+            if isinstance(indice, TreeIndex):
+                indice.guardar()
+
+    @staticmethod
+    def _seleccionar_rutas(config, archivos_no_encontrados, indice=None, gitignore=None, metricas=None, directorio_datos=None):
+        """
+        Produce las entradas de _iter_rutas_seleccionadas a partir del índice o del disco.
+        'directorio_datos' no se recorre nunca: si está dentro de la ruta base (CodeFlow ejecutado
+        desde el árbol analizado), sus índices, cachés y contextos no deben entrar en la copia.
+        """
+        if metricas is None:
+            metricas = MetricasContexto()
+        # Patrones compilados una sola vez para todo el recorrido
+        matcher = PatternMatcher.desde_cadena(config.get("patrones", ""))
 
         ruta_base = os.path.normpath(config["ruta_base"]) # Esta es la project_base_path para _should_include
+        walker = ProjectWalker(ruta_base, matcher, indice)
+        ruta_datos = FileProcessor._ruta_datos_en_base(directorio_datos, ruta_base)
         directorio_principal_str = config.get("directorio_principal", "").strip()
         nombres_directorios_principales = [d.strip() for d in directorio_principal_str.split(',') if d.strip()]
 
@@ -110,43 +351,64 @@ class FileProcessor:
         ]
 
         solo_archivos_especificos = config.get("solo_archivos_especificos", False)
-        processed_files = set()
+        # Ruta normalizada -> EntradaArchivo ya emitida
+        processed_files = {}
+
+        # Índice nombre_en_minúsculas -> rutas, para resolver los archivos específicos sin
+        # recorrer el árbol una vez por archivo. Se alimenta del propio recorrido principal;
+        # los directorios excluidos solo por patrones quedan pendientes de indexar.
+        indice_nombres = {}
+        directorios_pendientes = []
 
         for directorio_busqueda in rutas_de_busqueda:
             if not solo_archivos_especificos:
-                for root_dir, dirs, files in os.walk(directorio_busqueda, topdown=True):
+                for directorio, subdirs, archivos in metricas.cronometrar("recorrido", walker.recorrer(directorio_busqueda)):
+                    metricas.comprobar_cancelacion()
+                    metricas.directorios_visitados += 1
+                    metricas.archivos_vistos += len(archivos)
+                    total_subdirs = len(subdirs)
+                    if gitignore:
+                        # Lo ignorado por git ni se recorre ni se indexa para los archivos específicos
+                        total_archivos = len(archivos)
+                        subdirs[:], archivos = gitignore.filtrar(directorio.ruta, subdirs, archivos)
+                        metricas.descartar("gitignore", total_archivos - len(archivos))
                     # Filtrar directorios prohibidos por config y patrones negativos
-                    dirs[:] = [
-                        d for d in dirs
-                        if d not in directorios_prohibidos_config and
-                           FileProcessor._should_include(os.path.join(root_dir, d), ruta_base, [], negative_patterns)
+                    no_prohibidos = [
+                        d for d in subdirs if d.nombre not in directorios_prohibidos_config and d.ruta != ruta_datos
                     ]
+                    subdirs[:] = [d for d in no_prohibidos if matcher.incluye_mascara(d.mascara, solo_negativos=True)]
+                    if len(subdirs) != len(no_prohibidos):
+                        directorios_pendientes.extend(d.ruta for d in no_prohibidos if d not in subdirs)
+                    metricas.directorios_podados += total_subdirs - len(subdirs)
+                    FileProcessor._registrar_nombres(indice_nombres, directorio.ruta, (a.nombre for a in archivos))
 
-                    for archivo in files:
-                        archivo_path = os.path.join(root_dir, archivo)
-                        archivo_path_norm = os.path.normpath(archivo_path)
-
-                        if archivo_path_norm in processed_files:
-                            continue
-
+                    for entrada in archivos:
+                        archivo = entrada.nombre
                         if archivo in archivos_prohibidos_config:
+                            metricas.descartar("archivo_prohibido")
                             continue
                         if os.path.splitext(archivo)[1].lower() in formatos_prohibidos:
+                            metricas.descartar("formato_prohibido")
                             continue
 
-                        if FileProcessor._should_include(archivo_path, ruta_base, positive_patterns, negative_patterns):
-                            contenido_total += FileProcessor._leer_archivo(
-                                archivo_path,
-                                ruta_base,
-                                incluir_ruta
-                            )
-                            processed_files.add(archivo_path_norm)
+                        # Las rutas del recorrido ya están normalizadas
+                        archivo_path = entrada.ruta
+                        if archivo_path in processed_files:
+                            continue
+
+                        if matcher.incluye_mascara(entrada.mascara(matcher)):
+                            processed_files[archivo_path] = entrada
+                            metricas.archivos_coincidentes += 1
+                            yield entrada
+                        else:
+                            metricas.descartar("patrones")
 
         archivos_especificos = [
             a.strip()
             for a in config.get("archivos", "").split(",")
             if a.strip()
         ]
+        indice_nombres_completo = False
         for archivo_esp in archivos_especificos:
             archivo_objetivo_path = os.path.normpath(os.path.join(ruta_base, archivo_esp))
             archivo_encontrado = None
@@ -154,33 +416,45 @@ class FileProcessor:
             if os.path.isfile(archivo_objetivo_path):
                 archivo_encontrado = archivo_objetivo_path
             else:
-                nombre_archivo_objetivo = os.path.basename(archivo_esp)
-                for directorio_busqueda_esp in rutas_de_busqueda: # Buscar en todas las rutas de búsqueda definidas
-                    archivo_path_temporal = FileProcessor._buscar_archivo_recursivo(
-                        directorio_busqueda_esp,
-                        nombre_archivo_objetivo,
-                        directorios_prohibidos_config # Pasar dirs prohibidos para la búsqueda
-                    )
-                    if archivo_path_temporal:
-                        archivo_encontrado = archivo_path_temporal
-                        break
+                if not indice_nombres_completo:
+                    # Sin recorrido principal se indexan las rutas de búsqueda; con él, solo lo que quedó fuera
+                    raices = rutas_de_busqueda if solo_archivos_especificos else directorios_pendientes
+                    FileProcessor._indexar_nombres(indice_nombres, raices, directorios_prohibidos_config, walker, ruta_datos)
+                    indice_nombres_completo = True
+
+                candidatos = FileProcessor._resolver_por_nombre(indice_nombres, archivo_esp)
+                if len(candidatos) > 1:
+                    # Los candidatos que ya emitió el recorrido se marcan como específicos (prioridad
+                    # en modo presupuesto); solo es ambiguo si alguno quedó sin incluir
+                    emitidos = [processed_files[c] for c in candidatos if c in processed_files]
+                    for entrada in emitidos:
+                        entrada.especifico = True
+                    if len(emitidos) < len(candidatos) and archivo_esp not in [a.split(' ')[0] for a in archivos_no_encontrados]:
+                        rutas_ambiguas = ", ".join(
+                            os.path.relpath(c, ruta_base).replace("\\", "/") for c in candidatos
+                        )
+                        archivos_no_encontrados.append(f"{archivo_esp} (ambiguo: {rutas_ambiguas})")
+                    continue
+                if candidatos:
+                    archivo_encontrado = candidatos[0]
 
             if archivo_encontrado:
                 archivo_encontrado_norm = os.path.normpath(archivo_encontrado)
                 if archivo_encontrado_norm in processed_files:
+                    # Ya incluido por el recorrido: se marca para que tenga prioridad en modo presupuesto
+                    processed_files[archivo_encontrado_norm].especifico = True
                     continue
 
                 if os.path.splitext(archivo_encontrado)[1].lower() in formatos_prohibidos:
                     continue
 
                 # Usar ruta_base del proyecto para la evaluación de _should_include
-                if FileProcessor._should_include(archivo_encontrado, ruta_base, positive_patterns, negative_patterns):
-                    contenido_total += FileProcessor._leer_archivo(
-                        archivo_encontrado,
-                        ruta_base,
-                        incluir_ruta
-                    )
-                    processed_files.add(archivo_encontrado_norm)
+                if matcher.incluye(archivo_encontrado, ruta_base):
+                    entrada = walker.archivo(archivo_encontrado_norm)
+                    entrada.especifico = True
+                    processed_files[archivo_encontrado_norm] = entrada
+                    metricas.archivos_coincidentes += 1
+                    yield entrada
                 else:
                     if archivo_esp not in [a.split(' ')[0] for a in archivos_no_encontrados]:
                         archivos_no_encontrados.append(f"{archivo_esp} (filtrado por patrones)")
@@ -188,45 +462,333 @@ class FileProcessor:
                 if archivo_esp not in [a.split(' ')[0] for a in archivos_no_encontrados]:
                      archivos_no_encontrados.append(f"{archivo_esp} (no hallado)")
 
-        return contenido_total, archivos_no_encontrados
+    @staticmethod
+    def _configurar_cache(config):
+        """Aplica el límite 'cache_contenido_mb' del proyecto a la caché de contenido (0 la desactiva)."""
+        try:
+            limite_mb = float(config.get("cache_contenido_mb", FileProcessor.CACHE_CONTENIDO_MB_POR_DEFECTO))
+        except (TypeError, ValueError):
+            print(f"[Advertencia] Valor inválido para 'cache_contenido_mb': {config.get('cache_contenido_mb')!r}. Usando {FileProcessor.CACHE_CONTENIDO_MB_POR_DEFECTO}.")
+            limite_mb = FileProcessor.CACHE_CONTENIDO_MB_POR_DEFECTO
+        FileProcessor.cache_contenido.ajustar_limite(int(limite_mb * 1024 * 1024))
+
+    @staticmethod
+    def _configurar_compactacion(config):
+        """Crea, redimensiona o cierra el pool de procesos de compactación según 'procesos_compactacion'."""
+        try:
+            procesos = max(0, int(config.get("procesos_compactacion", 0)))
+        except (TypeError, ValueError):
+            print(f"[Advertencia] Valor inválido para 'procesos_compactacion': {config.get('procesos_compactacion')!r}. Se compacta en los hilos lectores.")
+            procesos = 0
+        if procesos == FileProcessor.procesos_compactacion:
+            return
+        if FileProcessor.pool_compactacion is not None:
+            FileProcessor.pool_compactacion.shutdown(wait=False)
+            FileProcessor.pool_compactacion = None
+        if procesos:
+            FileProcessor.pool_compactacion = ProcessPoolExecutor(max_workers=procesos)
+        FileProcessor.procesos_compactacion = procesos
+
+    @staticmethod
+    def _compactar(lenguaje, contenido):
+        """Compacta 'contenido' en el pool de procesos si existe y el texto es grande; si no, en este hilo."""
+        pool = FileProcessor.pool_compactacion
+        if pool is not None and len(contenido) >= FileProcessor.MIN_CARACTERES_PROCESO_COMPACTACION:
+            try:
+                return pool.submit(compactar, lenguaje, contenido).result()
+            except (BrokenProcessPool, OSError, RuntimeError) as e:
+                print(f"[Advertencia] Pool de compactación no disponible ({e}). Se compacta en el hilo lector.")
+        return compactar(lenguaje, contenido)
 
     @staticmethod
-    def _buscar_archivo_recursivo(ruta_a_buscar, nombre_objetivo, directorios_prohibidos_config):
-        nombre_objetivo_lower = nombre_objetivo.lower()
-        for root, dirs, files in os.walk(ruta_a_buscar, topdown=True):
-            dirs[:] = [d for d in dirs if d not in directorios_prohibidos_config]
-            for file in files:
-                if file.lower() == nombre_objetivo_lower:
-                    return os.path.join(root, file)
-        return None
+    def _obtener_opciones_lectura(config):
+        """Construye las OpcionesLectura del proyecto; forman parte de la clave de la caché de contenido."""
+        por_defecto = OPCIONES_LECTURA_POR_DEFECTO
+        accion = config.get("accion_no_texto", por_defecto.accion_no_texto)
+        if accion not in ACCIONES_NO_TEXTO:
+            print(f"[Advertencia] Valor inválido para 'accion_no_texto': {accion!r}. Usando 'listar'.")
+            accion = por_defecto.accion_no_texto
+        try:
+            umbral_mb = float(config.get("umbral_archivo_grande_mb", por_defecto.umbral_grande / (1024 * 1024)))
+            lineas_inicio = int(config.get("lineas_inicio_extracto", por_defecto.lineas_inicio))
+            lineas_final = int(config.get("lineas_final_extracto", por_defecto.lineas_final))
+        except (TypeError, ValueError):
+            print("[Advertencia] Opciones de archivos grandes inválidas. Usando valores por defecto.")
+            umbral_mb = por_defecto.umbral_grande / (1024 * 1024)
+            lineas_inicio = por_defecto.lineas_inicio
+            lineas_final = por_defecto.lineas_final
+
+        compactar_ext = set()
+        for extension in str(config.get("compactar_extensiones", "") or "").split(","):
+            extension = extension.strip().lower()
+            if not extension:
+                continue
+            extension = extension if extension.startswith(".") else f".{extension}"
+            if lenguaje_de(extension) is None:
+                print(f"[Advertencia] No hay compactación para '{extension}'. Se ignora.")
+                continue
+            compactar_ext.add(extension)
+
+        alternativa = str(config.get("codificacion_alternativa", por_defecto.codificacion_alternativa) or "")
+        try:
+            alternativa = codecs.lookup(alternativa).name
+        except LookupError:
+            print(f"[Advertencia] Valor inválido para 'codificacion_alternativa': {alternativa!r}. Usando '{por_defecto.codificacion_alternativa}'.")
+            alternativa = por_defecto.codificacion_alternativa
+
+        return OpcionesLectura(
+            accion_no_texto=accion,
+            umbral_grande=max(0, int(umbral_mb * 1024 * 1024)),
+            lineas_inicio=max(0, lineas_inicio),
+            lineas_final=max(0, lineas_final),
+            compactar=frozenset(compactar_ext),
+            codificacion_alternativa=alternativa
+        )
 
     @staticmethod
-    def _leer_archivo(archivo_path, ruta_base_proyecto, incluir_ruta): # ruta_base_proyecto para os.relpath
+    def _leer_archivo_cacheado(entrada, ruta_base_proyecto, incluir_ruta, opciones=None):
+        """
+        Igual que _leer_archivo para una EntradaArchivo, pero reutiliza el bloque formateado
+        si el archivo no cambió (misma ruta, mtime_ns y tamaño). Los bloques de error no se guardan.
+        """
+        archivo_path = entrada.ruta
+        ruta_relativa = entrada.relativa
+        cache = FileProcessor.cache_contenido
+        if not cache.max_bytes:
+            return FileProcessor._leer_archivo(archivo_path, ruta_base_proyecto, incluir_ruta, ruta_relativa, opciones)
         try:
-            with open(archivo_path, "r", encoding="utf-8", errors='ignore') as f:
-                contenido = f.read()
-                if incluir_ruta:
-                    try:
-                        norm_archivo_path = os.path.normpath(archivo_path)
-                        norm_ruta_base_proyecto = os.path.normpath(ruta_base_proyecto)
-
-                        # Asegurarse que la ruta del archivo esté dentro de la ruta base del proyecto
-                        # antes de calcular la ruta relativa.
-                        if os.path.commonpath([norm_archivo_path, norm_ruta_base_proyecto]) == norm_ruta_base_proyecto:
-                            relative_path = os.path.relpath(norm_archivo_path, start=norm_ruta_base_proyecto).replace("\\", "/")
-                        else:
-                            # Si el archivo está fuera de la ruta_base_proyecto (ej. un archivo específico con ruta absoluta)
-                            # mostrar solo el nombre del archivo o la ruta absoluta como fallback.
-                            relative_path = os.path.basename(norm_archivo_path) + " (fuera de ruta base)"
-                            # Opcionalmente, podrías querer mostrar la ruta absoluta si es muy diferente:
-                            # relative_path = norm_archivo_path.replace("\\", "/") + " (ruta absoluta)"
-
-                    except ValueError:
-                        relative_path = os.path.basename(archivo_path) + " (error al calcular ruta relativa)"
-                    return f"\n--- START FILE: {relative_path} ---\n{contenido}\n--- END FILE: {relative_path} ---\n"
-                else:
-                    nombre_archivo = os.path.basename(archivo_path)
-                    return f"\n--- START FILE: {nombre_archivo} ---\n{contenido}\n--- END FILE: {nombre_archivo} ---\n"
+            st = entrada.stat()
+        except OSError:
+            return FileProcessor._leer_archivo(archivo_path, ruta_base_proyecto, incluir_ruta, ruta_relativa, opciones)
+
+        clave = (archivo_path, st.st_mtime_ns, st.st_size, ruta_base_proyecto, incluir_ruta, opciones)
+        leido = cache.obtener(clave)
+        if leido is not None:
+            return leido.desde_cache()
+
+        leido = FileProcessor._leer_archivo(archivo_path, ruta_base_proyecto, incluir_ruta, ruta_relativa, opciones)
+        if not leido.error:
+            try:
+                st_despues = os.stat(archivo_path)
+            except OSError:
+                return leido
+            # Solo se guarda si el archivo no cambió mientras se leía
+            if (st_despues.st_mtime_ns, st_despues.st_size) == (st.st_mtime_ns, st.st_size):
+                cache.guardar(clave, leido, leido.tamano_memoria())
+        return leido
+
+    @staticmethod
+    def _leer_archivos(entradas, ruta_base_proyecto, incluir_ruta, hilos, opciones=None):
+        """
+        Lee las entradas indicadas y produce pares (entrada, BloqueLeido) en el mismo orden.
+        'entradas' puede ser un generador: la lectura avanza a la par que el recorrido.
+        Con más de un hilo usa un pool acotado: como mucho 'hilos * 4' lecturas
+        quedan pendientes a la vez, de modo que la memoria no crece con el tamaño del árbol.
+        """
+        if hilos <= 1:
+            for entrada in entradas:
+                yield entrada, FileProcessor._leer_archivo_cacheado(entrada, ruta_base_proyecto, incluir_ruta, opciones)
+            return
+
+        ventana = hilos * 4
+        with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="lector") as pool:
+            pendientes = deque()
+            for entrada in entradas:
+                pendientes.append((entrada, pool.submit(FileProcessor._leer_archivo_cacheado, entrada, ruta_base_proyecto, incluir_ruta, opciones)))
+                if len(pendientes) >= ventana:
+                    entrada_lista, futuro = pendientes.popleft()
+                    yield entrada_lista, futuro.result()
+            while pendientes:
+                entrada_lista, futuro = pendientes.popleft()
+                yield entrada_lista, futuro.result()
+
+    @staticmethod
+    def _registrar_nombres(indice_nombres, root_dir, files):
+        """Añade los archivos de 'root_dir' al índice de nombres (dict usado como conjunto ordenado)."""
+        for archivo in files:
+            indice_nombres.setdefault(archivo.lower(), {})[os.path.join(root_dir, archivo)] = None
+
+    @staticmethod
+    def _ruta_datos_en_base(directorio_datos, ruta_base):
+        """
+        'directorio_datos' escrito como las rutas del recorrido (a partir de 'ruta_base'),
+        o None si no hay directorio de datos o está fuera de la ruta base.
+        """
+        if not directorio_datos:
+            return None
+        try:
+            relativa = os.path.relpath(os.path.abspath(directorio_datos), os.path.abspath(ruta_base))
+        except ValueError:
+            return None # Otra unidad (Windows)
+        if relativa == os.curdir or relativa == os.pardir or relativa.startswith(os.pardir + os.sep):
+            return None
+        return os.path.normpath(os.path.join(ruta_base, relativa))
+
+    @staticmethod
+    def _indexar_nombres(indice_nombres, raices, directorios_prohibidos_config, walker, ruta_datos=None):
+        """
+        Recorre 'raices' con el ProjectWalker podando solo los directorios prohibidos y el de datos
+        ('ruta_datos') y registra todos sus archivos.
+        """
+        for raiz in raices:
+            for directorio, subdirs, archivos in walker.recorrer(raiz):
+                subdirs[:] = [d for d in subdirs if d.nombre not in directorios_prohibidos_config and d.ruta != ruta_datos]
+                FileProcessor._registrar_nombres(indice_nombres, directorio.ruta, (a.nombre for a in archivos))
+
+    @staticmethod
+    def _resolver_por_nombre(indice_nombres, archivo_esp):
+        """
+        Devuelve las rutas cuyo nombre coincide (sin distinguir mayúsculas) con el de 'archivo_esp'.
+        Si 'archivo_esp' incluye directorios, se usan para descartar candidatos que no terminen igual.
+        """
+        candidatos = list(indice_nombres.get(os.path.basename(archivo_esp).lower(), ()))
+        sufijo = os.path.normpath(archivo_esp).lower()
+        if len(candidatos) > 1 and os.sep in sufijo:
+            por_sufijo = [c for c in candidatos if c.lower().endswith(os.sep + sufijo)]
+            if por_sufijo:
+                candidatos = por_sufijo
+        return candidatos
+
+    @staticmethod
+    def _ruta_mostrada(archivo_path, ruta_base_proyecto, incluir_ruta, ruta_relativa=None):
+        """Nombre que aparece en las marcas START FILE/END FILE: ruta relativa o solo el nombre del archivo."""
+        if not incluir_ruta:
+            return os.path.basename(archivo_path)
+        if ruta_relativa is not None:
+            return ruta_relativa
+        try:
+            norm_archivo_path = os.path.normpath(archivo_path)
+            norm_ruta_base_proyecto = os.path.normpath(ruta_base_proyecto)
+
+            # Asegurarse que la ruta del archivo esté dentro de la ruta base del proyecto
+            # antes de calcular la ruta relativa.
+            if os.path.commonpath([norm_archivo_path, norm_ruta_base_proyecto]) == norm_ruta_base_proyecto:
+                return os.path.relpath(norm_archivo_path, start=norm_ruta_base_proyecto).replace("\\", "/")
+            # Si el archivo está fuera de la ruta_base_proyecto (ej. un archivo específico con ruta absoluta)
+            # mostrar solo el nombre del archivo como fallback.
+            return os.path.basename(norm_archivo_path) + " (fuera de ruta base)"
+        except ValueError:
+            return os.path.basename(archivo_path) + " (error al calcular ruta relativa)"
+
+    @staticmethod
+    def _buscar_salto(mm, salto, inicio, fin, bom, desde_final=False):
+        """
+        Posición del salto de línea 'salto' (ya codificado) en mm[inicio:fin], o -1.
+        En UTF-16/32 solo valen las posiciones alineadas con las unidades de código tras el BOM.
+        """
+        ancho = len(salto)
+        while True:
+            pos = mm.rfind(salto, inicio, fin) if desde_final else mm.find(salto, inicio, fin)
+            if pos == -1 or (pos - bom) % ancho == 0:
+                return pos
+            if desde_final:
+                fin = pos + ancho - 1
+            else:
+                inicio = pos + 1
+
+    @staticmethod
+    def _leer_extracto(f, tamano, nombre, opciones, muestra, codificacion=None, bom=0):
+        """
+        Emite solo las primeras 'lineas_inicio' y las últimas 'lineas_final' líneas de un archivo grande.
+        El archivo se mapea con mmap y solo se copian a memoria las dos partes del extracto;
+        entre ellas se inserta la marca:
+        --- TRUNCATED: <n> bytes omitted (<total> bytes, first <N> / last <M> lines shown) ---
+        Sin codificación detectada, la de las dos partes se decide con la muestra inicial.
+        """
+        if not codificacion:
+            codificacion = "utf-8" if es_utf8(muestra) else opciones.codificacion_alternativa
+        salto = "\n".encode(codificacion)
+        ancho = len(salto)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            fin_inicio = bom
+            limite_inicio = bom + MAX_BYTES_PARTE_EXTRACTO
+            for _ in range(opciones.lineas_inicio):
+                pos = FileProcessor._buscar_salto(mm, salto, fin_inicio, limite_inicio, bom)
+                if pos == -1:
+                    fin_inicio = limite_inicio
+                    break
+                fin_inicio = pos + ancho
+            fin_inicio = min(fin_inicio, tamano)
+
+            # El salto de línea final del archivo no abre una línea nueva
+            fin_busqueda = tamano - ancho if mm[tamano - ancho:tamano] == salto else tamano
+            inicio_final = tamano
+            limite_final = max(bom, tamano - MAX_BYTES_PARTE_EXTRACTO)
+            limite_final += -(limite_final - bom) % ancho
+            for _ in range(opciones.lineas_final):
+                pos = FileProcessor._buscar_salto(mm, salto, limite_final, fin_busqueda, bom, desde_final=True)
+                if pos == -1:
+                    inicio_final = limite_final
+                    break
+                inicio_final = pos + ancho
+                fin_busqueda = pos
+            inicio_final = max(inicio_final, fin_inicio)
+
+            inicio = decodificar(mm[bom:fin_inicio], codificacion)
+            final = decodificar(mm[inicio_final:], codificacion)
+        omitidos = inicio_final - fin_inicio
+        marca = (
+            f"--- TRUNCATED: {omitidos} bytes omitted ({tamano} bytes, "
+            f"first {opciones.lineas_inicio} / last {opciones.lineas_final} lines shown) ---"
+        )
+        if inicio and not inicio.endswith("\n"):
+            inicio += "\n"
+        return BloqueLeido(
+            f"\n--- START FILE: {nombre} ---\n{inicio}{marca}\n{final}\n--- END FILE: {nombre} ---\n",
+            bytes_evitados=omitidos,
+            extracto=True,
+            bytes_leidos=fin_inicio + tamano - inicio_final
+        )
+
+    @staticmethod
+    def _leer_archivo(archivo_path, ruta_base_proyecto, incluir_ruta, ruta_relativa=None, opciones=None): # ruta_base_proyecto para os.relpath
+        """
+        Lee un archivo y lo devuelve como BloqueLeido (bloque START FILE/END FILE).
+        Antes de leerlo entero se inspeccionan sus primeros bytes: los binarios, minificados
+        y generados se omiten o se listan solo por nombre según 'accion_no_texto'.
+        El contenido se decodifica una sola vez: según su BOM, como UTF-16 si lo parece, como UTF-8
+        si es válido y, si no, con 'opciones.codificacion_alternativa' (ver text_decoding).
+        Si su extensión está en 'opciones.compactar', el contenido pasa por compactor.compactar.
+        'ruta_relativa' evita recalcular la ruta mostrada si ya se conoce.
+        """
+        if opciones is None:
+            opciones = OPCIONES_LECTURA_POR_DEFECTO
+        try:
+            with open(archivo_path, "rb") as f:
+                muestra = f.read(TAMANO_MUESTRA)
+                if opciones.accion_no_texto != "incluir":
+                    motivo = clasificar(os.path.basename(archivo_path), muestra)
+                    if motivo:
+                        tamano = os.fstat(f.fileno()).st_size
+                        texto = ""
+                        if opciones.accion_no_texto == "listar":
+                            nombre = FileProcessor._ruta_mostrada(archivo_path, ruta_base_proyecto, incluir_ruta, ruta_relativa)
+                            texto = f"\n--- SKIPPED FILE: {nombre} ({motivo}, {tamano} bytes) ---\n"
+                        return BloqueLeido(texto, omitido=motivo, bytes_evitados=max(0, tamano - len(muestra)), bytes_leidos=len(muestra))
+                if opciones.umbral_grande:
+                    tamano = os.fstat(f.fileno()).st_size
+                    if tamano > opciones.umbral_grande:
+                        nombre = FileProcessor._ruta_mostrada(archivo_path, ruta_base_proyecto, incluir_ruta, ruta_relativa)
+                        leido = FileProcessor._leer_extracto(f, tamano, nombre, opciones, muestra, *detectar_codificacion(muestra))
+                        leido.bytes_leidos += len(muestra)
+                        return leido
+                datos = muestra + f.read()
+            codificacion, bom = detectar_codificacion(muestra)
+            contenido = decodificar(datos[bom:] if bom else datos, codificacion, opciones.codificacion_alternativa)
+            compactacion = None
+            if opciones.compactar:
+                extension = os.path.splitext(archivo_path)[1].lower()
+                if extension in opciones.compactar:
+                    antes = bytes_utf8(contenido)
+                    contenido = FileProcessor._compactar(lenguaje_de(extension), contenido)
+                    compactacion = (antes, bytes_utf8(contenido))
+            nombre = FileProcessor._ruta_mostrada(archivo_path, ruta_base_proyecto, incluir_ruta, ruta_relativa)
+            return BloqueLeido(
+                f"\n--- START FILE: {nombre} ---\n{contenido}\n--- END FILE: {nombre} ---\n",
+                huella=hashlib.blake2b(datos, digest_size=16).hexdigest(),
+                compactacion=compactacion,
+                bytes_leidos=len(datos)
+            )
         except Exception as e:
             print(f"Error leyendo archivo {archivo_path}: {str(e)}")
             try:
@@ -235,4 +797,4 @@ class FileProcessor:
                 relative_path_err = os.path.basename(archivo_path) + " (ruta no relativa)"
             except Exception:
                 relative_path_err = archivo_path
-            return f"\n--- ERROR READING FILE: {relative_path_err} ({str(e)}) ---\n"
\ No newline at end of file
+            return BloqueLeido(f"\n--- ERROR READING FILE: {relative_path_err} ({str(e)}) ---\n", error=True)
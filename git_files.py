@@ -0,0 +1,169 @@
+# git_files.py
+import os
+import struct
+import subprocess
+
+# Modos de entrada del índice de git que no son archivos del árbol de trabajo
+_MODO_SUBMODULO = 0o160000
+_MODO_DIRECTORIO = 0o040000
+
+
+class ArchivosGit:
+    """
+    Archivos versionados de un repositorio git bajo 'ruta_base', obtenidos con
+    'git ls-files' o, si git no está disponible, leyendo directamente .git/index.
+    Expone la misma interfaz listar() que TreeIndex, así que ProjectWalker los recorre
+    como un árbol y se aplican los mismos filtros que en el recorrido del disco.
+    """
+
+    def __init__(self, ruta_base, rutas_relativas):
+        self.ruta_base = os.path.normpath(ruta_base)
+        self.directorios = {}
+        for relativa in rutas_relativas:
+            # Archivos versionados pero borrados del árbol de trabajo
+            if os.path.isfile(os.path.join(self.ruta_base, relativa)):
+                self._agregar(relativa)
+        for entrada in self.directorios.values():
+            entrada["dirs"] = list(entrada["dirs"])
+
+    @classmethod
+    def desde_repositorio(cls, ruta_base):
+        """Devuelve el listado de archivos versionados o None si 'ruta_base' no está en un repositorio git."""
+        rutas = cls._listar_con_git(ruta_base)
+        if rutas is None:
+            rutas = cls._listar_desde_indice(ruta_base)
+        if rutas is None:
+            return None
+        return cls(ruta_base, rutas)
+
+    def _entrada(self, directorio):
+        entrada = self.directorios.get(directorio)
+        if entrada is None:
+            entrada = {"dirs": {}, "enlaces": (), "archivos": []}
+            self.directorios[directorio] = entrada
+        return entrada
+
+    def _agregar(self, relativa):
+        partes = relativa.split("/")
+        directorio = self.ruta_base
+        entrada = self._entrada(directorio)
+        for parte in partes[:-1]:
+            entrada["dirs"][parte] = None
+            directorio = os.path.join(directorio, parte)
+            entrada = self._entrada(directorio)
+        entrada["archivos"].append([partes[-1]])
+
+    def listar(self, directorio):
+        """Entrada {"dirs", "enlaces", "archivos"} de 'directorio' o None si no contiene archivos versionados."""
+        return self.directorios.get(os.path.normpath(directorio))
+
+    @staticmethod
+    def _listar_con_git(ruta_base):
+        """Rutas (relativas a ruta_base, con '/') de 'git ls-files', o None si git falla."""
+        try:
+            resultado = subprocess.run(
+                ["git", "-C", ruta_base, "ls-files", "-z", "--stage"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                timeout=60,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+            )
+        except (OSError, subprocess.SubprocessError):
+            return None
+        if resultado.returncode != 0:
+            return None
+        rutas = []
+        for registro in resultado.stdout.split(b"\0"):
+            if not registro:
+                continue
+            # "<modo> <objeto> <etapa>\t<ruta>"
+            cabecera, _, ruta = registro.partition(b"\t")
+            modo, _, resto = cabecera.partition(b" ")
+            etapa = resto.rpartition(b" ")[2]
+            if int(modo, 8) == _MODO_SUBMODULO or etapa not in (b"0", b"1"):
+                continue
+            rutas.append(os.fsdecode(ruta))
+        # En conflictos la etapa 1 puede repetir rutas
+        return list(dict.fromkeys(rutas))
+
+    @staticmethod
+    def _directorio_git(raiz):
+        """Directorio de datos de git de 'raiz' (admite el archivo .git de worktrees y submódulos)."""
+        ruta_git = os.path.join(raiz, ".git")
+        if os.path.isdir(ruta_git):
+            return ruta_git
+        try:
+            with open(ruta_git, "r", encoding="utf-8") as f:
+                contenido = f.read().strip()
+        except OSError:
+            return None
+        if not contenido.startswith("gitdir:"):
+            return None
+        return os.path.normpath(os.path.join(raiz, contenido[len("gitdir:"):].strip()))
+
+    @classmethod
+    def _listar_desde_indice(cls, ruta_base):
+        """Rutas versionadas leídas de .git/index (versiones 2, 3 y 4), o None si no hay repositorio."""
+        ruta_base = os.path.abspath(ruta_base)
+        raiz = ruta_base
+        while not os.path.exists(os.path.join(raiz, ".git")):
+            padre = os.path.dirname(raiz)
+            if padre == raiz:
+                return None
+            raiz = padre
+        directorio_git = cls._directorio_git(raiz)
+        if directorio_git is None:
+            return None
+        try:
+            with open(os.path.join(directorio_git, "index"), "rb") as f:
+                datos = f.read()
+            rutas = cls._parsear_indice(datos)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"[Advertencia] No se pudo leer el índice de git de {raiz}: {e}")
+            return None
+
+        prefijo = os.path.relpath(ruta_base, raiz).replace(os.sep, "/")
+        if prefijo == ".":
+            return rutas
+        prefijo += "/"
+        return [r[len(prefijo):] for r in rutas if r.startswith(prefijo)]
+
+    @staticmethod
+    def _parsear_indice(datos):
+        firma, version, total = struct.unpack_from(">4sII", datos, 0)
+        if firma != b"DIRC" or version not in (2, 3, 4):
+            raise ValueError(f"formato de índice no soportado (versión {version})")
+        rutas = []
+        pos = 12
+        anterior = b""
+        for _ in range(total):
+            inicio = pos
+            modo = struct.unpack_from(">I", datos, pos + 24)[0]
+            flags = struct.unpack_from(">H", datos, pos + 60)[0]
+            pos += 62
+            if version >= 3 and flags & 0x4000:
+                pos += 2 # flags extendidos
+            if version == 4:
+                # Ruta comprimida respecto a la anterior: bytes a quitar (varint) + sufijo terminado en NUL
+                c = datos[pos]
+                pos += 1
+                quitar = c & 0x7F
+                while c & 0x80:
+                    c = datos[pos]
+                    pos += 1
+                    quitar = ((quitar + 1) << 7) | (c & 0x7F)
+                fin = datos.index(b"\0", pos)
+                ruta = anterior[:len(anterior) - quitar] + datos[pos:fin]
+                pos = fin + 1
+            else:
+                fin = datos.index(b"\0", pos)
+                ruta = datos[pos:fin]
+                # Entradas alineadas a 8 bytes con al menos un NUL de relleno
+                pos = inicio + ((fin - inicio + 8) // 8) * 8
+            anterior = ruta
+            etapa = (flags >> 12) & 0x3
+            tipo = modo & 0o170000
+            if etapa > 1 or tipo in (_MODO_SUBMODULO, _MODO_DIRECTORIO):
+                continue
+            rutas.append(os.fsdecode(ruta))
+        return list(dict.fromkeys(rutas))
@@ -0,0 +1,211 @@
+# gitignore_matcher.py
+import os
+import re
+
+
+def _traducir(patron):
+    """Traduce un patrón de .gitignore (sin '!' ni '/' final) a una expresión regular sin grupos de captura."""
+    partes = []
+    i, n = 0, len(patron)
+    while i < n:
+        c = patron[i]
+        if c == "*":
+            if patron.startswith("**", i) and (i == 0 or patron[i - 1] == "/"):
+                j = i + 2
+                if j == n:
+                    partes.append(".*")
+                    i = j
+                    continue
+                if patron[j] == "/":
+                    partes.append("(?:.*/)?")
+                    i = j + 1
+                    continue
+            partes.append("[^/]*")
+        elif c == "?":
+            partes.append("[^/]")
+        elif c == "[":
+            j = i + 1
+            if j < n and patron[j] in "!^":
+                j += 1
+            if j < n and patron[j] == "]":
+                j += 1
+            while j < n and patron[j] != "]":
+                j += 1
+            if j >= n:
+                partes.append(re.escape(c))
+            else:
+                contenido = patron[i + 1:j]
+                prefijo = ""
+                if contenido[0] in "!^":
+                    prefijo, contenido = "^", contenido[1:]
+                contenido = "".join("\\" + ch if ch in "\\[]^&~|" else ch for ch in contenido)
+                partes.append(f"(?!/)[{prefijo}{contenido}]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            partes.append(re.escape(patron[i + 1]))
+            i += 1
+        else:
+            partes.append(re.escape(c))
+        i += 1
+    return "".join(partes)
+
+
+class ReglasGitignore:
+    """
+    Reglas de un archivo .gitignore compiladas en dos expresiones regulares (una para
+    directorios y otra para archivos). Las alternativas se ordenan de la última regla a la
+    primera, de modo que la primera alternativa que encaja es la regla que manda en git.
+    """
+
+    def __init__(self, reglas):
+        # reglas: lista de (regex, negada, solo_directorios) en el orden del archivo
+        self._regex_dirs, self._negadas_dirs = self._combinar(reglas)
+        self._regex_archivos, self._negadas_archivos = self._combinar([r for r in reglas if not r[2]])
+
+    @staticmethod
+    def _combinar(reglas):
+        if not reglas:
+            return None, ()
+        invertidas = reglas[::-1]
+        flags = re.DOTALL | (re.IGNORECASE if os.name == "nt" else 0)
+        regex = re.compile("|".join(f"({r[0]})" for r in invertidas), flags)
+        return regex, tuple(r[1] for r in invertidas)
+
+    @classmethod
+    def desde_texto(cls, texto):
+        reglas = []
+        for linea in texto.splitlines():
+            if not linea or linea.startswith("#"):
+                continue
+            # Los espacios finales se ignoran salvo que estén escapados
+            while linea.endswith(" ") and not linea.endswith("\\ "):
+                linea = linea[:-1]
+            negada = linea.startswith("!")
+            if negada:
+                linea = linea[1:]
+            solo_directorios = linea.endswith("/")
+            if solo_directorios:
+                linea = linea[:-1]
+            if not linea:
+                continue
+            # Con una '/' al principio o en medio, el patrón es relativo al directorio del .gitignore
+            anclada = "/" in linea
+            regex = _traducir(linea.lstrip("/"))
+            if not anclada:
+                regex = "(?:.*/)?" + regex
+            reglas.append((regex, negada, solo_directorios))
+        return cls(reglas)
+
+    def evaluar(self, relativa, es_directorio):
+        """True si la ruta (relativa al .gitignore, con '/') queda ignorada, False si se reincluye, None si no aplica."""
+        if es_directorio:
+            regex, negadas = self._regex_dirs, self._negadas_dirs
+        else:
+            regex, negadas = self._regex_archivos, self._negadas_archivos
+        if regex is None:
+            return None
+        coincidencia = regex.fullmatch(relativa)
+        if coincidencia is None:
+            return None
+        return not negadas[coincidencia.lastindex - 1]
+
+
+class GitignoreMatcher:
+    """
+    Aplica los .gitignore anidados durante el recorrido del proyecto. Cada directorio hereda
+    la cadena de reglas de su padre y añade la de su propio .gitignore; los directorios
+    ignorados se podan y no se recorren. También se aplican .git/info/exclude y los
+    .gitignore de los directorios superiores hasta la raíz del repositorio.
+    """
+    _compiladas = {}
+
+    def __init__(self):
+        # Ruta de directorio -> tupla de (directorio_del_gitignore, ReglasGitignore)
+        self._cadenas = {}
+
+    @classmethod
+    def _cargar(cls, ruta):
+        """Reglas del archivo 'ruta', compiladas una vez por versión (mtime y tamaño) del archivo."""
+        try:
+            st = os.stat(ruta)
+        except OSError:
+            return None
+        clave = (ruta, st.st_mtime_ns, st.st_size)
+        reglas = cls._compiladas.get(clave)
+        if reglas is None:
+            try:
+                with open(ruta, "r", encoding="utf-8", errors="ignore") as f:
+                    reglas = ReglasGitignore.desde_texto(f.read())
+            except OSError as e:
+                print(f"[Advertencia] No se pudo leer {ruta}: {e}")
+                return None
+            cls._compiladas[clave] = reglas
+        return reglas
+
+    @staticmethod
+    def _raiz_repositorio(directorio):
+        actual = directorio
+        while True:
+            if os.path.exists(os.path.join(actual, ".git")):
+                return actual
+            padre = os.path.dirname(actual)
+            if padre == actual:
+                return None
+            actual = padre
+
+    def _cadena_inicial(self, directorio):
+        """Reglas que afectan a 'directorio' procedentes de sus antecesores dentro del repositorio."""
+        raiz = self._raiz_repositorio(directorio)
+        if raiz is None:
+            return ()
+        cadena = []
+        reglas = self._cargar(os.path.join(raiz, ".git", "info", "exclude"))
+        if reglas:
+            cadena.append((raiz, reglas))
+        antecesores = []
+        actual = os.path.dirname(directorio) if directorio != raiz else None
+        while actual and len(actual) >= len(raiz):
+            antecesores.append(actual)
+            if actual == raiz:
+                break
+            actual = os.path.dirname(actual)
+        for antecesor in reversed(antecesores):
+            reglas = self._cargar(os.path.join(antecesor, ".gitignore"))
+            if reglas:
+                cadena.append((antecesor, reglas))
+        return tuple(cadena)
+
+    @staticmethod
+    def _ignorado(cadena, ruta, es_directorio):
+        # El .gitignore más profundo tiene prioridad sobre los de sus antecesores
+        for directorio, reglas in reversed(cadena):
+            relativa = ruta[len(directorio) + 1:]
+            if os.sep != "/":
+                relativa = relativa.replace(os.sep, "/")
+            resultado = reglas.evaluar(relativa, es_directorio)
+            if resultado is not None:
+                return resultado
+        return False
+
+    def filtrar(self, directorio, subdirs, archivos):
+        """
+        Devuelve (subdirs, archivos) de 'directorio' sin lo ignorado. Las entradas solo
+        necesitan los atributos 'nombre' y 'ruta' (EntradaDirectorio / EntradaArchivo).
+        """
+        cadena = self._cadenas.pop(directorio, None)
+        if cadena is None:
+            cadena = self._cadena_inicial(directorio)
+        if any(a.nombre == ".gitignore" for a in archivos):
+            reglas = self._cargar(os.path.join(directorio, ".gitignore"))
+            if reglas:
+                cadena = cadena + ((directorio, reglas),)
+
+        subdirs = [
+            d for d in subdirs
+            if d.nombre != ".git" and not self._ignorado(cadena, d.ruta, True)
+        ]
+        for d in subdirs:
+            self._cadenas[d.ruta] = cadena
+        if cadena:
+            archivos = [a for a in archivos if not self._ignorado(cadena, a.ruta, False)]
+        return subdirs, archivos
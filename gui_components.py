@@ -122,4 +122,58 @@ class ProjectSelector:
         self.combobox["values"] = proyectos
 
     def set_selected(self, project):
-        self.combobox.set(project)
\ No newline at end of file
+        self.combobox.set(project)
+
+
+class PreviewDialog:
+    """Ventana con el resumen de la vista previa y los archivos que más tokens aportan"""
+    def __init__(self, parent, style_manager, titulo, resumen, filas):
+        self.style_manager = style_manager
+        self.window = tk.Toplevel(parent)
+        self.window.title(titulo)
+        self.window.configure(background=style_manager.colores['fondo_paneles'])
+        self.window.transient(parent)
+        self.window.geometry("900x600")
+
+        self._create_widgets(resumen, filas)
+        self._setup_layout()
+
+    def _create_widgets(self, resumen, filas):
+        self.resumen_text = ScrolledText(self.window, self.style_manager, height=7)
+        self.resumen_text.insert(resumen)
+        self.resumen_text.text_widget.config(state=tk.DISABLED)
+
+        self.tabla_frame = ttk.Frame(self.window)
+        self.tabla = ttk.Treeview(
+            self.tabla_frame,
+            columns=("ruta", "kb", "tokens"),
+            show="headings"
+        )
+        self.tabla.heading("ruta", text="Archivo")
+        self.tabla.heading("kb", text="KB")
+        self.tabla.heading("tokens", text="Tokens (est.)")
+        self.tabla.column("ruta", width=600, anchor=tk.W)
+        self.tabla.column("kb", width=100, anchor=tk.E)
+        self.tabla.column("tokens", width=120, anchor=tk.E)
+        for fila in filas:
+            self.tabla.insert("", tk.END, values=fila)
+        self.scrollbar = ttk.Scrollbar(
+            self.tabla_frame,
+            style='Vertical.TScrollbar',
+            command=self.tabla.yview
+        )
+        self.tabla.config(yscrollcommand=self.scrollbar.set)
+
+        self.close_btn = ttk.Button(
+            self.window,
+            text="Cerrar",
+            command=self.window.destroy,
+            style='TButton'
+        )
+
+    def _setup_layout(self):
+        self.resumen_text.frame.pack(fill=tk.X, padx=10, pady=(10, 5))
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tabla.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tabla_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.close_btn.pack(pady=(5, 10))
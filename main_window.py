@@ -7,13 +7,21 @@ from gui_components import (
     ScrolledText,
     CustomButton,
     LabeledEntry,
-    ProjectSelector
+    ProjectSelector,
+    PreviewDialog
 )
 from gui_styles import StyleManager
 from file_generator import FileGenerator
+from clipboard_backends import crear_portapapeles
+from project_watcher import VigilanteProyecto
+from context_builder import cabecera_contexto
+from context_worker import DESTINOS_CONTEXTO, TrabajoContexto, TrabajoVistaPrevia
 import time # Necesario si usamos time.sleep, aunque no directamente aquí
 
 class MainWindow:
+    INTERVALO_PROGRESO_MS = 100 # Cada cuánto se consulta el progreso de la generación
+    MAX_FILAS_VISTA_PREVIA = 200 # Archivos con más tokens listados en la vista previa
+
     def __init__(self, root, config_handler, file_processor):
         self.root = root
         self.config_handler = config_handler
@@ -23,7 +31,16 @@ class MainWindow:
         self.solo_archivos_especificos_var = tk.BooleanVar(value=False)
         self.generador_activo_var = tk.BooleanVar(value=False)
         self.solo_consulta_var = tk.BooleanVar(value=False) # Mantenido como estaba
+        self.solo_cambios_var = tk.BooleanVar(value=False) # Solo archivos cambiados desde la última copia
+        self.vigilar_var = tk.BooleanVar(value=False) # Mantener el contexto precalculado vigilando la ruta base
         self.file_generator = None
+        self.huella_ultima_copia = None # Huella del último texto copiado (el generador lo ignora)
+        self.vigilante = None
+        self.trabajo_copia = None # TrabajoContexto en curso
+        self.trabajo_vista_previa = None # TrabajoVistaPrevia en curso
+        self.destino_var = tk.StringVar(value="portapapeles") # Portapapeles, archivo o partes
+        self.partes_contexto = [] # Partes de la última copia dividida
+        self.parte_siguiente = 0 # Índice de la próxima parte a copiar
 
         screen_width = self.root.winfo_screenwidth()
         screen_height = self.root.winfo_screenheight()
@@ -126,6 +143,21 @@ class MainWindow:
             style='TCheckbutton'
         ).pack(side=tk.LEFT, padx=(0, 15), anchor=tk.W)
 
+        ttk.Checkbutton(
+            options_frame,
+            text="Solo cambios",
+            variable=self.solo_cambios_var,
+            style='TCheckbutton'
+        ).pack(side=tk.LEFT, padx=(0, 15), anchor=tk.W)
+
+        ttk.Checkbutton(
+            options_frame,
+            text="Vigilar cambios",
+            variable=self.vigilar_var,
+            command=self._toggle_vigilancia,
+            style='TCheckbutton'
+        ).pack(side=tk.LEFT, padx=(0, 15), anchor=tk.W)
+
         ttk.Checkbutton(
             options_frame,
             text="Generador de archivos",
@@ -159,6 +191,49 @@ class MainWindow:
         )
         self.btn_limpiar_solicitud.button.grid(row=0, column=2, pady=10, padx=5, ipady=5, sticky="ew")
 
+        # --- Destino del contexto y copia de partes ---
+        destino_frame = ttk.Frame(action_button_frame, style='TFrame')
+        destino_frame.grid(row=0, column=0, pady=10, padx=5, sticky="ew")
+        ttk.Label(destino_frame, text="Destino:").pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Combobox(
+            destino_frame,
+            textvariable=self.destino_var,
+            values=DESTINOS_CONTEXTO,
+            state="readonly",
+            width=14
+        ).pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        self.btn_siguiente_parte = CustomButton(
+            action_button_frame,
+            self.style_manager,
+            "⎘ Copiar Parte",
+            self._copiar_siguiente_parte
+        )
+        self.btn_siguiente_parte.button.grid(row=2, column=1, pady=(0, 10), padx=5, ipady=5, sticky="ew")
+        self.btn_siguiente_parte.button.grid_remove()
+
+        # --- Progreso de la generación (visible solo mientras se genera) ---
+        self.progreso_var = tk.DoubleVar(value=0)
+        self.progreso_texto_var = tk.StringVar(value="")
+        self.progreso_frame = ttk.Frame(action_button_frame, style='TFrame')
+        self.progreso_frame.grid(row=1, column=0, columnspan=3, sticky="ew")
+        self.progreso_frame.grid_columnconfigure(0, weight=1)
+        ttk.Progressbar(
+            self.progreso_frame,
+            variable=self.progreso_var,
+            maximum=100,
+            mode="determinate"
+        ).grid(row=0, column=0, sticky="ew", padx=5)
+        self.btn_cancelar = CustomButton(
+            self.progreso_frame,
+            self.style_manager,
+            "✖ Cancelar",
+            self._cancelar_copia
+        )
+        self.btn_cancelar.button.grid(row=0, column=1, padx=5)
+        ttk.Label(self.progreso_frame, textvariable=self.progreso_texto_var).grid(row=1, column=0, columnspan=2, sticky="w", padx=5)
+        self.progreso_frame.grid_remove()
+
 
     def _create_left_panel_widgets(self):
         ttk.Label(self.left_panel, text="CONFIGURACIÓN AVANZADA").pack(pady=(0, 15), anchor=tk.W)
@@ -206,6 +281,15 @@ class MainWindow:
         )
         self.formatos_prohibidos_component.frame.pack(fill=tk.X, pady=5)
 
+        # Comprueba los filtros sin leer archivos ni tocar el portapapeles
+        self.btn_vista_previa = CustomButton(
+            self.left_panel,
+            self.style_manager,
+            "🔍 Vista Previa",
+            self._vista_previa
+        )
+        self.btn_vista_previa.pack(fill=tk.X, pady=(10, 0))
+
 
     def _cargar_proyectos(self):
         """Carga la lista de proyectos (ordenada por uso) y selecciona el actual."""
@@ -234,6 +318,8 @@ class MainWindow:
         if self.file_generator and self.file_generator.is_alive():
             self.generador_activo_var.set(False)
             self._toggle_generador_archivos()
+        # La vigilancia es de un proyecto concreto: se detiene al cambiar de proyecto
+        self._detener_vigilancia()
 
         try:
             config = self.config_handler.get_project_config(proyecto)
@@ -258,11 +344,18 @@ class MainWindow:
             self.solo_archivos_especificos_var.set(config.get("solo_archivos_especificos", False))
             self.solicitud_text.delete()
             self.solo_consulta_var.set(False)
+            self.solo_cambios_var.set(False)
+            self.vigilar_var.set(config.get("vigilar_cambios", False))
+            destino = config.get("destino_contexto", "portapapeles")
+            self.destino_var.set(destino if destino in DESTINOS_CONTEXTO else "portapapeles")
+            self._olvidar_partes()
 
             if update_timestamp:
                 self.config_handler.set_current_project(proyecto)
 
             self.current_project = proyecto
+            if self.vigilar_var.get():
+                self._iniciar_vigilancia(proyecto)
 
         except Exception as e:
             messagebox.showerror("Error Cargando Configuración", f"Error al cargar '{proyecto}': {str(e)}")
@@ -306,6 +399,11 @@ class MainWindow:
         self.solo_archivos_especificos_var.set(False)
         self.incluir_ruta_var.set(True)
         self.solo_consulta_var.set(False)
+        self.solo_cambios_var.set(False)
+        self._detener_vigilancia()
+        self.vigilar_var.set(False)
+        self.destino_var.set("portapapeles")
+        self._olvidar_partes()
         if limpiar_proyecto_actual:
             self.project_selector.set_selected("")
             self.current_project = None
@@ -323,7 +421,9 @@ class MainWindow:
             self.ruta_base_component.set(os.path.normpath(ruta))
 
     def _ejecutar_copia(self):
-        """Recopila configuración, procesa archivos, copia al portapapeles y guarda."""
+        """Recopila configuración y genera el contexto en segundo plano; al terminar se copia y guarda."""
+        if self.trabajo_copia:
+            return
         proyecto_actual = self.project_selector.get_selected()
         if not proyecto_actual:
             messagebox.showerror("Error", "Selecciona o crea un proyecto primero.")
@@ -334,9 +434,240 @@ class MainWindow:
             messagebox.showerror("Error", "La Ruta Base del Proyecto no es válida o no existe.")
             return
 
+        config_data = self._recopilar_config_proyecto(proyecto_actual)
+        incluir_ruta = self.incluir_ruta_var.get()
+        directorio_datos = self.config_handler.get_project_data_dir(proyecto_actual)
+        destino = config_data["destino_contexto"]
+        # Relativa al directorio de datos del proyecto, que el recorrido nunca incluye (aunque esté dentro de la ruta base)
+        ruta_salida = os.path.join(directorio_datos, os.path.expanduser(config_data.get("archivo_salida") or "contexto.txt"))
+        try:
+            tamano_parte_kb = int(config_data.get("tamano_parte_kb", 400))
+        except (TypeError, ValueError):
+            tamano_parte_kb = 0
+        if destino == "partes" and tamano_parte_kb <= 0:
+            print(f"[Advertencia] 'tamano_parte_kb' no válido ({config_data.get('tamano_parte_kb')}). Se usan 400 KB.")
+            tamano_parte_kb = 400
+        self._olvidar_partes()
+        # Los valores de Tk se leen aquí: el hilo de trabajo no toca la interfaz
+        cabecera = cabecera_contexto(
+            config_data['prompt'],
+            self.solicitud_text.get().strip(),
+            incluir_ruta,
+            self.solo_consulta_var.get()
+        )
+        # "solo_cambios" es un modo de la sesión: se usa para procesar pero no se guarda
+        self.trabajo_copia = TrabajoContexto(
+            proyecto_actual,
+            dict(config_data, solo_cambios=self.solo_cambios_var.get()),
+            incluir_ruta,
+            directorio_datos,
+            cabecera,
+            self.vigilante,
+            destino=destino,
+            ruta_salida=ruta_salida,
+            max_bytes_parte=tamano_parte_kb * 1024
+        )
+        self.trabajo_copia.start()
+        self._mostrar_progreso(True)
+        self.root.after(self.INTERVALO_PROGRESO_MS, self._sondear_copia)
+
+    def _vista_previa(self):
+        """Muestra qué archivos incluirían los filtros actuales, con tamaños y tokens estimados, sin leerlos."""
+        if self.trabajo_vista_previa:
+            return
+        proyecto_actual = self.project_selector.get_selected()
+        if not proyecto_actual:
+            messagebox.showerror("Error", "Selecciona o crea un proyecto primero.")
+            return
+        ruta_base = self.ruta_base_component.get().strip()
+        if not ruta_base or not os.path.isdir(ruta_base):
+            messagebox.showerror("Error", "La Ruta Base del Proyecto no es válida o no existe.")
+            return
+
+        # Se usan los campos actuales sin guardarlos: la configuración solo se guarda al copiar
+        self.trabajo_vista_previa = TrabajoVistaPrevia(
+            proyecto_actual,
+            self._recopilar_config_proyecto(proyecto_actual),
+            self.config_handler.get_project_data_dir(proyecto_actual)
+        )
+        self.trabajo_vista_previa.start()
+        self.btn_vista_previa.button.state(["disabled"])
+        self.root.after(self.INTERVALO_PROGRESO_MS, self._sondear_vista_previa)
+
+    def _sondear_vista_previa(self):
+        trabajo = self.trabajo_vista_previa
+        if trabajo is None:
+            return
+        if trabajo.is_alive():
+            self.root.after(self.INTERVALO_PROGRESO_MS, self._sondear_vista_previa)
+            return
+        self.trabajo_vista_previa = None
+        self.btn_vista_previa.button.state(["!disabled"])
+        if trabajo.error is not None:
+            messagebox.showerror("Error en Vista Previa", f"No se pudo calcular la vista previa:\n{trabajo.error}")
+            return
+        if trabajo.cancelado:
+            return
+        vista = trabajo.vista
+        resumen = vista.resumen() + "\n" + vista.metricas.resumen(vista.metricas.registro())
+        filas = [
+            (archivo.ruta + (" (extracto)" if archivo.extracto else ""), f"{archivo.bytes / 1024:.1f}", archivo.tokens)
+            for archivo in vista.mayores(self.MAX_FILAS_VISTA_PREVIA)
+        ]
+        PreviewDialog(self.root, self.style_manager, f"Vista Previa - {trabajo.proyecto}", resumen, filas)
+
+    def _mostrar_progreso(self, visible):
+        if visible:
+            self.btn_copiar.button.state(["disabled"])
+            self.progreso_var.set(0)
+            self.progreso_texto_var.set("Recorriendo...")
+            self.progreso_frame.grid()
+        else:
+            self.btn_copiar.button.state(["!disabled"])
+            self.progreso_frame.grid_remove()
+
+    def _cancelar_copia(self):
+        if self.trabajo_copia:
+            self.progreso_texto_var.set("Cancelando...")
+            self.trabajo_copia.cancelar()
+
+    def _sondear_copia(self):
+        """Actualiza la barra de progreso hasta que el hilo de trabajo termina."""
+        trabajo = self.trabajo_copia
+        if trabajo is None:
+            return
+        if trabajo.is_alive():
+            if not trabajo.informe.metricas.cancelada:
+                progreso = trabajo.progreso()
+                coincidentes = progreso["archivos_coincidentes"]
+                # El total no se conoce hasta terminar el recorrido: la barra mide lo leído de lo ya encontrado
+                self.progreso_var.set(100 * progreso["archivos_leidos"] / coincidentes if coincidentes else 0)
+                self.progreso_texto_var.set(
+                    f"{progreso['archivos_vistos']} archivos revisados, {coincidentes} incluidos, "
+                    f"{progreso['archivos_leidos']} leídos ({progreso['bytes_leidos'] / (1024 * 1024):.1f} MB)"
+                )
+            self.root.after(self.INTERVALO_PROGRESO_MS, self._sondear_copia)
+            return
+        self.trabajo_copia = None
+        self._mostrar_progreso(False)
+        self._finalizar_copia(trabajo)
+
+    def _finalizar_copia(self, trabajo):
+        """Parte final de la copia, en el hilo de Tk: portapapeles (o aviso del archivo), guardado y diálogos."""
+        if trabajo.cancelado:
+            print("[GUI] Generación del contexto cancelada.")
+            return
+        if trabajo.error is not None:
+            messagebox.showerror("Error Crítico en Procesamiento", f"Se produjo un error inesperado al procesar los archivos:\n{str(trabajo.error)}")
+            return
+
+        proyecto_actual = trabajo.proyecto
+        config_data = {clave: valor for clave, valor in trabajo.config.items() if clave != "solo_cambios"}
+        informe = trabajo.informe
+        no_encontrados = informe.archivos_no_encontrados
+
+        if not trabajo.hay_contenido:
+            if no_encontrados:
+                messagebox.showwarning("Archivos No Encontrados", "No se generó contenido.\nArchivos específicos no encontrados:\n- " + "\n- ".join(no_encontrados))
+            elif informe.solo_cambios and informe.archivos_sin_cambios:
+                messagebox.showinfo("Sin Cambios", "No hay archivos nuevos, modificados ni borrados desde la última copia.")
+            else:
+                messagebox.showwarning("Sin Contenido", "No se encontró ningún archivo que coincidiera con los filtros aplicados.")
+            return
+
+        try:
+            if trabajo.destino == "archivo":
+                mensaje = f"Contexto guardado en:\n{trabajo.ruta_salida}\n\nConfiguración guardada."
+            elif trabajo.destino == "partes":
+                self.partes_contexto = trabajo.partes
+                with informe.metricas.medir("portapapeles"):
+                    self._copiar_parte()
+                mensaje = (
+                    f"Contexto dividido en {len(trabajo.partes)} partes en:\n{os.path.dirname(trabajo.partes[0])}\n\n"
+                    f"Parte 1/{len(trabajo.partes)} copiada al portapapeles y configuración guardada."
+                )
+                if len(trabajo.partes) > 1:
+                    mensaje += " Usa \"Copiar Parte\" para copiar las siguientes."
+            else:
+                with informe.metricas.medir("portapapeles"):
+                    self._copiar_al_portapapeles(trabajo.contenido)
+                mensaje = "Contenido copiado y configuración guardada."
+            if informe.seguimiento_cambios:
+                informe.seguimiento_cambios.guardar()
+            self.config_handler.save_project_config(proyecto_actual, config_data)
+            if self.vigilante:
+                # Los campos pudieron cambiar: el contexto vigilado pasa a ser el de esta copia
+                if self.vigilante.ruta_base != os.path.normpath(config_data["ruta_base"]):
+                    self._iniciar_vigilancia(proyecto_actual)
+                else:
+                    self.vigilante.actualizar_config(config_data, trabajo.incluir_ruta)
+            if config_data.get("registro_metricas"):
+                informe.metricas.anexar_jsonl(
+                    os.path.join(self.config_handler.get_project_data_dir(proyecto_actual), "metricas.jsonl"),
+                    informe.registro_metricas(proyecto=proyecto_actual, origen="gui", precalculado=trabajo.precalculado)
+                )
+
+            if no_encontrados:
+                mensaje += "\n\nArchivos específicos no encontrados:\n- " + "\n- ".join(no_encontrados)
+            for resumen in (informe.resumen_cambios(), informe.resumen_omitidos(), informe.resumen_extractos(), informe.resumen_compactacion(), informe.resumen_duplicados(), informe.resumen_presupuesto(), informe.resumen_metricas()):
+                if resumen:
+                    mensaje += "\n\n" + resumen
+            messagebox.showinfo("Operación Exitosa", mensaje)
+
+        except pyperclip.PyperclipException as clip_error:
+            messagebox.showerror("Error Copiando", f"No se pudo copiar al portapapeles: {clip_error}")
+        except Exception as save_error:
+            messagebox.showerror("Error Guardando", f"Contenido generado, pero hubo un error al guardar la configuración: {save_error}")
+
+    def _copiar_parte(self):
+        """Copia al portapapeles la siguiente parte de la última copia dividida y avanza."""
+        ruta = self.partes_contexto[self.parte_siguiente]
+        with open(ruta, "r", encoding="utf-8", newline="") as f:
+            self._copiar_al_portapapeles(f.read())
+        self.parte_siguiente += 1
+        print(f"[GUI] Parte {self.parte_siguiente}/{len(self.partes_contexto)} copiada: {ruta}")
+        if self.parte_siguiente < len(self.partes_contexto):
+            self.btn_siguiente_parte.button.configure(
+                text=f"⎘ Copiar Parte {self.parte_siguiente + 1}/{len(self.partes_contexto)}"
+            )
+            self.btn_siguiente_parte.button.grid()
+        else:
+            self.btn_siguiente_parte.button.grid_remove()
+
+    def _copiar_al_portapapeles(self, texto):
+        """Copia 'texto' avisando antes al generador de archivos para que no lo escriba sobre el proyecto."""
+        self.huella_ultima_copia = FileGenerator.huella(texto)
+        if self.file_generator:
+            self.file_generator.ignorar(self.huella_ultima_copia)
+        pyperclip.copy(texto)
+
+    def _copiar_siguiente_parte(self):
+        if self.parte_siguiente >= len(self.partes_contexto):
+            return
+        try:
+            self._copiar_parte()
+        except pyperclip.PyperclipException as clip_error:
+            messagebox.showerror("Error Copiando", f"No se pudo copiar al portapapeles: {clip_error}")
+        except OSError as e:
+            messagebox.showerror("Error Leyendo Parte", f"No se pudo leer la parte: {e}")
+            self._olvidar_partes()
+
+    def _olvidar_partes(self):
+        self.partes_contexto = []
+        self.parte_siguiente = 0
+        self.btn_siguiente_parte.button.grid_remove()
+
+
+    def _recopilar_config_proyecto(self, proyecto):
+        """Configuración del proyecto con los valores actuales de los campos de la GUI."""
+        # Partir de la configuración guardada para conservar las opciones avanzadas
+        # que no tienen campo en la GUI (p. ej. "hilos_lectura").
+        config_data = dict(self.config_handler.PROJECT_DEFAULTS)
+        config_data.update(self.config_handler.get_project_config(proyecto) or {})
+
         # --- Cambio: Guardar usando la clave "patrones" ---
-        config_data = {
-            "ruta_base": ruta_base,
+        config_data.update({
+            "ruta_base": self.ruta_base_component.get().strip(),
             "directorio_principal": self.directorio_principal_component.get().strip(),
             "archivos": ",".join([a.strip() for a in self.archivos_text.get().split(',') if a.strip()]),
             "directorios_prohibidos": self.directorios_prohibidos_text.get().strip(),
@@ -344,82 +675,46 @@ class MainWindow:
             "formatos_prohibidos": self.formatos_prohibidos_component.get().strip(),
             "prompt": self.prompt_text.get().strip(),
             "patrones": self.patron_component.get().strip(), # <<< GUARDAR VALOR COMO "patrones" AQUÍ
-            "solo_archivos_especificos": self.solo_archivos_especificos_var.get()
-        }
+            "solo_archivos_especificos": self.solo_archivos_especificos_var.get(),
+            "vigilar_cambios": self.vigilar_var.get(),
+            "destino_contexto": self.destino_var.get()
+        })
         # --- Fin Cambio ---
+        return config_data
+
+    def _iniciar_vigilancia(self, proyecto):
+        """Arranca la vigilancia de la ruta base del proyecto con la configuración de la GUI."""
+        self._detener_vigilancia()
+        config_data = self._recopilar_config_proyecto(proyecto)
+        if not config_data["ruta_base"] or not os.path.isdir(config_data["ruta_base"]):
+            print(f"[Vigilancia] Ruta base no válida para '{proyecto}'; no se vigila.")
+            return False
+        self.vigilante = VigilanteProyecto(
+            config_data,
+            self.incluir_ruta_var.get(),
+            self.config_handler.get_project_data_dir(proyecto)
+        )
+        self.vigilante.start()
+        return True
 
-        try:
-            contenido, no_encontrados = self.file_processor.procesar_archivos(
-                config_data,
-                self.incluir_ruta_var.get()
-            )
-
-            if not contenido and not no_encontrados:
-                messagebox.showwarning("Sin Contenido", "No se encontró ningún archivo que coincidiera con los filtros aplicados.")
-                return
-
-            if contenido:
-                prompt_text = config_data['prompt']
-                solicitud_text = self.solicitud_text.get().strip()
-
-                # --- INICIO: Leer instrucciones adicionales ---
-                instrucciones_adicionales = ""
-                # Construir la ruta relativa al script actual
-                script_dir = os.path.dirname(__file__)
-                ruta_instrucciones = os.path.join(script_dir, 'instructions', 'formato_instrucciones.txt')
-                try:
-                    with open(ruta_instrucciones, 'r', encoding='utf-8') as f_inst:
-                        instrucciones_leidas = f_inst.read().strip()
-                    if instrucciones_leidas:
-                        # Agregar delimitador solo si hay contenido
-                        instrucciones_adicionales = f"--- INSTRUCCIONES ADICIONALES DE FORMATO ---\n\n{instrucciones_leidas}"
-                except FileNotFoundError:
-                    print(f"[Advertencia] Archivo de instrucciones no encontrado en: {ruta_instrucciones}")
-                    # Opcional: messagebox.showwarning("Advertencia", "No se encontró el archivo de instrucciones adicionales.")
-                except Exception as e_inst:
-                    print(f"[Error] No se pudo leer el archivo de instrucciones: {e_inst}")
-                    # Opcional: messagebox.showerror("Error", f"No se pudo leer el archivo de instrucciones:\n{e_inst}")
-                # --- FIN: Leer instrucciones adicionales ---
-
-                partes_finales = []
-
-                # 1. Prompt (si aplica)
-                if prompt_text and not self.solo_consulta_var.get():
-                    partes_finales.append(prompt_text)
-
-                # 2. Instrucciones Adicionales (si se leyeron y no es solo consulta)
-                if instrucciones_adicionales and not self.solo_consulta_var.get():
-                    partes_finales.append(instrucciones_adicionales)
-
-                # 3. Solicitud (si existe)
-                if solicitud_text:
-                    partes_finales.append(f"--- SOLICITUD ---\n{solicitud_text}")
-
-                # 4. Contexto de Archivos
-                partes_finales.append(f"--- CONTEXTO ARCHIVOS ({'Rutas Incluidas' if self.incluir_ruta_var.get() else 'Solo Nombres'}) ---{contenido}")
-
-                final_content = "\n\n".join(partes_finales).strip()
-
-                try:
-                    pyperclip.copy(final_content)
-                    self.config_handler.save_project_config(proyecto_actual, config_data)
-
-                    mensaje = "Contenido copiado y configuración guardada."
-                    if no_encontrados:
-                        mensaje += "\n\nArchivos específicos no encontrados:\n- " + "\n- ".join(no_encontrados)
-                    messagebox.showinfo("Operación Exitosa", mensaje)
-
-                except pyperclip.PyperclipException as clip_error:
-                    messagebox.showerror("Error Copiando", f"No se pudo copiar al portapapeles: {clip_error}")
-                except Exception as save_error:
-                    messagebox.showerror("Error Guardando", f"Contenido copiado, pero hubo un error al guardar la configuración: {save_error}")
-
-            elif no_encontrados:
-                messagebox.showwarning("Archivos No Encontrados", "No se generó contenido.\nArchivos específicos no encontrados:\n- " + "\n- ".join(no_encontrados))
-
-        except Exception as e:
-            messagebox.showerror("Error Crítico en Procesamiento", f"Se produjo un error inesperado al procesar los archivos:\n{str(e)}")
+    def _detener_vigilancia(self):
+        if self.vigilante:
+            self.vigilante.stop()
+            self.vigilante = None
 
+    def _toggle_vigilancia(self):
+        """Activa o desactiva la vigilancia del proyecto actual (se guarda con el proyecto al copiar)."""
+        if not self.vigilar_var.get():
+            self._detener_vigilancia()
+            return
+        proyecto = self.project_selector.get_selected()
+        if not proyecto:
+            messagebox.showerror("Error", "Selecciona o crea un proyecto primero.")
+            self.vigilar_var.set(False)
+            return
+        if not self._iniciar_vigilancia(proyecto):
+            messagebox.showerror("Error", "La Ruta Base del Proyecto no es válida o no existe.")
+            self.vigilar_var.set(False)
 
     def _toggle_generador_archivos(self):
         """Activa o desactiva el monitor de portapapeles para generar archivos."""
@@ -435,8 +730,14 @@ class MainWindow:
                 self.file_generator.stop()
                 self.file_generator.join(timeout=1)
 
+            proyecto = self.project_selector.get_selected()
+            config_proyecto = (self.config_handler.get_project_config(proyecto) if proyecto else None) or {}
             try:
-                self.file_generator = FileGenerator(base_path)
+                self.file_generator = FileGenerator(
+                    base_path,
+                    crear_portapapeles(config_proyecto.get("portapapeles_generador", "pyperclip"), self.root)
+                )
+                self.file_generator.ignorar(self.huella_ultima_copia)
                 self.file_generator.start()
                 messagebox.showinfo(
                     "Generador Activado",
@@ -487,11 +788,13 @@ class MainWindow:
             if messagebox.askyesno("Generador Activo", "El generador de archivos está activo. ¿Deseas detenerlo y salir?"):
                 self.file_generator.stop()
                 self.file_generator.join(timeout=1)
+                self._detener_vigilancia()
                 self.root.destroy()
             else:
                 return # No cerrar si el usuario cancela
         else:
             if messagebox.askokcancel("Salir", "¿Estás seguro de que quieres salir?"):
+                self._detener_vigilancia()
                 self.root.destroy()
 
 # --- Fin de la clase MainWindow ---
\ No newline at end of file
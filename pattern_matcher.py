@@ -0,0 +1,147 @@
+# pattern_matcher.py
+import os
+from collections import deque
+from functools import lru_cache
+
+NEGATIVO = 1
+POSITIVO = 2
+
+
+class PatternMatcher:
+    """
+    Patrones '+incluir'/'-excluir' compilados en un autómata Aho-Corasick.
+    Cada componente de ruta se recorre una sola vez, carácter a carácter, y se obtiene
+    a la vez si contiene algún patrón negativo y/o positivo. El resultado por componente
+    se memoriza, ya que los nombres de directorio se repiten en casi todas las rutas.
+    """
+
+    def __init__(self, positive_patterns, negative_patterns):
+        self.positive_patterns = [p.lower() for p in positive_patterns if p]
+        self.negative_patterns = [p.lower() for p in negative_patterns if p]
+        self.tiene_positivos = bool(self.positive_patterns)
+        self._transiciones = [{}]
+        self._fallos = [0]
+        self._salidas = [0]
+        self._memo_componentes = {}
+        self._memo_bases = {}
+        self._compilar()
+
+    @classmethod
+    def desde_cadena(cls, patrones_str):
+        """Construye el matcher a partir del campo 'patrones' ("+incluir,-excluir,...")."""
+        all_patterns = [p.strip().lower() for p in (patrones_str or "").strip().split(',') if p.strip()]
+        positive_patterns = [p[1:] for p in all_patterns if p.startswith('+') and len(p) > 1]
+        negative_patterns = [p[1:] for p in all_patterns if p.startswith('-') and len(p) > 1]
+        return cls(positive_patterns, negative_patterns)
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def compilado(positive_patterns, negative_patterns):
+        """Devuelve un matcher compartido para las tuplas de patrones dadas."""
+        return PatternMatcher(positive_patterns, negative_patterns)
+
+    def _compilar(self):
+        for patron, marca in [(p, NEGATIVO) for p in self.negative_patterns] + [(p, POSITIVO) for p in self.positive_patterns]:
+            estado = 0
+            for caracter in patron:
+                siguiente = self._transiciones[estado].get(caracter)
+                if siguiente is None:
+                    siguiente = len(self._transiciones)
+                    self._transiciones.append({})
+                    self._fallos.append(0)
+                    self._salidas.append(0)
+                    self._transiciones[estado][caracter] = siguiente
+                estado = siguiente
+            self._salidas[estado] |= marca
+
+        # Enlaces de fallo en anchura; cada estado hereda las salidas de su enlace de fallo
+        cola = deque(self._transiciones[0].values())
+        while cola:
+            estado = cola.popleft()
+            for caracter, siguiente in self._transiciones[estado].items():
+                cola.append(siguiente)
+                fallo = self._fallos[estado]
+                while fallo and caracter not in self._transiciones[fallo]:
+                    fallo = self._fallos[fallo]
+                destino = self._transiciones[fallo].get(caracter, 0)
+                self._fallos[siguiente] = destino if destino != siguiente else 0
+                self._salidas[siguiente] |= self._salidas[self._fallos[siguiente]]
+
+    def evaluar_componente(self, componente):
+        """Devuelve una máscara NEGATIVO/POSITIVO con los tipos de patrón presentes en 'componente' (ya en minúsculas)."""
+        mascara = self._memo_componentes.get(componente)
+        if mascara is not None:
+            return mascara
+
+        mascara = 0
+        transiciones = self._transiciones
+        fallos = self._fallos
+        salidas = self._salidas
+        estado = 0
+        for caracter in componente:
+            while estado and caracter not in transiciones[estado]:
+                estado = fallos[estado]
+            estado = transiciones[estado].get(caracter, 0)
+            mascara |= salidas[estado]
+            if mascara == NEGATIVO | POSITIVO:
+                break
+        self._memo_componentes[componente] = mascara
+        return mascara
+
+    def incluye_componentes(self, componentes, solo_negativos=False):
+        """Aplica la semántica de _should_include a componentes de ruta ya en minúsculas."""
+        encontrado_positivo = False
+        for componente in componentes:
+            mascara = self.evaluar_componente(componente)
+            if mascara & NEGATIVO:
+                return False
+            if mascara & POSITIVO:
+                encontrado_positivo = True
+        if solo_negativos or not self.tiene_positivos:
+            return True
+        return encontrado_positivo
+
+    def mascara_componentes(self, componentes):
+        """Combina (OR) las máscaras de varios componentes ya en minúsculas."""
+        mascara = 0
+        for componente in componentes:
+            mascara |= self.evaluar_componente(componente)
+        return mascara
+
+    def incluye_mascara(self, mascara, solo_negativos=False):
+        """Semántica de incluye_componentes a partir de una máscara ya combinada."""
+        if mascara & NEGATIVO:
+            return False
+        if solo_negativos or not self.tiene_positivos:
+            return True
+        return bool(mascara & POSITIVO)
+
+    def componentes_relativos(self, path, project_base_path):
+        """
+        Componentes en minúsculas de 'path' relativos a 'project_base_path'.
+        Si la ruta no cuelga de la base, se usa solo su último componente.
+        """
+        normalized_path_full = os.path.normpath(path).lower()
+        normalized_base = self._memo_bases.get(project_base_path)
+        if normalized_base is None:
+            normalized_base = os.path.normpath(project_base_path).lower()
+            self._memo_bases[project_base_path] = normalized_base
+
+        if normalized_path_full.startswith(normalized_base):
+            prefijo = normalized_base if normalized_base.endswith(os.sep) else normalized_base + os.sep
+            if normalized_path_full.startswith(prefijo):
+                # Camino rápido: hijo directo de la base, equivalente a os.path.relpath
+                relative_path_str = normalized_path_full[len(prefijo):]
+            else:
+                relative_path_str = os.path.relpath(normalized_path_full, normalized_base)
+            if relative_path_str == "." or not relative_path_str:
+                return []
+            return [comp for comp in relative_path_str.split(os.sep) if comp]
+        return [os.path.basename(normalized_path_full)]
+
+    def incluye(self, path, project_base_path, solo_negativos=False):
+        """Indica si 'path' debe incluirse según los patrones compilados."""
+        return self.incluye_componentes(
+            self.componentes_relativos(path, project_base_path),
+            solo_negativos
+        )
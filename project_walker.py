@@ -0,0 +1,167 @@
+# project_walker.py
+import os
+
+
+class EntradaDirectorio:
+    """Directorio visitado, con su ruta relativa y su máscara de patrones ya calculadas."""
+    __slots__ = ("ruta", "nombre", "relativa", "mascara", "heredada", "dentro_base", "es_enlace")
+
+    def __init__(self, ruta, nombre, relativa, mascara, heredada, dentro_base, es_enlace=False):
+        self.ruta = ruta
+        self.nombre = nombre
+        # Ruta relativa a ruta_base con '/' ("" para la propia base); None si no cuelga de ella
+        self.relativa = relativa
+        # Máscara PatternMatcher de la ruta de este directorio
+        self.mascara = mascara
+        # Máscara que heredan sus hijos (0 fuera de ruta_base, donde solo cuenta el nombre final)
+        self.heredada = heredada
+        self.dentro_base = dentro_base
+        self.es_enlace = es_enlace
+
+    def hijo(self, nombre, matcher, es_enlace=False):
+        mascara = self.heredada | matcher.evaluar_componente(nombre.lower()) if matcher else 0
+        return EntradaDirectorio(
+            os.path.join(self.ruta, nombre),
+            nombre,
+            _unir_relativa(self.relativa, nombre),
+            mascara,
+            mascara if self.dentro_base else 0,
+            self.dentro_base,
+            es_enlace
+        )
+
+
+class EntradaArchivo:
+    """
+    Archivo encontrado por el recorrido. La ruta completa, la ruta relativa y la máscara
+    se derivan del directorio padre sin volver a normalizar rutas; el stat se toma del
+    DirEntry de os.scandir cuando existe (queda cacheado en él).
+    """
+    __slots__ = ("nombre", "directorio", "especifico", "_dirent", "_ruta")
+
+    def __init__(self, nombre, directorio, dirent=None):
+        self.nombre = nombre
+        self.directorio = directorio
+        # True si procede de "Archivos Específicos" y no del recorrido
+        self.especifico = False
+        self._dirent = dirent
+        self._ruta = None
+
+    @property
+    def ruta(self):
+        if self._ruta is None:
+            self._ruta = os.path.join(self.directorio.ruta, self.nombre)
+        return self._ruta
+
+    @property
+    def relativa(self):
+        return _unir_relativa(self.directorio.relativa, self.nombre)
+
+    def mascara(self, matcher):
+        return self.directorio.heredada | matcher.evaluar_componente(self.nombre.lower())
+
+    def stat(self):
+        """Stat del archivo (siguiendo enlaces). Lanza OSError si no se puede obtener."""
+        if self._dirent is not None:
+            return self._dirent.stat()
+        return os.stat(self.ruta)
+
+
+def _unir_relativa(relativa_padre, nombre):
+    if relativa_padre is None:
+        return None
+    if not relativa_padre:
+        return nombre
+    return relativa_padre + "/" + nombre
+
+
+class ProjectWalker:
+    """
+    Recorrido del proyecto basado en os.scandir (o en un TreeIndex si se proporciona).
+    Produce el mismo orden que os.walk(topdown=True), pero cada entrada lleva su ruta
+    relativa y su máscara de patrones calculadas de forma incremental desde el padre.
+    """
+
+    def __init__(self, ruta_base, matcher=None, indice=None):
+        self.ruta_base = os.path.normpath(ruta_base)
+        self._ruta_base_lower = self.ruta_base.lower()
+        self.matcher = matcher
+        self.indice = indice
+
+    def directorio(self, ruta):
+        """Construye la entrada de un directorio arbitrario calculando su posición respecto a ruta_base."""
+        ruta = os.path.normpath(ruta)
+        dentro_base = ruta.lower().startswith(self._ruta_base_lower)
+        mascara = 0
+        if self.matcher and dentro_base:
+            mascara = self.matcher.mascara_componentes(self.matcher.componentes_relativos(ruta, self.ruta_base))
+        try:
+            if os.path.commonpath([ruta, self.ruta_base]) == self.ruta_base:
+                relativa = os.path.relpath(ruta, start=self.ruta_base).replace("\\", "/")
+                relativa = "" if relativa == "." else relativa
+            else:
+                relativa = None
+        except ValueError:
+            relativa = None
+        return EntradaDirectorio(
+            ruta,
+            os.path.basename(ruta),
+            relativa,
+            mascara,
+            mascara if dentro_base else 0,
+            dentro_base
+        )
+
+    def archivo(self, ruta):
+        """Construye la entrada de un archivo dado por su ruta (p. ej. un archivo específico)."""
+        ruta = os.path.normpath(ruta)
+        return EntradaArchivo(os.path.basename(ruta), self.directorio(os.path.dirname(ruta)))
+
+    def _listar(self, directorio):
+        """Devuelve (subdirectorios, archivos) de 'directorio' o None si no se puede listar."""
+        if self.indice is not None:
+            entrada = self.indice.listar(directorio.ruta)
+            if entrada is None:
+                return None
+            enlaces = entrada["enlaces"]
+            subdirs = [directorio.hijo(d, self.matcher, d in enlaces) for d in entrada["dirs"]]
+            archivos = [EntradaArchivo(a[0], directorio) for a in entrada["archivos"]]
+            return subdirs, archivos
+
+        subdirs = []
+        archivos = []
+        try:
+            with os.scandir(directorio.ruta) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        try:
+                            es_enlace = entry.is_symlink()
+                        except OSError:
+                            es_enlace = False
+                        subdirs.append(directorio.hijo(entry.name, self.matcher, es_enlace))
+                    else:
+                        archivos.append(EntradaArchivo(entry.name, directorio, entry))
+        except OSError:
+            return None
+        return subdirs, archivos
+
+    def recorrer(self, top):
+        """
+        Genera (directorio, subdirs, archivos) en preorden, como os.walk(topdown=True).
+        El llamador puede podar 'subdirs' in situ; no se desciende por enlaces a directorios.
+        """
+        pila = [self.directorio(top)]
+        while pila:
+            directorio = pila.pop()
+            listado = self._listar(directorio)
+            if listado is None:
+                continue
+            subdirs, archivos = listado
+            yield directorio, subdirs, archivos
+            for subdir in reversed(subdirs):
+                if not subdir.es_enlace:
+                    pila.append(subdir)
@@ -0,0 +1,301 @@
+# project_watcher.py
+import copy
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from context_report import InformeContexto
+from file_operations import FileProcessor
+
+# Contexto precalculado: bloques = tupla con el bloque START FILE/END FILE de cada archivo (sin cabecera).
+# Se guardan separados para que el destino "partes" pueda cortar entre archivos.
+ContextoCaliente = namedtuple("ContextoCaliente", ["config", "incluir_ruta", "generacion", "bloques", "informe"])
+
+# Constantes de inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+MASCARA_INOTIFY = (
+    IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+    | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+_CABECERA_EVENTO = struct.Struct("iIII") # wd, mask, cookie, len
+
+
+class _DetectorInotify:
+    """Cambios en el árbol mediante inotify (solo Linux). Vigila cada directorio no excluido."""
+
+    def __init__(self, ruta_base, excluido):
+        self.excluido = excluido
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self._rutas = {} # wd -> directorio
+        try:
+            self._vigilar_arbol(ruta_base)
+        except OSError:
+            self.cerrar()
+            raise
+
+    def _vigilar_arbol(self, raiz):
+        pila = [raiz]
+        while pila:
+            directorio = pila.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directorio), MASCARA_INOTIFY)
+            if wd < 0:
+                codigo = ctypes.get_errno()
+                if codigo == errno.ENOSPC:
+                    # Límite fs.inotify.max_user_watches agotado: el llamador pasa a sondeo
+                    raise OSError(codigo, "Límite de vigilancias de inotify alcanzado")
+                continue # Directorio borrado o sin permisos entre el listado y la vigilancia
+            self._rutas[wd] = directorio
+            try:
+                with os.scandir(directorio) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False) and not self.excluido(entry.path):
+                            pila.append(entry.path)
+            except OSError:
+                continue
+
+    def esperar(self, timeout):
+        """Espera eventos hasta 'timeout' segundos. Devuelve True si alguno afecta al proyecto."""
+        listos, _, _ = select.select([self._fd], [], [], timeout)
+        if not listos:
+            return False
+        relevante = False
+        nuevos_directorios = []
+        while True:
+            try:
+                datos = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not datos:
+                break
+            desplazamiento = 0
+            while desplazamiento < len(datos):
+                wd, mascara, _, longitud = _CABECERA_EVENTO.unpack_from(datos, desplazamiento)
+                desplazamiento += _CABECERA_EVENTO.size
+                nombre = datos[desplazamiento:desplazamiento + longitud].rstrip(b"\0")
+                desplazamiento += longitud
+                if mascara & IN_Q_OVERFLOW:
+                    relevante = True
+                    continue
+                directorio = self._rutas.get(wd)
+                if mascara & IN_IGNORED:
+                    self._rutas.pop(wd, None)
+                    continue
+                if directorio is None:
+                    continue
+                ruta = os.path.join(directorio, os.fsdecode(nombre)) if nombre else directorio
+                if self.excluido(ruta):
+                    continue
+                relevante = True
+                if mascara & IN_ISDIR and mascara & (IN_CREATE | IN_MOVED_TO):
+                    nuevos_directorios.append(ruta)
+        for directorio in nuevos_directorios:
+            self._vigilar_arbol(directorio)
+        return relevante
+
+    def cerrar(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _DetectorSondeo:
+    """Cambios en el árbol comparando periódicamente mtime y tamaño de directorios y archivos."""
+
+    def __init__(self, ruta_base, excluido, intervalo):
+        self.ruta_base = ruta_base
+        self.excluido = excluido
+        self.intervalo = intervalo
+        self._firma = self._calcular_firma()
+        self._proximo = time.monotonic() + intervalo
+
+    def _calcular_firma(self):
+        firma = {}
+        pila = [self.ruta_base]
+        while pila:
+            directorio = pila.pop()
+            try:
+                with os.scandir(directorio) as it:
+                    for entry in it:
+                        try:
+                            st = entry.stat(follow_symlinks=False)
+                            if entry.is_dir(follow_symlinks=False):
+                                if self.excluido(entry.path):
+                                    continue
+                                pila.append(entry.path)
+                        except OSError:
+                            continue
+                        firma[entry.path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        return firma
+
+    def esperar(self, timeout):
+        restante = self._proximo - time.monotonic()
+        if restante > timeout:
+            time.sleep(timeout)
+            return False
+        time.sleep(max(0.0, restante))
+        self._proximo = time.monotonic() + self.intervalo
+        firma = self._calcular_firma()
+        cambiado = firma != self._firma
+        self._firma = firma
+        return cambiado
+
+    def cerrar(self):
+        pass
+
+
+class VigilanteProyecto(threading.Thread):
+    """
+    Vigila la ruta base de un proyecto (inotify en Linux; sondeo de mtimes en otro caso o si
+    inotify falla) y mantiene precalculado su contexto: al terminar una ráfaga de cambios se
+    vuelve a generar en segundo plano, lo que además mantiene al día el índice del árbol y la
+    caché de bloques. "Copiar y Guardar" usa el contexto precalculado si sigue vigente.
+    """
+    # Una ráfaga (p. ej. un checkout) termina tras ESPERA segundos sin eventos;
+    # si no termina, se regenera igualmente cada MAX_ESPERA segundos.
+    ESPERA = 0.5
+    MAX_ESPERA = 5.0
+    INTERVALO_SONDEO = 2.0
+    PASO = 0.25 # Máximo tiempo entre comprobaciones de stop()
+
+    def __init__(self, config, incluir_ruta, directorio_datos):
+        super().__init__()
+        self.daemon = True
+        self.running = False
+        self.ruta_base = os.path.normpath(config["ruta_base"])
+        self.directorio_datos = os.path.abspath(directorio_datos) if directorio_datos else None
+        # Serializa las generaciones: este hilo, "Copiar y Guardar" y la vista previa comparten índice y caché
+        self.lock_construccion = FileProcessor.lock_construccion
+        self._lock = threading.Lock()
+        self._config = dict(config)
+        self._incluir_ruta = incluir_ruta
+        self._generacion = 1 # Cambios vistos; el contexto vale si se generó con la generación actual
+        self._generacion_pedida = 1
+        self._contexto = None
+        self._excluidos = set()
+        self._actualizar_excluidos()
+
+    def _actualizar_excluidos(self):
+        self._excluidos = {
+            d.strip() for d in self._config.get("directorios_prohibidos", "").split(",") if d.strip()
+        }
+
+    def _excluido(self, ruta):
+        """Cambios que no afectan al contexto: directorios prohibidos y los datos del propio proyecto."""
+        if self.directorio_datos and (ruta + os.sep).startswith(self.directorio_datos + os.sep):
+            return True
+        relativa = os.path.relpath(ruta, self.ruta_base)
+        return any(parte in self._excluidos for parte in relativa.split(os.sep))
+
+    def stop(self):
+        self.running = False
+
+    def actualizar_config(self, config, incluir_ruta):
+        """Usa otra configuración; si cambió, el contexto se regenera en segundo plano."""
+        with self._lock:
+            if config == self._config and incluir_ruta == self._incluir_ruta:
+                return
+            self._config = dict(config)
+            self._incluir_ruta = incluir_ruta
+            self._actualizar_excluidos()
+            self._generacion += 1
+
+    def obtener(self, config, incluir_ruta):
+        """
+        Devuelve (bloques, informe) del contexto precalculado si corresponde a 'config' y no
+        hubo cambios desde que se generó; None en otro caso. El informe es una copia.
+        """
+        with self._lock:
+            contexto = self._contexto
+            if (
+                contexto is None
+                or contexto.generacion != self._generacion
+                or contexto.incluir_ruta != incluir_ruta
+                or contexto.config != config
+            ):
+                return None
+        informe = copy.copy(contexto.informe)
+        informe.metricas = contexto.informe.metricas.copia()
+        return contexto.bloques, informe
+
+    def _crear_detector(self):
+        if sys.platform.startswith("linux"):
+            try:
+                return _DetectorInotify(self.ruta_base, self._excluido)
+            except (OSError, AttributeError) as e:
+                print(f"[Vigilancia] inotify no disponible ({e}). Se usa sondeo cada {self.INTERVALO_SONDEO:.0f} s.")
+        return _DetectorSondeo(self.ruta_base, self._excluido, self.INTERVALO_SONDEO)
+
+    def _generar(self):
+        with self._lock:
+            generacion = self._generacion
+            config = dict(self._config, solo_cambios=False)
+            incluir_ruta = self._incluir_ruta
+        inicio = time.perf_counter()
+        informe = InformeContexto()
+        with self.lock_construccion:
+            bloques = tuple(FileProcessor.iter_contexto(config, incluir_ruta, None, self.directorio_datos, informe))
+        with self._lock:
+            self._generacion_pedida = generacion
+            config.pop("solo_cambios")
+            self._contexto = ContextoCaliente(config, incluir_ruta, generacion, bloques, informe)
+        print(f"[Vigilancia] Contexto actualizado: {informe.archivos_emitidos} archivos en {time.perf_counter() - inicio:.2f} s.")
+
+    def run(self):
+        self.running = True
+        try:
+            detector = self._crear_detector()
+        except Exception as e:
+            print(f"[Vigilancia] No se pudo vigilar {self.ruta_base}: {e}")
+            self.running = False
+            return
+        print(f"[Vigilancia] Vigilando {self.ruta_base}")
+        primer_cambio = None
+        ultimo_cambio = None
+        self._generacion_pedida = 0 # Fuerza la generación inicial
+        try:
+            while self.running:
+                if detector.esperar(self.PASO):
+                    with self._lock:
+                        self._generacion += 1
+                    ultimo_cambio = time.monotonic()
+                    primer_cambio = primer_cambio or ultimo_cambio
+                with self._lock:
+                    pendiente = self._generacion != self._generacion_pedida
+                if not pendiente:
+                    continue
+                ahora = time.monotonic()
+                if ultimo_cambio is None or ahora - ultimo_cambio >= self.ESPERA or ahora - primer_cambio >= self.MAX_ESPERA:
+                    primer_cambio = ultimo_cambio = None
+                    try:
+                        self._generar()
+                    except Exception as e:
+                        print(f"[Vigilancia] Error generando el contexto: {e}")
+                        with self._lock:
+                            self._generacion_pedida = self._generacion
+        finally:
+            detector.cerrar()
+            print(f"[Vigilancia] Detenida para {self.ruta_base}")
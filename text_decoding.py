@@ -0,0 +1,87 @@
+# text_decoding.py
+import codecs
+
+# Códec para los archivos que no son UTF-8 válido ni llevan BOM (ver 'codificacion_alternativa')
+CODIFICACION_ALTERNATIVA_POR_DEFECTO = "cp1252"
+
+# BOM -> códec sin BOM. Los de UTF-32 van antes: el BOM UTF-32-LE empieza como el de UTF-16-LE.
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+# UTF-16 sin BOM: en texto mayormente ASCII, uno de cada dos bytes es cero
+MIN_PROPORCION_CEROS_UTF16 = 0.40
+MAX_PROPORCION_CEROS_OTRA_MITAD = 0.05
+MAX_PROPORCION_CONTROL_UTF16 = 0.01
+_CONTROLES_PERMITIDOS = frozenset("\t\n\r\f")
+
+
+def detectar_codificacion(muestra):
+    """
+    Codificación de un archivo a partir de sus primeros bytes: (códec, longitud del BOM).
+    Reconoce los BOM de UTF-8, UTF-16 y UTF-32 y el UTF-16 sin BOM. Devuelve (None, 0)
+    en otro caso: UTF-8 sin BOM o la codificación alternativa (ver decodificar).
+    """
+    for bom, codificacion in BOMS:
+        if muestra.startswith(bom):
+            return codificacion, len(bom)
+    if b"\x00" not in muestra:
+        return None, 0
+    mitad = len(muestra) // 2
+    if mitad < 2:
+        return None, 0
+    ceros_pares = muestra[0::2].count(0)
+    ceros_impares = muestra[1::2].count(0)
+    if ceros_impares >= MIN_PROPORCION_CEROS_UTF16 * mitad and ceros_pares <= MAX_PROPORCION_CEROS_OTRA_MITAD * mitad:
+        codificacion = "utf-16-le"
+    elif ceros_pares >= MIN_PROPORCION_CEROS_UTF16 * mitad and ceros_impares <= MAX_PROPORCION_CEROS_OTRA_MITAD * mitad:
+        codificacion = "utf-16-be"
+    else:
+        return None, 0
+    # Un binario con enteros de 16 bits también alterna ceros: el texto decodificado no debe tener controles
+    try:
+        texto = muestra[:2 * mitad].decode(codificacion)
+    except UnicodeDecodeError:
+        return None, 0
+    controles = sum(1 for c in texto if c < " " and c not in _CONTROLES_PERMITIDOS)
+    if controles > MAX_PROPORCION_CONTROL_UTF16 * len(texto):
+        return None, 0
+    return codificacion, 0
+
+
+def es_utf8(datos):
+    """True si 'datos' es UTF-8 válido, admitiendo una secuencia multibyte cortada al final (una muestra)."""
+    if datos.isascii():
+        return True
+    try:
+        datos.decode("utf-8")
+    except UnicodeDecodeError as e:
+        return e.reason == "unexpected end of data" and e.start >= len(datos) - 3
+    return True
+
+
+def decodificar(datos, codificacion=None, alternativa=CODIFICACION_ALTERNATIVA_POR_DEFECTO):
+    """
+    Decodifica 'datos' (sin BOM) en una sola pasada y unifica los saltos de línea, como open() en modo texto.
+    Con 'codificacion' (la detectada) se usa esa; si no, UTF-8 estricto y, si no es UTF-8
+    válido, 'alternativa'. Los bytes no decodificables se sustituyen por U+FFFD en lugar de perderse.
+    """
+    if codificacion:
+        contenido = datos.decode(codificacion, errors="replace")
+    else:
+        # El decodificador UTF-8 estricto ya recorre en bloque los tramos ASCII
+        try:
+            contenido = datos.decode("utf-8")
+        except UnicodeDecodeError:
+            contenido = datos.decode(alternativa, errors="replace")
+    if "\r" in contenido:
+        contenido = contenido.replace("\r\n", "\n").replace("\r", "\n")
+    return contenido
+
+
+def bytes_utf8(texto):
+    """Tamaño en UTF-8 de 'texto'; sin codificarlo si es ASCII (str.isascii no recorre el texto)."""
+    return len(texto) if texto.isascii() else len(texto.encode("utf-8"))
@@ -0,0 +1,255 @@
+# token_budget.py
+import json
+import math
+import os
+import re
+import threading
+
+from text_decoding import bytes_utf8
+
+# Trozos de palabra de hasta 4 caracteres y cada signo de puntuación cuentan como un token.
+# Se aproxima bien a los tokenizadores BPE habituales para código y se evalúa en una sola pasada en C.
+_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+# Relación media bytes/token del estimador sobre código fuente; sirve para anticipar
+# el coste de un archivo solo con su tamaño, antes de leerlo.
+BYTES_POR_TOKEN = 3.5
+
+
+def estimar_tokens(texto):
+    """Estimación rápida del número de tokens de 'texto'."""
+    return _TOKEN_RE.subn("", texto)[1]
+
+
+def estimar_bloque(entrada, st, cache=None, max_bytes=0):
+    """
+    (tokens, bytes) previstos para el bloque START FILE/END FILE de 'entrada' sin leerlo:
+    el recuento cacheado si sigue vigente o una estimación por tamaño. 'st' es su stat;
+    con 'max_bytes' se acota el tamaño estimado (p. ej. a lo que ocupa un extracto).
+    """
+    tamano = min(st.st_size, max_bytes) if max_bytes else st.st_size
+    bytes_estimados = tamano + 2 * len(entrada.nombre) + 40
+    tokens = cache.obtener(entrada.ruta, st.st_mtime_ns, st.st_size) if cache else None
+    if tokens is None:
+        tokens = math.ceil(bytes_estimados / BYTES_POR_TOKEN)
+    return tokens, bytes_estimados
+
+
+class TokenCountCache:
+    """
+    Recuento de tokens por archivo, válido mientras no cambien su mtime ni su tamaño.
+    Se persiste en el directorio de datos del proyecto para reutilizarlo entre sesiones.
+    """
+    CACHE_FILE = "token_counts.json"
+
+    _cargadas = {}
+    _lock_cargadas = threading.Lock()
+
+    def __init__(self, ruta_archivo=None):
+        self.ruta_archivo = ruta_archivo
+        self.recuentos = {}
+        self.modificado = False
+
+    @classmethod
+    def para_proyecto(cls, directorio_datos):
+        """Caché del proyecto (solo en memoria si no hay directorio de datos)."""
+        if not directorio_datos:
+            return cls()
+        ruta_archivo = os.path.join(directorio_datos, cls.CACHE_FILE)
+        with cls._lock_cargadas:
+            cache = cls._cargadas.get(ruta_archivo)
+            if cache is None:
+                cache = cls(ruta_archivo)
+                cache._cargar()
+                cls._cargadas[ruta_archivo] = cache
+        return cache
+
+    def _cargar(self):
+        if not os.path.exists(self.ruta_archivo):
+            return
+        try:
+            with open(self.ruta_archivo, "r", encoding="utf-8") as f:
+                self.recuentos = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"[Advertencia] Caché de tokens ilegible ({self.ruta_archivo}): {e}")
+            self.recuentos = {}
+
+    def obtener(self, ruta, mtime_ns, tamano):
+        registro = self.recuentos.get(ruta)
+        if registro and registro[0] == mtime_ns and registro[1] == tamano:
+            return registro[2]
+        return None
+
+    def guardar(self, ruta, mtime_ns, tamano, tokens):
+        self.recuentos[ruta] = [mtime_ns, tamano, tokens]
+        self.modificado = True
+
+    def persistir(self):
+        if not self.ruta_archivo or not self.modificado:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.ruta_archivo), exist_ok=True)
+            ruta_temporal = self.ruta_archivo + ".tmp"
+            with open(ruta_temporal, "w", encoding="utf-8") as f:
+                json.dump(self.recuentos, f, separators=(",", ":"))
+            os.replace(ruta_temporal, self.ruta_archivo)
+            self.modificado = False
+        except (IOError, OSError) as e:
+            print(f"Error guardando caché de tokens {self.ruta_archivo}: {e}")
+
+
+class TokenBudget:
+    """
+    Empaquetado del contexto dentro de un presupuesto de tokens y/o bytes.
+    Actúa en dos puntos del flujo: antes de leer (con el recuento cacheado o una
+    estimación por tamaño) para no leer archivos que no caben, y sobre cada bloque
+    leído para aplicar el límite exacto. Lo descartado se anota en el InformeContexto.
+    """
+    ORDENES = ("recorrido", "menor_tamano")
+
+    # Bytes iniciales con los que se estima la longitud media de línea de un extracto
+    MUESTRA_LINEAS = 8192
+
+    def __init__(self, max_tokens, max_bytes, cache, informe, orden="recorrido",
+                 umbral_extracto=0, lineas_extracto=0, max_bytes_extracto=0):
+        self.max_tokens = max_tokens
+        self.max_bytes = max_bytes
+        # Los archivos de más de 'umbral_extracto' bytes (0 = nunca) se emiten como un extracto
+        # de 'lineas_extracto' líneas y como mucho 'max_bytes_extracto' bytes
+        self.umbral_extracto = umbral_extracto
+        self.lineas_extracto = lineas_extracto
+        self.max_bytes_extracto = max_bytes_extracto
+        self.cache = cache
+        self.informe = informe
+        self.orden = orden if orden in self.ORDENES else "recorrido"
+        self.tokens_emitidos = 0
+        self.bytes_emitidos = 0
+        # Estimaciones de los archivos ya enviados a leer y aún no emitidos
+        self._pendientes = {}
+        self._tokens_pendientes = 0
+        self._bytes_pendientes = 0
+        informe.presupuesto_tokens = max_tokens
+        informe.presupuesto_bytes = max_bytes
+
+    @classmethod
+    def desde_config(cls, config, directorio_datos, informe, umbral_extracto=0, lineas_extracto=0, max_bytes_extracto=0):
+        """
+        Crea el presupuesto del proyecto o devuelve None si no hay límites configurados.
+        'umbral_extracto' y 'max_bytes_extracto' describen los extractos de archivos grandes (ver __init__).
+        """
+        try:
+            max_tokens = int(config.get("presupuesto_tokens", 0) or 0)
+            max_bytes = int(config.get("presupuesto_bytes", 0) or 0)
+        except (TypeError, ValueError):
+            print("[Advertencia] 'presupuesto_tokens'/'presupuesto_bytes' deben ser enteros. Se ignora el presupuesto.")
+            return None
+        if max_tokens <= 0 and max_bytes <= 0:
+            return None
+        return cls(
+            max(0, max_tokens),
+            max(0, max_bytes),
+            TokenCountCache.para_proyecto(directorio_datos),
+            informe,
+            config.get("orden_presupuesto", "recorrido"),
+            umbral_extracto,
+            lineas_extracto,
+            max_bytes_extracto
+        )
+
+    def ordenar(self, entradas):
+        """Archivos específicos primero; el resto en orden de recorrido o de menor a mayor tamaño."""
+        entradas = list(entradas)
+        especificos = [e for e in entradas if e.especifico]
+        resto = [e for e in entradas if not e.especifico]
+        if self.orden == "menor_tamano":
+            resto.sort(key=self._tamano)
+        return especificos + resto
+
+    @staticmethod
+    def _tamano(entrada):
+        try:
+            return entrada.stat().st_size
+        except OSError:
+            return 0
+
+    def _estimar(self, entrada):
+        """(tokens, bytes) previstos para el bloque de 'entrada' sin leerlo."""
+        try:
+            st = entrada.stat()
+        except OSError:
+            return 0, 0
+        if self.umbral_extracto and st.st_size > self.umbral_extracto:
+            return estimar_bloque(entrada, st, self.cache, self._bytes_extracto(entrada))
+        return estimar_bloque(entrada, st, self.cache)
+
+    def _bytes_extracto(self, entrada):
+        """
+        Tamaño previsto del extracto de un archivo grande: sus líneas con la longitud media de
+        las primeras MUESTRA_LINEAS bytes, hasta 'max_bytes_extracto'. Solo se leen esos bytes.
+        """
+        try:
+            with open(entrada.ruta, "rb") as f:
+                muestra = f.read(self.MUESTRA_LINEAS)
+        except OSError:
+            return self.max_bytes_extracto
+        saltos = muestra.count(b"\n")
+        if not saltos:
+            return self.max_bytes_extracto
+        return min(self.max_bytes_extracto, math.ceil(len(muestra) / saltos * self.lineas_extracto))
+
+    def _cabe(self, tokens, bytes_bloque, incluir_pendientes=True):
+        tokens_totales = self.tokens_emitidos + tokens
+        bytes_totales = self.bytes_emitidos + bytes_bloque
+        if incluir_pendientes:
+            tokens_totales += self._tokens_pendientes
+            bytes_totales += self._bytes_pendientes
+        if self.max_tokens and tokens_totales > self.max_tokens:
+            return False
+        if self.max_bytes and bytes_totales > self.max_bytes:
+            return False
+        return True
+
+    def _descartar(self, entrada, tokens, bytes_bloque):
+        self.informe.descartados_presupuesto.append({
+            "ruta": entrada.relativa or entrada.ruta,
+            "tokens": tokens,
+            "bytes": bytes_bloque,
+        })
+
+    def filtrar_entradas(self, entradas):
+        """Deja pasar a lectura solo los archivos que, según la estimación, aún caben."""
+        for entrada in entradas:
+            tokens, bytes_bloque = self._estimar(entrada)
+            if not self._cabe(tokens, bytes_bloque):
+                self._descartar(entrada, tokens, bytes_bloque)
+                continue
+            self._pendientes[entrada.ruta] = (tokens, bytes_bloque)
+            self._tokens_pendientes += tokens
+            self._bytes_pendientes += bytes_bloque
+            yield entrada
+
+    def filtrar_bloques(self, pares):
+        """Aplica el límite exacto a los bloques leídos; 'pares' produce (entrada, bloque) y se devuelven los que caben."""
+        for entrada, bloque in pares:
+            tokens_previstos, bytes_previstos = self._pendientes.pop(entrada.ruta, (0, 0))
+            self._tokens_pendientes -= tokens_previstos
+            self._bytes_pendientes -= bytes_previstos
+
+            tokens = estimar_tokens(bloque)
+            bytes_bloque = bytes_utf8(bloque)
+            try:
+                st = entrada.stat()
+                self.cache.guardar(entrada.ruta, st.st_mtime_ns, st.st_size, tokens)
+            except OSError:
+                pass
+
+            if not self._cabe(tokens, bytes_bloque, incluir_pendientes=False):
+                self._descartar(entrada, tokens, bytes_bloque)
+                continue
+            self.tokens_emitidos += tokens
+            self.bytes_emitidos += bytes_bloque
+            self.informe.tokens_emitidos = self.tokens_emitidos
+            self.informe.bytes_emitidos = self.bytes_emitidos
+            self.informe.archivos_emitidos += 1
+            yield entrada, bloque
+        self.cache.persistir()
@@ -0,0 +1,154 @@
+# tree_index.py
+import json
+import os
+import threading
+import time
+
+
+class TreeIndex:
+    """
+    Índice persistente del árbol de un proyecto: por cada directorio guarda su mtime,
+    sus subdirectorios y sus archivos con tamaño y mtime.
+    En cada recorrido solo se vuelven a listar los directorios cuyo mtime cambió;
+    para el resto basta un stat del propio directorio.
+    """
+    INDEX_FILE = "tree_index.json"
+    VERSION = 1
+    # Un directorio modificado hace menos de este margen respecto al escaneo puede
+    # volver a cambiar sin que su mtime lo refleje (resolución del sistema de archivos).
+    MARGEN_MTIME_NS = 2_000_000_000
+
+    _cargados = {}
+    _lock_cargados = threading.Lock()
+
+    def __init__(self, ruta_archivo, ruta_base):
+        self.ruta_archivo = ruta_archivo
+        self.ruta_base = os.path.normpath(ruta_base)
+        self.directorios = {}
+        self.modificado = False
+        self.visitados = set()
+        self.directorios_reescaneados = 0
+
+    @classmethod
+    def para_proyecto(cls, directorio_datos, ruta_base):
+        """Devuelve el índice del proyecto, cargándolo de disco la primera vez en este proceso."""
+        ruta_archivo = os.path.join(directorio_datos, cls.INDEX_FILE)
+        ruta_base = os.path.normpath(ruta_base)
+        with cls._lock_cargados:
+            indice = cls._cargados.get(ruta_archivo)
+            if indice is None or indice.ruta_base != ruta_base:
+                indice = cls(ruta_archivo, ruta_base)
+                indice._cargar()
+                cls._cargados[ruta_archivo] = indice
+        indice.visitados = set()
+        indice.directorios_reescaneados = 0
+        return indice
+
+    def _cargar(self):
+        if not os.path.exists(self.ruta_archivo):
+            return
+        try:
+            with open(self.ruta_archivo, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"[Advertencia] Índice de árbol ilegible ({self.ruta_archivo}): {e}. Se reconstruirá.")
+            return
+        if datos.get("version") != self.VERSION or datos.get("ruta_base") != self.ruta_base:
+            return
+        self.directorios = datos.get("directorios", {})
+
+    def guardar(self):
+        """Persiste el índice si cambió, mediante un archivo temporal y os.replace."""
+        self._podar()
+        if not self.modificado:
+            return
+        datos = {
+            "version": self.VERSION,
+            "ruta_base": self.ruta_base,
+            "directorios": self.directorios,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.ruta_archivo), exist_ok=True)
+            ruta_temporal = self.ruta_archivo + ".tmp"
+            with open(ruta_temporal, "w", encoding="utf-8") as f:
+                json.dump(datos, f, separators=(",", ":"))
+            os.replace(ruta_temporal, self.ruta_archivo)
+            self.modificado = False
+        except (IOError, OSError) as e:
+            print(f"Error guardando índice de árbol {self.ruta_archivo}: {e}")
+
+    def _clave(self, directorio):
+        if directorio == self.ruta_base:
+            return ""
+        return os.path.relpath(directorio, self.ruta_base)
+
+    def _podar(self):
+        """Elimina entradas de directorios que ya no cuelgan de ningún directorio listado."""
+        for clave in sorted(self.directorios, key=len):
+            if not clave or clave in self.visitados:
+                continue
+            padre, nombre = os.path.split(clave)
+            entrada_padre = self.directorios.get(padre)
+            if entrada_padre is None or nombre not in entrada_padre["dirs"]:
+                del self.directorios[clave]
+                self.modificado = True
+
+    def _escanear(self, directorio, mtime_ns):
+        dirs = []
+        enlaces = []
+        archivos = []
+        inicio_ns = time.time_ns()
+        with os.scandir(directorio) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    dirs.append(entry.name)
+                    try:
+                        if entry.is_symlink():
+                            enlaces.append(entry.name)
+                    except OSError:
+                        pass
+                else:
+                    try:
+                        st = entry.stat()
+                        archivos.append([entry.name, st.st_size, st.st_mtime_ns])
+                    except OSError:
+                        archivos.append([entry.name, -1, -1])
+        entrada = {
+            "mtime_ns": mtime_ns,
+            "dirs": dirs,
+            "enlaces": enlaces,
+            "archivos": archivos,
+        }
+        if mtime_ns >= inicio_ns - self.MARGEN_MTIME_NS:
+            entrada["inestable"] = True
+        return entrada
+
+    def listar(self, directorio):
+        """Devuelve la entrada del índice para 'directorio', reescaneándolo solo si cambió. None si no existe."""
+        clave = self._clave(directorio)
+        self.visitados.add(clave)
+        try:
+            mtime_ns = os.stat(directorio).st_mtime_ns
+        except OSError:
+            if self.directorios.pop(clave, None) is not None:
+                self.modificado = True
+            return None
+
+        entrada = self.directorios.get(clave)
+        if entrada is not None and entrada["mtime_ns"] == mtime_ns and not entrada.get("inestable"):
+            return entrada
+
+        try:
+            entrada = self._escanear(directorio, mtime_ns)
+        except OSError:
+            if self.directorios.pop(clave, None) is not None:
+                self.modificado = True
+            return None
+        self.directorios[clave] = entrada
+        self.modificado = True
+        self.directorios_reescaneados += 1
+        return entrada